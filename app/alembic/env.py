@@ -11,6 +11,7 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from app.models import Base 
+from app.helper.partitions import is_partition_name
 from app.settings.settings import get_settings
 settings = get_settings()
 
@@ -36,6 +37,12 @@ target_metadata = Base.metadata
 
 config.set_main_option('sqlalchemy.url', settings.sync_database_url)
 
+def include_object(object, name, type_, reflected, compare_to):
+    # the monthly partitions are created by the app, not by the models
+    if type_ == "table" and reflected and compare_to is None and is_partition_name(name):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -52,6 +59,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -75,7 +83,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,38 @@
+"""add unique index for reddit_comments post_id and comment_id
+
+Revision ID: 4f8a2c6d1e9b
+Revises: 9c1e4b7a2f3d
+Create Date: 2026-10-18 10:04:17.925610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8a2c6d1e9b'
+down_revision: Union[str, Sequence[str], None] = '9c1e4b7a2f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # collapse the duplicates left by earlier re-scrapes, keeping the newest row of each comment
+    op.execute(
+        """
+        DELETE FROM reddit_comments a
+        USING reddit_comments b
+        WHERE a.post_id = b.post_id
+          AND a.comment_id = b.comment_id
+          AND a.id < b.id
+        """
+    )
+    op.create_index('uq_reddit_comments_post_comment', 'reddit_comments', ['post_id', 'comment_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_reddit_comments_post_comment', table_name='reddit_comments')
@@ -0,0 +1,122 @@
+"""partition reddit_comments and currency_prices by month
+
+Revision ID: e1a7c3b9d5f2
+Revises: d8e2f6a4b1c7
+Create Date: 2026-10-18 13:22:05.614208
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c3b9d5f2'
+down_revision: Union[str, Sequence[str], None] = 'd8e2f6a4b1c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# months created ahead of the current one; the app keeps this window moving (app/helper/partitions.py)
+MONTHS_AHEAD = 3
+
+# table, partition key, indexes of the partitioned table, indexes of the plain table
+# unique indexes of a partitioned table must contain the partition key
+TABLES = [
+    (
+        'reddit_comments',
+        'created_utc',
+        [
+            ('ix_reddit_comments_post_id', ['post_id'], False),
+            ('ix_reddit_comments_created_utc', ['created_utc'], False),
+            ('uq_reddit_comments_post_comment', ['post_id', 'comment_id', 'created_utc'], True),
+        ],
+        [
+            ('ix_reddit_comments_post_id', ['post_id'], False),
+            ('ix_reddit_comments_created_utc', ['created_utc'], False),
+            ('uq_reddit_comments_post_comment', ['post_id', 'comment_id'], True),
+        ],
+    ),
+    (
+        'currency_prices',
+        'timestamp',
+        [
+            ('ix_currency_prices_currency', ['currency'], False),
+            ('ix_currency_prices_timestamp', ['timestamp'], False),
+            ('ix_currency_prices_currency_timestamp', ['currency', 'timestamp'], False),
+        ],
+        [
+            ('ix_currency_prices_currency', ['currency'], False),
+            ('ix_currency_prices_timestamp', ['timestamp'], False),
+            ('ix_currency_prices_currency_timestamp', ['currency', 'timestamp'], False),
+        ],
+    ),
+]
+
+
+def add_months(month_start: datetime, months: int) -> datetime:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def create_monthly_partitions(table_name: str, first_timestamp: int | None) -> None:
+    """Partitions from the month of the oldest row up to MONTHS_AHEAD months from now."""
+    now = datetime.now(timezone.utc)
+    current_month = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+    month_start = current_month
+    if first_timestamp is not None:
+        first = datetime.fromtimestamp(first_timestamp, timezone.utc)
+        month_start = min(current_month, datetime(first.year, first.month, 1, tzinfo=timezone.utc))
+    last_month = add_months(current_month, MONTHS_AHEAD)
+    while month_start <= last_month:
+        next_month_start = add_months(month_start, 1)
+        op.execute(
+            f"CREATE TABLE {table_name}_y{month_start.year}m{month_start.month:02d} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ({int(month_start.timestamp())}) TO ({int(next_month_start.timestamp())})"
+        )
+        month_start = next_month_start
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table_name, partition_key, indexes, plain_indexes in TABLES:
+        plain_table = f'{table_name}_unpartitioned'
+        op.execute(f'ALTER TABLE {table_name} RENAME TO {plain_table}')
+        op.execute(f'ALTER TABLE {plain_table} RENAME CONSTRAINT {table_name}_pkey TO {plain_table}_pkey')
+        for index_name, _, _ in plain_indexes:
+            op.drop_index(index_name, table_name=plain_table)
+
+        # same columns and id sequence; the primary key must contain the partition key
+        op.execute(
+            f'CREATE TABLE {table_name} (LIKE {plain_table} INCLUDING DEFAULTS, PRIMARY KEY (id, "{partition_key}")) '
+            f'PARTITION BY RANGE ("{partition_key}")'
+        )
+        op.execute(f'CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT')
+        first_timestamp = bind.execute(sa.text(f'SELECT min("{partition_key}") FROM {plain_table}')).scalar()
+        create_monthly_partitions(table_name, first_timestamp)
+
+        op.execute(f'INSERT INTO {table_name} SELECT * FROM {plain_table}')
+        for index_name, columns, unique in indexes:
+            op.create_index(index_name, table_name, columns, unique=unique)
+        op.execute(f'ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id')
+        op.drop_table(plain_table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, _, indexes, plain_indexes in TABLES:
+        partitioned_table = f'{table_name}_partitioned'
+        op.execute(f'ALTER TABLE {table_name} RENAME TO {partitioned_table}')
+        op.execute(f'ALTER TABLE {partitioned_table} RENAME CONSTRAINT {table_name}_pkey TO {partitioned_table}_pkey')
+        for index_name, _, _ in indexes:
+            op.drop_index(index_name, table_name=partitioned_table)
+
+        op.execute(f'CREATE TABLE {table_name} (LIKE {partitioned_table} INCLUDING DEFAULTS, PRIMARY KEY (id))')
+        op.execute(f'INSERT INTO {table_name} SELECT * FROM {partitioned_table}')
+        for index_name, columns, unique in plain_indexes:
+            op.create_index(index_name, table_name, columns, unique=unique)
+        op.execute(f'ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id')
+        # drops the partitions as well
+        op.drop_table(partitioned_table)
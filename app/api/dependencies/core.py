@@ -1,7 +1,8 @@
 from typing import Annotated
 
-from app.database import get_db_session
+from app.database import get_db_session, get_read_db_session
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-DBSessionDep = Annotated[AsyncSession, Depends(get_db_session)]
\ No newline at end of file
+DBSessionDep = Annotated[AsyncSession, Depends(get_db_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db_session)]
@@ -1,7 +1,9 @@
 from app.api.dependencies.core import DBSessionDep
 from app.schemas.currency_prices import CurrencyPricesCreate, CurrencyPrice
-from fastapi import APIRouter, Query
+from app.database import sessionmanager
+from fastapi import APIRouter, HTTPException, Query
 from app.services.currencyPricesService import CurrencyPricesService
+from app.helper.jobLocks import job_lock_name, CURRENCY_PRICES_JOB
 router = APIRouter(
     prefix="/api/currency_prices",
     tags=["currency_prices"],
@@ -18,6 +20,9 @@ async def get_currency_prices(
     session: DBSessionDep,
     symbols: list[str] = Query(None, description="List of currency symbols to fetch prices for. If not provided, defaults to settings.currency_list.")
 ):
-    currency_prices_service = CurrencyPricesService(session)
-    await currency_prices_service.create_currency_prices_service(symbols)
+    async with sessionmanager.advisory_lock(job_lock_name(CURRENCY_PRICES_JOB)) as acquired:
+        if not acquired:
+            raise HTTPException(status_code=409, detail="Currency prices are already being fetched; location Ra5nV2kDwp")
+        currency_prices_service = CurrencyPricesService(session)
+        await currency_prices_service.create_currency_prices_service(symbols)
     return {"message": "Successfully fetched and saved currency prices."}
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app.schemas.database import DatabasePoolStatus
+from app.database import sessionmanager
+from fastapi import APIRouter, Query
+
+router = APIRouter(
+    prefix="/api/database",
+    tags=["database"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get(
+    "/pool",
+    response_model=DatabasePoolStatus,
+    summary="Get connection pool status",
+    description="Shows the connection pool gauges and checkout wait times of the worker process serving the request. "
+                "Each worker has its own pool of up to pool_size + max_overflow connections.",
+    response_description="Connection pool status of this worker",
+)
+async def get_database_pool_status(
+    read: bool = Query(False, description="Show the pool of the read database instead of the primary.")
+):
+    return sessionmanager.pool_status(read)
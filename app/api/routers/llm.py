@@ -1,7 +1,10 @@
-from app.api.dependencies.core import DBSessionDep
+import asyncio
+from app.api.dependencies.core import DBSessionDep, ReadSessionDep
+from app.database import sessionmanager, AdvisoryLock
 from app.schemas.llm_providers import LLMProviderCreate, LLMProvider
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from app.services.llmService import LLMService
+from app.helper.jobLocks import job_lock_name, REDDIT_SENTIMENTS_LABELING_JOB
 router = APIRouter(
     prefix="/api/llm",
     tags=["llm"],
@@ -16,12 +19,21 @@ router = APIRouter(
 )
 async def get_reddit_sentiments_by_date_range(
     session: DBSessionDep,
+    read_session: ReadSessionDep,
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format."),
     end_date: str = Query(..., description="End date in YYYY-MM-DD format."),
     batch_size: int = Query(..., description="Batch size for processing Reddit sentiments.")
 ):
-    llm_service = LLMService(session)
-    result = await llm_service.label_reddit_sentiments_between_dates_service(start_date, end_date, batch_size=batch_size)
+    lock = await acquire_labeling_lock()
+    try:
+        llm_service = LLMService(session, read_session)
+        result, task = await llm_service.label_reddit_sentiments_between_dates_service(
+            start_date, end_date, batch_size=batch_size, return_task=True
+        )
+    except Exception:
+        await lock.release()
+        raise
+    hold_lock_until_done(task, lock)
     return {"message": result}
 
 @router.get(
@@ -32,9 +44,42 @@ async def get_reddit_sentiments_by_date_range(
 )
 async def get_reddit_sentiments_today(
     session: DBSessionDep,
+    read_session: ReadSessionDep,
     batch_size: int = Query(..., description="Batch size for processing Reddit sentiments."),
     hours: int = Query(24, description="Number of hours to look back for today's sentiments.")
 ):
-    llm_service = LLMService(session)
-    result = await llm_service.label_reddit_sentiments_today_service(batch_size=batch_size, hours=hours)
-    return {"message": result}
\ No newline at end of file
+    lock = await acquire_labeling_lock()
+    try:
+        llm_service = LLMService(session, read_session)
+        result, task = await llm_service.label_reddit_sentiments_today_service(
+            batch_size=batch_size, hours=hours, return_task=True
+        )
+    except Exception:
+        await lock.release()
+        raise
+    hold_lock_until_done(task, lock)
+    return {"message": result}
+
+
+# references to the lock holders, so they are not garbage collected while labeling runs
+labeling_lock_holders: set[asyncio.Task] = set()
+
+async def acquire_labeling_lock() -> AdvisoryLock:
+    """Labeling runs on one worker at a time, shared with the scheduled labeling job."""
+    lock = await sessionmanager.try_advisory_lock(job_lock_name(REDDIT_SENTIMENTS_LABELING_JOB))
+    if lock is None:
+        raise HTTPException(status_code=409, detail="Reddit sentiments are already being labeled; location Kc4wR9tNxe")
+    return lock
+
+def hold_lock_until_done(task: asyncio.Task, lock: AdvisoryLock):
+    async def release_when_done():
+        try:
+            results = await asyncio.gather(task, return_exceptions=True)
+            if isinstance(results[0], Exception):
+                print(f"Labeling Reddit sentiments failed: {str(results[0])}; location Wm8dFs3JqB")
+        finally:
+            await lock.release()
+
+    holder = asyncio.create_task(release_when_done())
+    labeling_lock_holders.add(holder)
+    holder.add_done_callback(labeling_lock_holders.discard)
@@ -1,4 +1,4 @@
-from app.api.dependencies.core import DBSessionDep
+from app.api.dependencies.core import DBSessionDep, ReadSessionDep
 from app.services.mlService import MlService
 from fastapi import APIRouter, Query
 
@@ -17,8 +17,9 @@ router = APIRouter(
 )
 async def create_prediction(
     session: DBSessionDep,
+    read_session: ReadSessionDep,
     hour_interval: int = Query(..., description="Hour interval for the prediction, e.g., 0 for the current hour, 1 for the next hour, etc."),
 ):
-    ml_service = MlService(session)
+    ml_service = MlService(session, read_session)
     result = await ml_service.predict_currencies_sentiment_service(prediction_hour_interval=hour_interval, return_task=False)
     return {"message": result}
\ No newline at end of file
@@ -1,5 +1,5 @@
 from app.api.dependencies.core import DBSessionDep
-from app.schemas.reddit_comments import RedditComment, RedditCommentCreate
+from app.schemas.reddit_comments import RedditCommentCreate, RedditCommentsPage
 from fastapi import APIRouter, Query
 from app.services.redditCommentsService import RedditCommentsService
 from app.settings.settings import get_settings
@@ -12,18 +12,42 @@ router = APIRouter(
 
 @router.get(
     "/post",
-    response_model=RedditComment,
+    response_model=RedditCommentsPage,
     summary="Get Reddit comments for a specific post",
-    description="Fetches Reddit comments for a specific post ID.",
-    response_description="List of Reddit comments for the specified post ID",
+    description="Fetches one page of the Reddit comments for a specific post ID, oldest first. "
+                "Pass the returned next_cursor to get the next page.",
+    response_description="Page of Reddit comments for the specified post ID",
 )
 async def get_reddit_posts(
     session: DBSessionDep,
-    post_id: str = Query(..., description="The ID of the Reddit post to fetch comments for.")
+    post_id: str = Query(..., description="The ID of the Reddit post to fetch comments for."),
+    cursor: str = Query(default=None, description="next_cursor of the previous page."),
+    limit: int = Query(default=None, description="Maximum number of comments in the page.")
+):
+    reddit_comments_service = RedditCommentsService(session)
+    reddit_comments_page = await reddit_comments_service.get_reddit_comments_post_page_service(post_id, cursor, limit)
+    return reddit_comments_page
+
+@router.get(
+    "/date_range",
+    response_model=RedditCommentsPage,
+    summary="Get Reddit comments by date range",
+    description="Fetches one page of the Reddit comments created within a date range, oldest first. "
+                "Pass the returned next_cursor to get the next page.",
+    response_description="Page of Reddit comments created within the date range",
+)
+async def get_reddit_comments_by_date_range(
+    session: DBSessionDep,
+    start_date: int = Query(..., description="Start of the range as a unix timestamp."),
+    end_date: int = Query(..., description="End of the range as a unix timestamp, inclusive."),
+    cursor: str = Query(default=None, description="next_cursor of the previous page."),
+    limit: int = Query(default=None, description="Maximum number of comments in the page.")
 ):
     reddit_comments_service = RedditCommentsService(session)
-    reddit_comments = await reddit_comments_service.get_reddit_comments_post_service(post_id)
-    return reddit_comments
+    reddit_comments_page = await reddit_comments_service.get_reddit_comments_page_by_date_range_service(
+        start_date, end_date, cursor, limit
+    )
+    return reddit_comments_page
 
 @router.get(
     "/fetch",
@@ -34,10 +58,11 @@ async def get_reddit_posts(
 async def fetch_reddit_comments(
     session: DBSessionDep,
     post_id: str = Query(..., description="The ID of the Reddit post to fetch comments for."),
-    sort: str = Query("top", description="Sort order for comments. Options: 'top', 'new', 'old', 'controversial'. Default is 'top'.")
+    sort: str = Query("top", description="Sort order for comments. Options: 'top', 'new', 'old', 'controversial'. Default is 'top'."),
+    expand_more: bool = Query(False, description="Also resolve the 'more' placeholders of truncated threads.")
 ):
     reddit_comments_service = RedditCommentsService(session)
-    await reddit_comments_service.fetch_comments_from_reddit_service(post_id, sort)
+    await reddit_comments_service.fetch_comments_from_reddit_service(post_id, sort, expand_more=expand_more)
     return f"Successfully fetched and saved comments for post {post_id} with sort order '{sort}'"
 
 @router.post(
@@ -52,4 +77,17 @@ async def create_reddit_comments(
 ):
     reddit_comments_service = RedditCommentsService(session)
     created_comments = await reddit_comments_service.create_reddit_comments_service(reddit_comments)
-    return created_comments
\ No newline at end of file
+    return created_comments
+
+@router.post(
+    "/deduplicate",
+    summary="Remove duplicated Reddit comments",
+    description="Collapses comments stored more than once for the same post, keeping the newest row.",
+    response_description="Number of removed duplicate comments",
+)
+async def deduplicate_reddit_comments(
+    session: DBSessionDep
+):
+    reddit_comments_service = RedditCommentsService(session)
+    deleted_count = await reddit_comments_service.deduplicate_reddit_comments_service()
+    return {"message": f"Removed {deleted_count} duplicate Reddit comments."}
\ No newline at end of file
@@ -1,8 +1,9 @@
-from typing import List
 from app.api.dependencies.core import DBSessionDep
-from app.schemas.reddit_posts import RedditPost, RedditPostCreate
-from fastapi import APIRouter, Query
+from app.schemas.reddit_posts import RedditPostCreate, RedditPostsPage
+from app.database import sessionmanager
+from fastapi import APIRouter, HTTPException, Query
 from app.services.redditPostsService import RedditPostsService
+from app.helper.jobLocks import job_lock_name, REDDIT_INGESTION_JOB
 from app.settings.settings import get_settings
 
 router = APIRouter(
@@ -13,18 +14,42 @@ router = APIRouter(
 
 @router.get(
     "/author",
-    response_model=List[RedditPost],
+    response_model=RedditPostsPage,
     summary="Get Reddit posts by author ID",
-    description="Fetches all Reddit posts for a given author ID.",
-    response_description="List of Reddit posts for the specified author ID",
+    description="Fetches one page of the Reddit posts for a given author ID, oldest first. "
+                "Pass the returned next_cursor to get the next page.",
+    response_description="Page of Reddit posts for the specified author ID",
 )
 async def get_reddit_posts(
     session: DBSessionDep,
-    author: str = Query(..., description="Author ID to fetch Reddit posts for")
+    author: str = Query(..., description="Author ID to fetch Reddit posts for"),
+    cursor: str = Query(default=None, description="next_cursor of the previous page."),
+    limit: int = Query(default=None, description="Maximum number of posts in the page.")
 ):
     reddit_posts_service = RedditPostsService(session)
-    reddit_posts = await reddit_posts_service.get_reddit_posts_user_service(author)
-    return reddit_posts
+    reddit_posts_page = await reddit_posts_service.get_reddit_posts_user_page_service(author, cursor, limit)
+    return reddit_posts_page
+
+@router.get(
+    "/date_range",
+    response_model=RedditPostsPage,
+    summary="Get Reddit posts by date range",
+    description="Fetches one page of the Reddit posts created within a date range, oldest first. "
+                "Pass the returned next_cursor to get the next page.",
+    response_description="Page of Reddit posts created within the date range",
+)
+async def get_reddit_posts_by_date_range(
+    session: DBSessionDep,
+    start_date: int = Query(..., description="Start of the range as a unix timestamp."),
+    end_date: int = Query(..., description="End of the range as a unix timestamp, inclusive."),
+    cursor: str = Query(default=None, description="next_cursor of the previous page."),
+    limit: int = Query(default=None, description="Maximum number of posts in the page.")
+):
+    reddit_posts_service = RedditPostsService(session)
+    reddit_posts_page = await reddit_posts_service.get_reddit_posts_page_by_date_range_service(
+        start_date, end_date, cursor, limit
+    )
+    return reddit_posts_page
 
 @router.get(
     "/from_reddit",
@@ -36,7 +61,10 @@ async def get_posts_from_subreddits(
     session: DBSessionDep,
     subreddits: list[str] = Query(default=None,),
     posts_per_subreddit: int = Query(default=None),
-    subreddit_sort: str = Query(default=None)
+    subreddit_sort: str = Query(default=None),
+    concurrency: int = Query(default=None, description="Maximum number of subreddits fetched in parallel. 1 fetches them one by one."),
+    incremental: bool = Query(default=None, description="Only fetch posts newer than the stored per-subreddit cursor."),
+    max_pages: int = Query(default=None, description="Maximum number of listing pages to follow per subreddit in incremental mode.")
 ):
     settings = get_settings()
     if subreddits is None or subreddits == []:
@@ -50,7 +78,10 @@ async def get_posts_from_subreddits(
     await reddit_posts_service.get_posts_from_subreddits_service(
         subreddits=subreddits,
         posts_per_subreddit=posts_per_subreddit,
-        subreddit_sort=subreddit_sort
+        subreddit_sort=subreddit_sort,
+        concurrency=concurrency,
+        incremental=incremental,
+        max_pages=max_pages
     )
     return f"Successfully fetched and saved posts from {len(subreddits)} subreddits ({', '.join(subreddits)})"
 
@@ -68,14 +99,17 @@ async def fetch_posts_and_comments_from_reddit(
     subreddit_sort: str = Query(default="top"),
     comment_sort: str = Query(default="top")
 ):
-    reddit_posts_service = RedditPostsService(session)
-    posts_and_comments = await reddit_posts_service.fetch_posts_and_comments_from_reddit_service(
-        subreddits=subreddits,
-        posts_per_subreddit=posts_per_subreddit,
-        comments_per_post=comments_per_post,
-        subreddit_sort=subreddit_sort,
-        comment_sort=comment_sort
-    )
+    async with sessionmanager.advisory_lock(job_lock_name(REDDIT_INGESTION_JOB)) as acquired:
+        if not acquired:
+            raise HTTPException(status_code=409, detail="Reddit posts and comments are already being fetched; location Jd3mT8vQcL")
+        reddit_posts_service = RedditPostsService(session)
+        posts_and_comments = await reddit_posts_service.fetch_posts_and_comments_from_reddit_service(
+            subreddits=subreddits,
+            posts_per_subreddit=posts_per_subreddit,
+            comments_per_post=comments_per_post,
+            subreddit_sort=subreddit_sort,
+            comment_sort=comment_sort
+        )
     return f"Successfully fetched and saved posts and comments from Reddit: {len(posts_and_comments.posts)} posts, {len(posts_and_comments.comments)} comments"
 
 @router.post(
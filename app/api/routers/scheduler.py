@@ -0,0 +1,45 @@
+from app.schemas.scheduler import SchedulerJob, SchedulerJobRun
+from fastapi import APIRouter, HTTPException, Query
+from app.scheduler import scheduler
+
+router = APIRouter(
+    prefix="/api/scheduler",
+    tags=["scheduler"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get(
+    "/jobs",
+    response_model=list[SchedulerJob],
+    summary="Get scheduled jobs",
+    description="Lists the background jobs with their intervals, next run and last run.",
+    response_description="List of scheduled jobs",
+)
+async def get_scheduler_jobs():
+    return scheduler.get_jobs()
+
+@router.get(
+    "/history",
+    response_model=list[SchedulerJobRun],
+    summary="Get scheduler run history",
+    description="Lists the latest runs of the background jobs, newest first.",
+    response_description="List of job runs",
+)
+async def get_scheduler_history(
+    job: str = Query(None, description="Only return the runs of this job."),
+    limit: int = Query(50, description="Maximum number of runs to return.")
+):
+    return scheduler.get_history(job, limit)
+
+@router.post(
+    "/jobs/{job}/run",
+    response_model=SchedulerJobRun,
+    summary="Run a scheduled job now",
+    description="Runs a background job immediately. The run is skipped if the job is already running.",
+    response_description="The finished job run",
+)
+async def run_scheduler_job(job: str):
+    try:
+        return await scheduler.run_job(job)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job}; location Nf5cR8wQzb")
@@ -0,0 +1,64 @@
+import importlib.util
+from typing import Any
+
+import httpx
+
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+REDDIT_OAUTH_HOST = "oauth.reddit.com"
+REDDIT_HOST = "www.reddit.com"
+COINGECKO_HOST = "api.coingecko.com"
+
+
+class HttpClientManager:
+    """
+    Keeps one pooled httpx.AsyncClient per outbound host so connections
+    (and their TCP+TLS handshakes) are reused across requests.
+    Clients are created lazily, so services also work outside the FastAPI lifespan.
+    """
+
+    def __init__(self, client_kwargs: dict[str, Any] | None = None):
+        self._client_kwargs = client_kwargs or {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def init_clients(self, hosts: list[str]):
+        """Create the clients for the given hosts up front."""
+        for host in hosts:
+            self.get_client(host)
+
+    def get_client(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**self._client_kwargs)
+            self._clients[host] = client
+        return client
+
+    async def close(self):
+        """Close every client when shutting down."""
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            await client.aclose()
+
+    async def reset(self):
+        """Close clients bound to the current event loop. Safe for pytest loop resets."""
+        await self.close()
+
+
+def get_http_client_kwargs() -> dict[str, Any]:
+    return {
+        # HTTP/2 needs the optional h2 package, fall back to HTTP/1.1 without it
+        "http2": settings.http2_enabled and importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections_per_host,
+            max_keepalive_connections=settings.http_max_keepalive_connections_per_host,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    }
+
+
+# Shared by every service that calls an external API
+http_clients = HttpClientManager(get_http_client_kwargs())
@@ -1,3 +1,6 @@
+import os
+import time
+import uuid
 from typing import AsyncIterator, Any
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import (
@@ -6,25 +9,145 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.settings.settings import get_settings
+from app.schemas.database import DatabasePoolStatus
+from app.settings.settings import Settings, get_settings
 
 settings = get_settings()
 Base = declarative_base()
 
 
+class PoolStats:
+    """
+    Counters of the connection checkouts of one pool, i.e. of one worker process.
+    The wait time covers queueing for a free connection plus opening or pre-pinging it.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default pool of async engines, timing how long each checkout waits for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        started = time.monotonic()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_checkout(time.monotonic() - started)
+        return connection
+
+    def recreate(self):
+        # keep the counters when the engine replaces the pool, e.g. on dispose()
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def database_engine_kwargs(settings: Settings) -> dict[str, Any]:
+    """
+    Engine options from the settings. With db_pgbouncer, the prepared statement caches are disabled
+    and every prepared statement gets a unique name, because PgBouncer in transaction mode can run
+    the next statement on another server connection. Session-level state does not survive that either:
+    the advisory locks of the scheduler need PgBouncer in session mode (or a direct connection).
+    """
+    connect_args: dict[str, Any] = {"prepared_statement_cache_size": settings.db_prepared_statement_cache_size}
+    if settings.db_pgbouncer:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        "echo": settings.echo_sql,
+        "future": True,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+def database_read_engine_kwargs(settings: Settings) -> dict[str, Any]:
+    """
+    Engine options of the read database. The connect timeout is short, so an unreachable replica
+    falls back to the primary quickly instead of waiting for the default timeout of asyncpg.
+    """
+    engine_kwargs = database_engine_kwargs(settings)
+    engine_kwargs["connect_args"] = {**engine_kwargs["connect_args"], "timeout": settings.db_read_connect_timeout}
+    return engine_kwargs
+
+
+class AdvisoryLock:
+    """
+    A session-level Postgres advisory lock, held on its own connection until released.
+    """
+
+    def __init__(self, name: str, connection: AsyncConnection):
+        self.name = name
+        self._connection = connection
+
+    async def release(self):
+        if self._connection is None:
+            return
+        connection = self._connection
+        self._connection = None
+        try:
+            await connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": self.name})
+        except Exception as e:
+            # a connection that may still hold the lock must not go back to the pool
+            print(f"Failed to release advisory lock {self.name}: {str(e)}; location Vb7sQm2KxJ")
+            await connection.invalidate()
+        finally:
+            await connection.close()
+
+
 class DatabaseSessionManager:
     """
     Manages creation of async SQLAlchemy engine and sessions.
     Safe for both FastAPI and pytest-asyncio usage.
+    With a read_database_url, read sessions go to a second engine, e.g. a streaming replica.
+    A read database that could not be reached is skipped for read_retry_seconds before it is tried again.
     """
 
-    def __init__(self, database_url: str, engine_kwargs: dict[str, Any] | None = None):
+    def __init__(self, database_url: str, engine_kwargs: dict[str, Any] | None = None,
+                 read_database_url: str | None = None, read_fallback_to_primary: bool = True,
+                 read_engine_kwargs: dict[str, Any] | None = None, read_retry_seconds: float = 0.0):
         self._database_url = database_url
         self._engine_kwargs = engine_kwargs or {}
         self._engine = None
         self._sessionmaker = None
+        self._read_database_url = read_database_url
+        self._read_fallback_to_primary = read_fallback_to_primary
+        self._read_engine_kwargs = read_engine_kwargs or self._engine_kwargs
+        self._read_retry_seconds = read_retry_seconds
+        self._read_unavailable_until = 0.0
+        self._read_engine = None
+        self._read_sessionmaker = None
 
     def init_engine(self):
         """(Re)initialize engine and sessionmaker for current event loop."""
@@ -34,17 +157,37 @@ class DatabaseSessionManager:
                 self._engine, expire_on_commit=False, autoflush=False, autocommit=False
             )
 
+    def init_read_engine(self):
+        """(Re)initialize the read engine and sessionmaker for current event loop, if a read database is set."""
+        if self._read_engine is None and self._read_database_url:
+            self._read_engine = create_async_engine(self._read_database_url, **self._read_engine_kwargs)
+            self._read_sessionmaker = async_sessionmaker(
+                self._read_engine, expire_on_commit=False, autoflush=False, autocommit=False
+            )
+
     def get_engine(self):
         if self._engine is None:
             self.init_engine()
         return self._engine
 
+    def get_read_engine(self):
+        """The read engine, or the primary engine when no read database is set."""
+        if not self._read_database_url:
+            return self.get_engine()
+        self.init_read_engine()
+        return self._read_engine
+
     async def close(self):
-        """Dispose of the engine when shutting down."""
+        """Dispose of the engines when shutting down."""
         if self._engine is not None:
             await self._engine.dispose()
             self._engine = None
             self._sessionmaker = None
+        if self._read_engine is not None:
+            await self._read_engine.dispose()
+            self._read_engine = None
+            self._read_sessionmaker = None
+        self._read_unavailable_until = 0.0
 
     @asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -70,18 +213,116 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    @asynccontextmanager
+    async def read_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Provide a session for reads that can run on the read database, e.g. the ML and LLM data preparation.
+        Without a read database this is a primary session. If the read database cannot be reached,
+        the session falls back to the primary when read_fallback_to_primary is set, and the read database
+        is not tried again for read_retry_seconds. Writes must not go through this session.
+        """
+        if not self._read_database_url or (
+                self._read_fallback_to_primary and time.monotonic() < self._read_unavailable_until):
+            async with self.session() as session:
+                yield session
+            return
+
+        self.init_read_engine()
+        session = self._read_sessionmaker()
+        try:
+            # connect up front, so an unreachable replica is noticed before the caller starts reading
+            await session.connection()
+        except (OSError, SQLAlchemyError) as e:
+            await session.close()
+            if not self._read_fallback_to_primary:
+                raise
+            self._read_unavailable_until = time.monotonic() + self._read_retry_seconds
+            print(f"Read database unavailable, falling back to the primary: {str(e)}; location Lr8vXn3QdT")
+            session = None
+        if session is None:
+            async with self.session() as session:
+                yield session
+            return
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def try_advisory_lock(self, name: str) -> AdvisoryLock | None:
+        """
+        Try to take the Postgres advisory lock for `name` without waiting.
+        Returns the held lock, or None if another worker or node holds it.
+        """
+        self.init_engine()
+        connection = await self._engine.connect()
+        try:
+            # autocommit so the connection does not sit idle in a transaction while the lock is held
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            result = await connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name})
+            acquired = result.scalar()
+        except Exception:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return None
+        return AdvisoryLock(name, connection)
+
+    @asynccontextmanager
+    async def advisory_lock(self, name: str) -> AsyncIterator[bool]:
+        """
+        Single-flight guard shared by all workers and nodes using the same database.
+        Yields whether the lock was acquired; it is released on exit.
+        """
+        lock = await self.try_advisory_lock(name)
+        try:
+            yield lock is not None
+        finally:
+            if lock is not None:
+                await lock.release()
+
+    def pool_status(self, read: bool = False) -> DatabasePoolStatus:
+        """Live gauges and checkout counters of the connection pool of this worker process."""
+        pool = self.get_read_engine().pool if read else self.get_engine().pool
+        stats: PoolStats = getattr(pool, "stats", PoolStats())
+        return DatabasePoolStatus(
+            pid=os.getpid(),
+            pool_size=pool.size(),
+            max_overflow=self._engine_kwargs.get("max_overflow", 0),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            checkouts=stats.checkouts,
+            timeouts=stats.timeouts,
+            wait_seconds_total=round(stats.wait_seconds_total, 6),
+            wait_seconds_max=round(stats.wait_seconds_max, 6),
+            wait_seconds_avg=round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+        )
+
     async def reset(self):
-        """Dispose engine and reset sessionmaker. Safe for pytest loop resets."""
+        """Dispose engines and reset sessionmakers. Safe for pytest loop resets."""
         if self._engine is not None:
             await self._engine.dispose()
         self._engine = None
         self._sessionmaker = None
+        if self._read_engine is not None:
+            await self._read_engine.dispose()
+        self._read_engine = None
+        self._read_sessionmaker = None
+        self._read_unavailable_until = 0.0
 
 
 # Create manager — note: engine is initialized lazily (loop-safe)
 sessionmanager = DatabaseSessionManager(
     settings.database_url,
-    {"echo": settings.echo_sql, "future": True}
+    database_engine_kwargs(settings),
+    read_database_url=settings.read_database_url,
+    read_fallback_to_primary=settings.db_read_fallback_to_primary,
+    read_engine_kwargs=database_read_engine_kwargs(settings),
+    read_retry_seconds=settings.db_read_retry_seconds
 )
 
 
@@ -92,3 +333,11 @@ async def get_db_session() -> AsyncIterator[AsyncSession]:
     """
     async with sessionmanager.session() as session:
         yield session
+
+
+async def get_read_db_session() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency for routes that only read, served by the read database when one is set.
+    """
+    async with sessionmanager.read_session() as session:
+        yield session
@@ -0,0 +1,65 @@
+import uuid
+from typing import Any
+from fastapi import HTTPException
+from sqlalchemy import column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+def use_bulk_copy(row_count: int) -> bool:
+    """
+    Whether a write is large enough to go through COPY instead of INSERT ... VALUES.
+    A threshold of 0 turns the bulk loader off.
+    """
+    return settings.bulk_copy_threshold > 0 and row_count >= settings.bulk_copy_threshold
+
+async def copy_upsert(session: AsyncSession, model, rows: list[dict[str, Any]],
+                      conflict_columns: list[str] | None = None, update_columns: list[str] | None = None) -> int:
+    """
+    Loads rows with COPY into a temporary staging table and merges them into the model's table
+    with a single INSERT ... SELECT. With conflict_columns the merge is an upsert that refreshes
+    update_columns, or skips the row when no update_columns are given.
+    Rows must not repeat a conflict key when update_columns are given.
+    Runs inside the session's transaction; the caller commits the session.
+    Returns the number of inserted or updated rows.
+    """
+    if not rows:
+        return 0
+
+    target = model.__table__
+    columns = list(rows[0].keys())
+    stage_name = f"stage_{target.name}_{uuid.uuid4().hex[:12]}"
+    quoted_columns = ", ".join(f'"{name}"' for name in columns)
+    try:
+        # same column types as the target, but none of its constraints or defaults
+        await session.execute(text(
+            f'CREATE TEMP TABLE "{stage_name}" ON COMMIT DROP AS '
+            f'SELECT {quoted_columns} FROM "{target.name}" WITH NO DATA'
+        ))
+        # COPY through the asyncpg connection behind the session, so it joins the same transaction
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            stage_name,
+            records=[tuple(row[name] for name in columns) for row in rows],
+            columns=columns
+        )
+
+        stage = table(stage_name, *(column(name) for name in columns))
+        stmt = insert(target).from_select(columns, select(*stage.c))
+        if conflict_columns and update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={name: stmt.excluded[name] for name in update_columns}
+            )
+        elif conflict_columns:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+        result = await session.execute(stmt)
+        await session.execute(text(f'DROP TABLE "{stage_name}"'))
+        return result.rowcount
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk load into {target.name} failed: {str(e)}; location Gx7pTe2WmQ") from e
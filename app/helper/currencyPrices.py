@@ -1,8 +1,11 @@
 from app.models import CurrencyPrices as CurrencyPricesModel
 from app.schemas.currency_prices import CurrencyPricesCreate, CurrencyPrice
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.helper.bulkLoader import use_bulk_copy, copy_upsert
+from app.helper.dataframes import fetch_dataframe
+import pandas as pd
 
 async def get_currency_prices_from_db(session: AsyncSession) -> list[CurrencyPrice]:
     """
@@ -16,11 +19,15 @@ async def get_currency_prices_from_db(session: AsyncSession) -> list[CurrencyPri
     
 async def create_currency_prices(session: AsyncSession, currency_prices: list[CurrencyPricesCreate]) -> list[CurrencyPricesCreate]:
     """
-    Creates new currency prices in the database.
+    Creates new currency prices in the database. Large batches are loaded with COPY.
+    Returns the given prices, whichever way they were written.
     """
     try:
-        currency_prices = [CurrencyPricesModel(**price.model_dump()) for price in currency_prices]
-        session.add_all(currency_prices)
+        if use_bulk_copy(len(currency_prices)):
+            await copy_upsert(session, CurrencyPricesModel, [price.model_dump() for price in currency_prices])
+            await session.commit()
+            return currency_prices
+        session.add_all([CurrencyPricesModel(**price.model_dump()) for price in currency_prices])
         await session.commit()
         return currency_prices
     
@@ -43,4 +50,52 @@ async def get_currency_prices_by_date_range(session: AsyncSession, start_date: s
         currency_prices = [CurrencyPrice.model_validate(price) for price in result.scalars().all()]
         return currency_prices
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch currency prices by date range: {str(e)} location iN3h9Lof7H") from e
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to fetch currency prices by date range: {str(e)} location iN3h9Lof7H") from e
+
+
+def currency_prices_dataframe_query(start_date: int, end_date: int, currencies: list[str] | None = None) -> Select:
+    """
+    The select of get_currency_prices_dataframe_by_date_range. The date range is served by
+    ix_currency_prices_timestamp, and with currencies by ix_currency_prices_currency_timestamp.
+    """
+    prices = CurrencyPricesModel
+    query = select(
+        prices.currency,
+        prices.name,
+        prices.price,
+        prices.price_currency,
+        prices.timestamp,
+        prices.source,
+        prices.market_cap,
+        prices.total_volume,
+        prices.total_supply,
+        prices.ath,
+        prices.ath_date,
+        prices.id,
+    ).where(
+        prices.timestamp >= start_date,
+        prices.timestamp <= end_date
+    ).order_by(prices.timestamp.asc())
+    if currencies:
+        query = query.where(prices.currency.in_(currencies))
+    return query
+
+async def get_currency_prices_dataframe_by_date_range(session: AsyncSession, start_date: int, end_date: int,
+                                                      currencies: list[str] | None = None) -> pd.DataFrame:
+    """
+    Fetches currency prices within a specific date range as a DataFrame, ordered by timestamp.
+    Same columns as CurrencyPrice, built column by column from the rows. currencies limits the prices to these currencies.
+    """
+    try:
+        query = currency_prices_dataframe_query(start_date, end_date, currencies)
+        return await fetch_dataframe(session, query, dtypes={
+            'price': 'float64',
+            'timestamp': 'int64',
+            'market_cap': 'float64',
+            'total_volume': 'float64',
+            'total_supply': 'float64',
+            'ath': 'float64',
+            'id': 'int64',
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch currency prices by date range: {str(e)} location Bv6rKq1XnS") from e
@@ -0,0 +1,28 @@
+import pandas as pd
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def build_dataframe(columns: list[str], rows, dtypes: dict[str, str], datetime_columns: list[str]) -> pd.DataFrame:
+    column_values = zip(*rows) if rows else ([] for _ in columns)
+    data = {}
+    for name, values in zip(columns, column_values):
+        if name in datetime_columns:
+            data[name] = pd.to_datetime(pd.Series(values, dtype="int64"), unit='s')
+        else:
+            data[name] = pd.Series(values, dtype=dtypes.get(name))
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+async def fetch_dataframe(session: AsyncSession, query: Select, dtypes: dict[str, str] | None = None,
+                          datetime_columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Runs a Core select and builds a DataFrame column by column straight from the row tuples,
+    without ORM objects, pydantic models or per-row dicts in between.
+    dtypes maps column names to dtypes, the other columns are inferred.
+    datetime_columns hold unix timestamps in seconds and are converted to datetimes.
+    An empty result gives an empty DataFrame that still has the selected columns.
+    """
+    dtypes = dtypes or {}
+    datetime_columns = datetime_columns or []
+    result = await session.execute(query)
+    return build_dataframe(list(result.keys()), result.all(), dtypes, datetime_columns)
@@ -0,0 +1,10 @@
+# names of the scheduler jobs; the routers running the same work share their advisory locks
+REDDIT_INGESTION_JOB = "reddit_ingestion"
+CURRENCY_PRICES_JOB = "currency_prices"
+REDDIT_SENTIMENTS_LABELING_JOB = "reddit_sentiments_labeling"
+PARTITION_MAINTENANCE_JOB = "partition_maintenance"
+
+
+def job_lock_name(name: str) -> str:
+    """Name of the advisory lock that keeps a job single-flight across workers."""
+    return f"scheduler:{name}"
@@ -1,9 +1,14 @@
 from app.models import LlmProviders as LlmProvidersModel
 from app.models import RedditSentiments as RedditSentimentsModel
+from app.models import RedditPosts as RedditPostsModel
+from app.models import RedditComments as RedditCommentsModel
 from app.schemas.llm_providers import LLMProvider, LLMProviderCreate
 from app.schemas.reddit_sentiments import RedditSentiment
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update, func, and_
+import pandas as pd
+from app.helper.dataframes import fetch_dataframe
+from app.helper.redditComments import reddit_posts_comments_columns, REDDIT_POSTS_COMMENTS_DTYPES
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -65,23 +70,29 @@ async def update_llm_provider(session: AsyncSession, llm_provider_update: LLMPro
     
 async def increment_llm_provider_token_usage(session: AsyncSession, name: str, model: str, tokens: int):
     """
-    Increments the token usage for a specific LLM provider.
+    Increments the token usage for a specific LLM provider in a single UPDATE ... RETURNING,
+    so concurrent increments never overwrite each other.
     """
     try:
-        query = select(LlmProvidersModel).where(
-            LlmProvidersModel.name == name,
-            LlmProvidersModel.model == model
-        )
-        result = await session.execute(query)
-        llm_provider = result.scalars().first()
+        # a Core statement on the table, so provider objects already loaded in the session are left alone
+        llm_providers = LlmProvidersModel.__table__
+        stmt = update(llm_providers).where(
+            llm_providers.c.name == name,
+            llm_providers.c.model == model
+        ).values(
+            total_used_tokens=func.coalesce(llm_providers.c.total_used_tokens, 0) + tokens
+        ).returning(*llm_providers.c)
+        result = await session.execute(stmt)
+        llm_provider = result.mappings().first()
         if not llm_provider:
             raise HTTPException(status_code=404, detail=f"LLM provider '{name}' not found. location uN5WlH7I8J")
-        
-        llm_provider.total_used_tokens += tokens
+        llm_provider = LLMProvider.model_validate(dict(llm_provider))
         await session.commit()
-        await session.refresh(llm_provider)
-        return LLMProvider.model_validate(llm_provider)
-    
+        return llm_provider
+
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error incrementing token usage: {str(e)}; location 9K0Lo95Bvr")
     
@@ -99,4 +110,43 @@ async def get_reddit_sentiments_by_post_ids(session: AsyncSession, post_ids: lis
         raise HTTPException(status_code=404, detail="No Reddit sentiments found for the provided post IDs. location jEu3bf3B5r")
     
     # convert to schema
-    return [RedditSentiment.model_validate(sentiment) for sentiment in reddit_sentiments]
\ No newline at end of file
+    return [RedditSentiment.model_validate(sentiment) for sentiment in reddit_sentiments]
+
+async def get_reddit_posts_comments_sentiments_by_date_range(session: AsyncSession, start_date: int, end_date: int) -> pd.DataFrame:
+    """
+    Joins the comments created within a date range with their posts and sentiments in one query.
+    The columns match the pandas merges this replaces: post columns that clash with comment columns
+    get the _x suffix, comment columns the _y suffix, and created_utc_x/created_utc_y are datetimes.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Tq2vLs8NhE")
+
+    posts = RedditPostsModel
+    comments = RedditCommentsModel
+    sentiments = RedditSentimentsModel
+    query = select(
+        *reddit_posts_comments_columns(),
+        sentiments.crypto_sentiment,
+        sentiments.future_sentiment,
+        sentiments.emotion,
+        sentiments.subjective,
+        sentiments.id,
+    ).select_from(comments).join(
+        posts, posts.post_id == comments.post_id
+    ).join(
+        sentiments, and_(sentiments.post_id == comments.post_id, sentiments.comment_id == comments.comment_id)
+    ).where(
+        comments.created_utc >= start_date,
+        comments.created_utc <= end_date
+    )
+    reddit_posts_comments_sentiments = await fetch_dataframe(
+        session,
+        query,
+        dtypes={**REDDIT_POSTS_COMMENTS_DTYPES, 'id': 'int64'},
+        datetime_columns=['created_utc_x', 'created_utc_y']
+    )
+
+    if reddit_posts_comments_sentiments.empty:
+        raise HTTPException(status_code=404, detail="No Reddit posts, comments and sentiments found in the specified date range. location Lr8fMx2QaV")
+
+    return reddit_posts_comments_sentiments
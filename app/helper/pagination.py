@@ -0,0 +1,49 @@
+import base64
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+def encode_cursor(created_utc: int, id: int) -> str:
+    """Opaque cursor pointing after the row with this (created_utc, id)."""
+    return base64.urlsafe_b64encode(f"{created_utc}:{id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        created_utc, id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(created_utc), int(id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor; location Kc7wNq2BzR")
+
+def page_limit(limit: int | None) -> int:
+    """The requested page size, defaulting to page_size and capped at max_page_size."""
+    if limit is None:
+        return settings.page_size
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be at least 1; location Vb5mTe8LsQ")
+    return min(limit, settings.max_page_size)
+
+async def fetch_page(session: AsyncSession, query: Select, model, cursor: str | None, limit: int | None):
+    """
+    Keyset pagination over a select of model rows, in (created_utc, id) order.
+    Reads one row past the page to know whether there is a next page.
+    Returns the rows of the page and the cursor of the next page, None on the last page.
+    """
+    limit = page_limit(limit)
+    if cursor:
+        query = query.where(tuple_(model.created_utc, model.id) > decode_cursor(cursor))
+    query = query.order_by(model.created_utc, model.id).limit(limit + 1)
+    try:
+        result = await session.execute(query)
+        rows = result.scalars().all()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Gs3pHx9WdJ")
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_utc, rows[-1].id)
@@ -0,0 +1,116 @@
+import re
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+
+# tables partitioned by month on a unix timestamp column, see migration e1a7c3b9d5f2
+MONTHLY_PARTITIONED_TABLES = {
+    "reddit_comments": "created_utc",
+    "currency_prices": "timestamp",
+}
+
+PARTITION_NAME_PATTERN = re.compile(
+    rf"^({'|'.join(MONTHLY_PARTITIONED_TABLES)})_(y\d{{4}}m\d{{2}}|default)$"
+)
+
+
+def is_partition_name(table_name: str) -> bool:
+    return PARTITION_NAME_PATTERN.match(table_name) is not None
+
+def add_months(month_start: datetime, months: int) -> datetime:
+    month_index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+def monthly_partitions(table_name: str, start: datetime, months: int) -> list[tuple[str, int, int]]:
+    """
+    Returns (partition name, lower bound, upper bound) for `months` months starting with the month of `start`.
+    Bounds are unix timestamps in UTC; the upper bound is exclusive.
+    """
+    month_start = datetime(start.year, start.month, 1, tzinfo=timezone.utc)
+    partitions = []
+    for _ in range(months):
+        next_month_start = add_months(month_start, 1)
+        partitions.append((
+            f"{table_name}_y{month_start.year}m{month_start.month:02d}",
+            int(month_start.timestamp()),
+            int(next_month_start.timestamp())
+        ))
+        month_start = next_month_start
+    return partitions
+
+async def ensure_monthly_partitions(session: AsyncSession, months_ahead: int = 3, now: datetime = None) -> list[str]:
+    """
+    Creates the missing partitions of the current month and the next months_ahead months
+    for every partitioned table, plus its default partition. The caller commits the session.
+    Every partition is created in its own savepoint, so one that fails is reported and skipped
+    without losing the others. Returns the names of the created partitions.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    try:
+        result = await session.execute(text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = ANY(:table_names)
+            """
+        ), {"table_names": list(MONTHLY_PARTITIONED_TABLES)})
+        existing_partitions = set(result.scalars().all())
+
+        created_partitions = []
+        for table_name in MONTHLY_PARTITIONED_TABLES:
+            default_partition = f"{table_name}_default"
+            if default_partition not in existing_partitions:
+                await session.execute(text(f"CREATE TABLE {default_partition} PARTITION OF {table_name} DEFAULT"))
+                created_partitions.append(default_partition)
+            for partition_name, lower_bound, upper_bound in monthly_partitions(table_name, now, months_ahead + 1):
+                if partition_name in existing_partitions:
+                    continue
+                try:
+                    async with session.begin_nested():
+                        moved_rows = await create_monthly_partition(session, table_name, partition_name,
+                                                                    lower_bound, upper_bound)
+                except SQLAlchemyError as e:
+                    print(f"Failed to create partition {partition_name}: {str(e)}; location Wn3cFh7RdK")
+                    continue
+                if moved_rows:
+                    print(f"Moved {moved_rows} rows from {default_partition} to {partition_name}")
+                created_partitions.append(partition_name)
+
+        return created_partitions
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create partitions: {str(e)}; location Ze4kHq8TbN")
+
+async def create_monthly_partition(session: AsyncSession, table_name: str, partition_name: str,
+                                   lower_bound: int, upper_bound: int) -> int:
+    """
+    Creates one monthly partition. Postgres refuses to create a partition whose rows are in the default
+    partition, which happens when the maintenance did not run for longer than months_ahead; those rows
+    are moved into the new partition while the default partition is detached.
+    Returns the number of moved rows.
+    """
+    partition_key = MONTHLY_PARTITIONED_TABLES[table_name]
+    default_partition = f"{table_name}_default"
+    create_partition = text(
+        f"CREATE TABLE {partition_name} PARTITION OF {table_name} "
+        f"FOR VALUES FROM ({lower_bound}) TO ({upper_bound})"
+    )
+    in_range = f'"{partition_key}" >= {lower_bound} AND "{partition_key}" < {upper_bound}'
+    result = await session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default_partition} WHERE {in_range})"))
+    if not result.scalar():
+        await session.execute(create_partition)
+        return 0
+
+    await session.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {default_partition}"))
+    await session.execute(create_partition)
+    result = await session.execute(text(
+        f"WITH moved AS (DELETE FROM {default_partition} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {partition_name} SELECT * FROM moved"
+    ))
+    await session.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {default_partition} DEFAULT"))
+    return result.rowcount
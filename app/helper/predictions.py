@@ -3,6 +3,7 @@ from app.schemas.predictions import PredictionsCreate, Prediction
 from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.helper.bulkLoader import use_bulk_copy, copy_upsert
 
 
 async def get_predictions_by_currency_date(
@@ -33,14 +34,18 @@ async def get_predictions_by_currency_date(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching predictions: {str(e)}; location xezFJAqFG8") from e
     
-async def create_predictions(session: AsyncSession, prediction_create: list[PredictionsCreate]) -> list[Prediction]:
+async def create_predictions(session: AsyncSession, prediction_create: list[PredictionsCreate]) -> list[PredictionsCreate]:
     """
-    Creates new predictions in the database.
+    Creates new predictions in the database. Large batches are loaded with COPY.
+    Returns the given predictions, whichever way they were written.
     """
     try:
+        if use_bulk_copy(len(prediction_create)):
+            await copy_upsert(session, PredictionsModel, [pred.model_dump() for pred in prediction_create])
+            return prediction_create
         predictions = [PredictionsModel(**pred.model_dump()) for pred in prediction_create]
         session.add_all(predictions)
         # let the caller commit the session
-        return predictions
+        return prediction_create
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating predictions: {str(e)}; location 6nK1cgPkG1") from e
\ No newline at end of file
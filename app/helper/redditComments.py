@@ -1,10 +1,61 @@
 from app.models import RedditComments as UserRedditCommentsModel
-from app.schemas.reddit_comments import RedditComment, RedditCommentCreate
+from app.models import RedditPosts as UserRedditPostsModel
+from app.schemas.reddit_comments import RedditComment, RedditCommentCreate, RedditCommentsPage
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import Select, select, func, text, exists, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert
+from app.helper.bulkLoader import use_bulk_copy, copy_upsert
+from app.helper.dataframes import fetch_dataframe
+from app.helper.pagination import fetch_page, encode_cursor, decode_cursor
+from typing import AsyncIterator
+import pandas as pd
 from datetime import datetime, timedelta
 
+# 9 columns per row keeps each statement well under the 32767 bind parameter limit
+UPSERT_BATCH_SIZE = 2000
+
+# dtypes of the non-null numeric columns of reddit_posts_comments_columns()
+REDDIT_POSTS_COMMENTS_DTYPES = {
+    'score_x': 'int64',
+    'num_comments': 'int64',
+    'id_x': 'int64',
+    'score_y': 'int64',
+    'depth': 'int64',
+    'id_y': 'int64',
+}
+
+
+def reddit_posts_comments_columns():
+    """
+    Columns of comments joined with their posts, named and ordered like the pandas merge of the two:
+    post columns that clash with comment columns get the _x suffix, comment columns the _y suffix.
+    """
+    posts = UserRedditPostsModel
+    comments = UserRedditCommentsModel
+    return [
+        posts.title,
+        posts.post_id,
+        posts.subreddit,
+        posts.author.label('author_x'),
+        posts.score.label('score_x'),
+        posts.num_comments,
+        posts.created_utc.label('created_utc_x'),
+        posts.selftext,
+        posts.url,
+        posts.last_seen_utc,
+        posts.id.label('id_x'),
+        comments.parent_id,
+        comments.comment_id,
+        comments.author.label('author_y'),
+        comments.body,
+        comments.score.label('score_y'),
+        comments.created_utc.label('created_utc_y'),
+        comments.depth,
+        comments.id.label('id_y'),
+    ]
+
 
 async def get_reddit_comments_post(session: AsyncSession, post_id: str):
     """
@@ -19,18 +70,102 @@ async def get_reddit_comments_post(session: AsyncSession, post_id: str):
 
     return reddit_comments
 
-def create_reddit_comments(session: AsyncSession, reddit_comments: list[RedditCommentCreate]):
+async def get_reddit_comments_post_page(session: AsyncSession, post_id: str, cursor: str = None, limit: int = None):
+    """
+    Fetches one page of the comments of a Reddit post in (created_utc, id) order.
+    """
+    if not post_id:
+        raise HTTPException(status_code=400, detail="Post ID is required; location Fd6nYc2TwA")
+
+    query = select(UserRedditCommentsModel).where(UserRedditCommentsModel.post_id == post_id)
+    reddit_comments, next_cursor = await fetch_page(session, query, UserRedditCommentsModel, cursor, limit)
+
+    return RedditCommentsPage(items=[RedditComment.model_validate(comment) for comment in reddit_comments],
+                              next_cursor=next_cursor)
+
+async def get_reddit_comment_counts_by_post_ids(session: AsyncSession, post_ids: list[str]) -> dict[str, int]:
+    """
+    Returns the number of stored comments for each of the given posts that already has comments.
+    Posts without comments are not included.
+    """
+    if not post_ids:
+        return {}
+
+    query = select(
+        UserRedditCommentsModel.post_id,
+        func.count(UserRedditCommentsModel.id)
+    ).where(
+        UserRedditCommentsModel.post_id.in_(post_ids)
+    ).group_by(UserRedditCommentsModel.post_id)
+    result = await session.execute(query)
+
+    return {post_id: comment_count for post_id, comment_count in result.all()}
+
+async def create_reddit_comments(session: AsyncSession, reddit_comments: list[RedditCommentCreate]):
     """
-    Creates multiple Reddit comments in the database.
+    Upserts multiple Reddit comments keyed by (post_id, comment_id).
+    The conflict target also names created_utc, the partition key, which never changes for a comment.
+    Comments that are already stored get their score refreshed. The caller commits the session.
+    Large batches are loaded with COPY.
     """
     if not reddit_comments:
         raise HTTPException(status_code=400, detail="No Reddit comments provided; location rndZiwu4Up")
 
-    reddit_comments_models = [UserRedditCommentsModel(**comment.model_dump()) for comment in reddit_comments]
+    # a row can only be upserted once per statement, keep the last copy of each comment
+    values_by_key: dict[tuple, dict] = {}
+    for index, comment in enumerate(reddit_comments):
+        values = comment.model_dump()
+        key = (values["post_id"], values["comment_id"]) if values["comment_id"] is not None else ("", index)
+        values_by_key[key] = values
+    values = list(values_by_key.values())
+
+    try:
+        if use_bulk_copy(len(values)):
+            await copy_upsert(session, UserRedditCommentsModel, values,
+                              conflict_columns=["post_id", "comment_id", "created_utc"], update_columns=["score"])
+            return values
 
-    session.add_all(reddit_comments_models)
+        for i in range(0, len(values), UPSERT_BATCH_SIZE):
+            stmt = insert(UserRedditCommentsModel).values(values[i:i + UPSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["post_id", "comment_id", "created_utc"],
+                set_={"score": stmt.excluded.score}
+            )
+            await session.execute(stmt)
 
-    return reddit_comments_models
+        return values
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Wt4mZk9RcE")
+
+async def delete_duplicate_reddit_comments(session: AsyncSession) -> int:
+    """
+    Collapses duplicated comments, keeping the newest row of each (post_id, comment_id).
+    Returns the number of deleted rows. The caller commits the session.
+    """
+    try:
+        result = await session.execute(text(
+            """
+            DELETE FROM reddit_comments a
+            USING reddit_comments b
+            WHERE a.post_id = b.post_id
+              AND a.comment_id = b.comment_id
+              AND a.id < b.id
+            """
+        ))
+        return result.rowcount
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Hn2sQe7VbX")
+
+def reddit_comments_by_date_range_query(start_date: int, end_date: int) -> Select:
+    """
+    The select of get_reddit_comments_by_date_range, served by ix_reddit_comments_created_utc.
+    """
+    return select(UserRedditCommentsModel).where(
+        UserRedditCommentsModel.created_utc >= start_date,
+        UserRedditCommentsModel.created_utc <= end_date
+    )
 
 async def get_reddit_comments_by_date_range(session: AsyncSession, start_date: int, end_date: int):
     """
@@ -42,11 +177,7 @@ async def get_reddit_comments_by_date_range(session: AsyncSession, start_date: i
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date cannot be after end date; location fhgCw4Pvmg")
     
-    query = select(UserRedditCommentsModel).where(
-        UserRedditCommentsModel.created_utc >= start_date,
-        UserRedditCommentsModel.created_utc <= end_date
-    )
-    result = await session.execute(query)
+    result = await session.execute(reddit_comments_by_date_range_query(start_date, end_date))
     reddit_comments = result.scalars().all()
 
     # convert to a list of RedditComment
@@ -56,4 +187,110 @@ async def get_reddit_comments_by_date_range(session: AsyncSession, start_date: i
     if not reddit_comments:
         return []
     
-    return reddit_comments
\ No newline at end of file
+    return reddit_comments
+
+async def get_reddit_comments_page_by_date_range(session: AsyncSession, start_date: int, end_date: int,
+                                                cursor: str = None, limit: int = None):
+    """
+    Fetches one page of the Reddit comments within a specific date range in (created_utc, id) order.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Ub3gMw7SxK")
+
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date cannot be after end date; location Ep9vRk4HdN")
+
+    query = select(UserRedditCommentsModel).where(
+        UserRedditCommentsModel.created_utc >= start_date,
+        UserRedditCommentsModel.created_utc <= end_date
+    )
+    reddit_comments, next_cursor = await fetch_page(session, query, UserRedditCommentsModel, cursor, limit)
+
+    return RedditCommentsPage(items=[RedditComment.model_validate(comment) for comment in reddit_comments],
+                              next_cursor=next_cursor)
+
+async def stream_reddit_comments_by_date_range(session: AsyncSession, start_date: int, end_date: int,
+                                               chunk_size: int) -> AsyncIterator[list[RedditComment]]:
+    """
+    Streaming variant of get_reddit_comments_by_date_range, yielding lists of up to chunk_size comments
+    in (created_utc, id) order. The session must not be committed until the iteration is finished.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Cd8sHw3VnL")
+
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date cannot be after end date; location Mj4tRb7XkP")
+
+    query = select(UserRedditCommentsModel).where(
+        UserRedditCommentsModel.created_utc >= start_date,
+        UserRedditCommentsModel.created_utc <= end_date
+    ).order_by(UserRedditCommentsModel.created_utc, UserRedditCommentsModel.id).execution_options(yield_per=chunk_size)
+    result = await session.stream_scalars(query)
+    try:
+        async for reddit_comments in result.partitions(chunk_size):
+            yield [RedditComment.model_validate(comment) for comment in reddit_comments]
+    finally:
+        await result.close()
+
+async def get_reddit_posts_comments_by_date_range(session: AsyncSession, start_date: int, end_date: int) -> pd.DataFrame:
+    """
+    Joins the comments created within a date range with their posts into a DataFrame,
+    with the columns of reddit_posts_comments_columns(); created_utc_x and created_utc_y are datetimes.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Pw3nXc7RkD")
+
+    query = select(*reddit_posts_comments_columns()).select_from(UserRedditCommentsModel).join(
+        UserRedditPostsModel, UserRedditPostsModel.post_id == UserRedditCommentsModel.post_id
+    ).where(
+        UserRedditCommentsModel.created_utc >= start_date,
+        UserRedditCommentsModel.created_utc <= end_date
+    )
+    return await fetch_dataframe(session, query, dtypes=REDDIT_POSTS_COMMENTS_DTYPES,
+                                 datetime_columns=['created_utc_x', 'created_utc_y'])
+
+async def has_reddit_posts_comments_in_date_range(session: AsyncSession, start_date: int, end_date: int) -> bool:
+    """
+    Whether any comment created within a date range has its post stored.
+    """
+    query = select(exists().where(
+        UserRedditCommentsModel.post_id == UserRedditPostsModel.post_id,
+        UserRedditCommentsModel.created_utc >= start_date,
+        UserRedditCommentsModel.created_utc <= end_date
+    ))
+    result = await session.execute(query)
+    return bool(result.scalar())
+
+async def get_reddit_posts_comments_page_by_date_range(session: AsyncSession, start_date: int, end_date: int,
+                                                       cursor: str | None, limit: int) -> tuple[pd.DataFrame, str | None]:
+    """
+    Keyset-paged variant of get_reddit_posts_comments_by_date_range: up to limit rows after the cursor,
+    in (created_utc, id) order of the comments. Each page is a short query, so no cursor stays open between pages.
+    Returns the DataFrame and the cursor of the next page, None on the last page.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Xe5bTn9QwM")
+
+    comments = UserRedditCommentsModel
+    query = select(*reddit_posts_comments_columns()).select_from(comments).join(
+        UserRedditPostsModel, UserRedditPostsModel.post_id == comments.post_id
+    ).where(
+        comments.created_utc >= start_date,
+        comments.created_utc <= end_date
+    )
+    if cursor:
+        query = query.where(tuple_(comments.created_utc, comments.id) > decode_cursor(cursor))
+    # one row past the page tells whether there is a next page
+    query = query.order_by(comments.created_utc, comments.id).limit(limit + 1)
+    try:
+        reddit_posts_comments = await fetch_dataframe(session, query, dtypes=REDDIT_POSTS_COMMENTS_DTYPES,
+                                                      datetime_columns=['created_utc_x', 'created_utc_y'])
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Tz6kBq3MvW")
+
+    if len(reddit_posts_comments) <= limit:
+        return reddit_posts_comments, None
+    reddit_posts_comments = reddit_posts_comments.iloc[:limit]
+    last_row = reddit_posts_comments.iloc[-1]
+    # pandas reads the naive created_utc_y datetime as UTC
+    return reddit_posts_comments, encode_cursor(int(last_row['created_utc_y'].timestamp()), int(last_row['id_y']))
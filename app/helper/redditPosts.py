@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta
+import time
 from app.models import RedditPosts as UserRedditPostsModel
-from app.schemas.reddit_posts import RedditPost, RedditPostCreate
+from app.schemas.reddit_posts import RedditPost, RedditPostCreate, RedditPostsPage
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import ARRAY, Integer, String, bindparam, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
+from app.helper.bulkLoader import use_bulk_copy, copy_upsert
+from app.helper.pagination import fetch_page
+
+# 12 columns per row keeps each statement well under the 32767 bind parameter limit
+UPSERT_BATCH_SIZE = 2000
 
 
 async def get_reddit_posts_user(session: AsyncSession, author: str):
@@ -21,6 +27,18 @@ async def get_reddit_posts_user(session: AsyncSession, author: str):
     
     return reddit_posts
 
+async def get_reddit_posts_user_page(session: AsyncSession, author: str, cursor: str = None, limit: int = None):
+    """
+    Fetches one page of the Reddit posts of a user in (created_utc, id) order.
+    """
+    query = select(UserRedditPostsModel).where(UserRedditPostsModel.author == author)
+    reddit_posts, next_cursor = await fetch_page(session, query, UserRedditPostsModel, cursor, limit)
+
+    if not reddit_posts and not cursor:
+        raise HTTPException(status_code=404, detail="No Reddit posts found for this user; location Qm8rVd3KpT")
+
+    return RedditPostsPage(items=[RedditPost.model_validate(post) for post in reddit_posts], next_cursor=next_cursor)
+
 def create_reddit_posts(session: AsyncSession, reddit_posts: list[RedditPostCreate]):
     """
     Creates multiple Reddit posts in the database.
@@ -54,6 +72,87 @@ async def create_unique_reddit_posts(session: AsyncSession, reddit_posts: list[R
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location j7NwxTh6hO")
 
+async def upsert_reddit_posts(session: AsyncSession, reddit_posts: list[RedditPostCreate]):
+    """
+    Inserts new Reddit posts and refreshes the mutable columns (score, num_comments, selftext)
+    of posts that already exist, stamping last_seen_utc on all of them. The caller commits the session.
+    Large batches are loaded with COPY.
+    """
+    if not reddit_posts:
+        raise HTTPException(status_code=400, detail="No Reddit posts provided; location Tf9pLw2HsK")
+
+    last_seen_utc = int(time.time())
+    # a row can only be upserted once per statement, keep the last copy of each post
+    values_by_post_id = {post.post_id: {**post.model_dump(), "last_seen_utc": last_seen_utc} for post in reddit_posts}
+    values = list(values_by_post_id.values())
+
+    try:
+        if use_bulk_copy(len(values)):
+            await copy_upsert(session, UserRedditPostsModel, values, conflict_columns=["post_id"],
+                              update_columns=["score", "num_comments", "selftext", "last_seen_utc"])
+            return values
+
+        for i in range(0, len(values), UPSERT_BATCH_SIZE):
+            stmt = insert(UserRedditPostsModel).values(values[i:i + UPSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["post_id"],
+                set_={
+                    "score": stmt.excluded.score,
+                    "num_comments": stmt.excluded.num_comments,
+                    "selftext": stmt.excluded.selftext,
+                    "last_seen_utc": stmt.excluded.last_seen_utc,
+                }
+            )
+            await session.execute(stmt)
+
+        return values
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Rz6vKd1NwJ")
+
+async def get_comments_fetched_num_comments(session: AsyncSession, post_ids: list[str]) -> dict[str, int]:
+    """
+    The num_comments each post had when its comments were last written, keyed by post ID.
+    Posts whose comments were never written are left out.
+    """
+    if not post_ids:
+        return {}
+    try:
+        query = select(UserRedditPostsModel.post_id, UserRedditPostsModel.comments_fetched_num_comments).where(
+            UserRedditPostsModel.post_id.in_(post_ids),
+            UserRedditPostsModel.comments_fetched_num_comments.is_not(None)
+        )
+        result = await session.execute(query)
+        return {post_id: num_comments for post_id, num_comments in result.all()}
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Lw8rTc3NzQ")
+
+async def set_comments_fetched_num_comments(session: AsyncSession, num_comments_by_post_id: dict[str, int]) -> int:
+    """
+    Records the num_comments the posts had when their comments were written. The caller commits the session.
+    Returns the number of updated posts.
+    """
+    if not num_comments_by_post_id:
+        return 0
+    try:
+        result = await session.execute(text(
+            """
+            UPDATE reddit_posts p
+            SET comments_fetched_num_comments = v.num_comments
+            FROM unnest(:post_ids, :num_comments) AS v(post_id, num_comments)
+            WHERE p.post_id = v.post_id
+            """
+        ).bindparams(
+            bindparam("post_ids", type_=ARRAY(String)),
+            bindparam("num_comments", type_=ARRAY(Integer))
+        ), {
+            "post_ids": list(num_comments_by_post_id.keys()),
+            "num_comments": list(num_comments_by_post_id.values()),
+        })
+        return result.rowcount
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Gd5nKv9WsE")
+
 async def get_reddit_posts_by_date_range(session: AsyncSession, start_date: int, end_date: int):
     """
     Fetches Reddit posts within a specific date range.
@@ -80,6 +179,25 @@ async def get_reddit_posts_by_date_range(session: AsyncSession, start_date: int,
 
     return reddit_posts
 
+async def get_reddit_posts_page_by_date_range(session: AsyncSession, start_date: int, end_date: int,
+                                             cursor: str = None, limit: int = None):
+    """
+    Fetches one page of the Reddit posts within a specific date range in (created_utc, id) order.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Zt4kWb9NcE")
+
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date cannot be after end date; location Hy2sLq6RmV")
+
+    query = select(UserRedditPostsModel).where(
+        UserRedditPostsModel.created_utc >= start_date,
+        UserRedditPostsModel.created_utc <= end_date
+    )
+    reddit_posts, next_cursor = await fetch_page(session, query, UserRedditPostsModel, cursor, limit)
+
+    return RedditPostsPage(items=[RedditPost.model_validate(post) for post in reddit_posts], next_cursor=next_cursor)
+
 async def get_reddit_posts_by_post_ids(session: AsyncSession, post_ids: list[str]):
     """
     Fetches Reddit posts by a list of post IDs.
@@ -1,19 +1,185 @@
+from typing import Literal, get_args, get_origin
 from app.models import RedditSentiments as RedditSentimentsModel
-from app.schemas.reddit_sentiments import RedditSentiment, RedditSentimentsCreate
+from app.models import RedditSentimentsHourly as RedditSentimentsHourlyModel
+from app.schemas.reddit_sentiments import RedditSentiment, RedditSentimentsCreate, RedditSentimentBase
 from fastapi import HTTPException
+from sqlalchemy import ARRAY, Integer, String, bindparam, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.dialects.postgresql import insert
+from app.helper.bulkLoader import use_bulk_copy, copy_upsert
+from app.helper.dataframes import fetch_dataframe
+import pandas as pd
+
+SENTIMENT_FIELDS = ['crypto_sentiment', 'future_sentiment', 'emotion', 'subjective']
+
+# one transaction-level advisory lock per hour, taken in hour order so concurrent refreshes cannot deadlock;
+# volatile functions are evaluated after the sort, so the locks follow the ORDER BY
+LOCK_HOURLY_SENTIMENTS_SQL = text(
+    """
+    SELECT pg_advisory_xact_lock(hashtext('reddit_sentiments_hourly:' || hour))
+    FROM unnest(:hours) AS hour
+    ORDER BY hour
+    """
+).bindparams(bindparam("hours", type_=ARRAY(Integer)))
+
+# recounts the labeled comments of whole hours; :hours are hour starts within [:start_hour, :end_hour]
+# the joins match get_reddit_posts_comments_sentiments_by_date_range, so both ML read paths see the same comments
+REFRESH_HOURLY_SENTIMENTS_SQL = text(
+    """
+    INSERT INTO reddit_sentiments_hourly (hour_utc, sentiment_field, sentiment_value, comment_count)
+    SELECT c.created_utc - c.created_utc % 3600, f.sentiment_field, f.sentiment_value, count(*)
+    FROM reddit_sentiments s
+    JOIN reddit_comments c ON c.post_id = s.post_id AND c.comment_id = s.comment_id
+    JOIN reddit_posts p ON p.post_id = c.post_id
+    CROSS JOIN LATERAL (VALUES
+        ('crypto_sentiment', s.crypto_sentiment),
+        ('future_sentiment', s.future_sentiment),
+        ('emotion', s.emotion),
+        ('subjective', s.subjective)
+    ) AS f(sentiment_field, sentiment_value)
+    WHERE c.created_utc >= :start_hour
+      AND c.created_utc < :end_hour + 3600
+      AND c.created_utc - c.created_utc % 3600 = ANY(:hours)
+    GROUP BY 1, 2, 3
+    ON CONFLICT (hour_utc, sentiment_field, sentiment_value)
+    DO UPDATE SET comment_count = excluded.comment_count
+    """
+).bindparams(bindparam("hours", type_=ARRAY(Integer)))
+
+
+def sentiment_values(field: str) -> list[str]:
+    """The values a sentiment field can take, from the Literal of the schema."""
+    annotation = RedditSentimentBase.model_fields[field].annotation
+    literal = next(arg for arg in get_args(annotation) if get_origin(arg) is Literal)
+    return list(get_args(literal))
+
+def hourly_sentiment_columns() -> list[str]:
+    """Count columns of get_reddit_sentiments_hourly_by_date_range, e.g. crypto_sentiment_positive."""
+    return [f"{field}_{value}" for field in SENTIMENT_FIELDS for value in sentiment_values(field)]
 
 async def create_reddit_sentiments(session: AsyncSession, reddit_sentiments_create: list[RedditSentimentsCreate]):
     """
-    Creates new Reddit sentiments in the database.
+    Creates new Reddit sentiments in the database. Large batches are loaded with COPY.
+    The hourly aggregates of the hours of their comments are refreshed in the same transaction.
     """
     try:
+        if use_bulk_copy(len(reddit_sentiments_create)):
+            records_to_insert = [sentiment.model_dump() for sentiment in reddit_sentiments_create]
+            await copy_upsert(session, RedditSentimentsModel, records_to_insert, conflict_columns=['post_id', 'comment_id'])
+            await refresh_reddit_sentiments_hourly_for_sentiments(session, reddit_sentiments_create)
+            return reddit_sentiments_create
         reddit_sentiments = [RedditSentimentsModel(**sentiment.model_dump()) for sentiment in reddit_sentiments_create]
         records_to_insert = [sentiment.model_dump() for sentiment in reddit_sentiments_create]
         stmt = insert(RedditSentimentsModel).values(records_to_insert)
         stmt = stmt.on_conflict_do_nothing(index_elements=['post_id', 'comment_id'])
         await session.execute(stmt)
+        await refresh_reddit_sentiments_hourly_for_sentiments(session, reddit_sentiments_create)
         return reddit_sentiments
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating Reddit sentiments: {str(e)}; location i8HnRCO6Pw")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error creating Reddit sentiments: {str(e)}; location i8HnRCO6Pw")
+
+async def refresh_reddit_sentiments_hourly(session: AsyncSession, hours: list[int]) -> int:
+    """
+    Recounts the hourly sentiment aggregates of the given hours (unix timestamps of hour starts).
+    Recounting whole hours keeps the aggregates exact when sentiments are relabeled or inserted twice.
+    The hours are locked until the transaction ends, so concurrent batches touching the same hour
+    recount it one after the other instead of racing between the delete and the insert under READ COMMITTED.
+    The caller commits the session. Returns the number of written aggregate rows.
+    """
+    if not hours:
+        return 0
+    hours = sorted(set(hours))
+    try:
+        await session.execute(LOCK_HOURLY_SENTIMENTS_SQL, {"hours": hours})
+        # values that are no longer present in an hour must not keep their old count
+        await session.execute(text(
+            "DELETE FROM reddit_sentiments_hourly WHERE hour_utc = ANY(:hours)"
+        ).bindparams(bindparam("hours", type_=ARRAY(Integer))), {"hours": hours})
+        result = await session.execute(REFRESH_HOURLY_SENTIMENTS_SQL, {
+            "hours": hours,
+            "start_hour": hours[0],
+            "end_hour": hours[-1],
+        })
+        return result.rowcount
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to refresh hourly sentiments: {str(e)}; location Ws5dKp8NvB")
+
+async def refresh_reddit_sentiments_hourly_for_sentiments(session: AsyncSession,
+                                                          reddit_sentiments: list[RedditSentimentsCreate]) -> int:
+    """
+    Refreshes the hourly aggregates of the hours in which the comments of these sentiments were created.
+    """
+    if not reddit_sentiments:
+        return 0
+    try:
+        result = await session.execute(text(
+            """
+            SELECT DISTINCT c.created_utc - c.created_utc % 3600
+            FROM reddit_comments c
+            JOIN unnest(:post_ids, :comment_ids) AS k(post_id, comment_id)
+              ON c.post_id = k.post_id AND c.comment_id = k.comment_id
+            """
+        ).bindparams(
+            bindparam("post_ids", type_=ARRAY(String)),
+            bindparam("comment_ids", type_=ARRAY(String))
+        ), {
+            "post_ids": [sentiment.post_id for sentiment in reddit_sentiments],
+            "comment_ids": [sentiment.comment_id for sentiment in reddit_sentiments],
+        })
+        hours = result.scalars().all()
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find the hours of the sentiments: {str(e)}; location Jq2nRc6TzM")
+
+    return await refresh_reddit_sentiments_hourly(session, hours)
+
+async def refresh_reddit_sentiments_hourly_by_date_range(session: AsyncSession, start_date: int, end_date: int) -> int:
+    """
+    Recounts the hourly aggregates of every hour overlapping a date range, e.g. after comments were loaded
+    for sentiments that were stored before them.
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Nc9vHs3LkW")
+
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date cannot be after end date; location Tx4bMf7QpR")
+
+    hours = list(range(start_date - start_date % 3600, end_date + 1, 3600))
+    return await refresh_reddit_sentiments_hourly(session, hours)
+
+async def get_reddit_sentiments_hourly_by_date_range(session: AsyncSession, start_date: int, end_date: int) -> pd.DataFrame:
+    """
+    One row per hour with labeled comments within a date range: hour_utc as a datetime, comment_count,
+    and the number of comments with each sentiment value in the columns of hourly_sentiment_columns().
+    """
+    if not start_date or not end_date:
+        raise HTTPException(status_code=400, detail="Start and end dates are required; location Bd6wLq2XsH")
+
+    hourly = RedditSentimentsHourlyModel
+    query = select(
+        hourly.hour_utc,
+        hourly.sentiment_field,
+        hourly.sentiment_value,
+        hourly.comment_count,
+    ).where(
+        hourly.hour_utc >= start_date - start_date % 3600,
+        hourly.hour_utc <= end_date
+    )
+    hourly_counts = await fetch_dataframe(session, query, dtypes={'hour_utc': 'int64', 'comment_count': 'int64'})
+    if hourly_counts.empty:
+        raise HTTPException(status_code=404, detail="No hourly Reddit sentiments found in the date range; location Yr3hVg8DcK")
+
+    hourly_counts['column'] = hourly_counts['sentiment_field'] + '_' + hourly_counts['sentiment_value']
+    hourly_sentiments = hourly_counts.pivot_table(
+        index='hour_utc', columns='column', values='comment_count', aggfunc='sum', fill_value=0
+    ).reindex(columns=hourly_sentiment_columns(), fill_value=0).astype('int64')
+    # every labeled comment has exactly one value per field
+    hourly_sentiments.insert(0, 'comment_count', hourly_sentiments[
+        [f"{SENTIMENT_FIELDS[0]}_{value}" for value in sentiment_values(SENTIMENT_FIELDS[0])]
+    ].sum(axis=1))
+    hourly_sentiments = hourly_sentiments.reset_index()
+    hourly_sentiments.columns.name = None
+    hourly_sentiments['hour_utc'] = pd.to_datetime(hourly_sentiments['hour_utc'], unit='s')
+    return hourly_sentiments
@@ -0,0 +1,54 @@
+from app.models import RedditSubredditCursors as RedditSubredditCursorsModel
+from app.schemas.reddit_subreddit_cursors import RedditSubredditCursor, RedditSubredditCursorCreate
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert
+
+
+async def get_subreddit_cursors(session: AsyncSession, subreddits: list[str], sort: str) -> dict[str, RedditSubredditCursor]:
+    """
+    Fetches the stored listing cursors of the given subreddits for a sort order, keyed by subreddit.
+    """
+    if not subreddits:
+        return {}
+
+    query = select(RedditSubredditCursorsModel).where(
+        RedditSubredditCursorsModel.subreddit.in_(subreddits),
+        RedditSubredditCursorsModel.sort == sort
+    )
+    result = await session.execute(query)
+
+    return {cursor.subreddit: RedditSubredditCursor.model_validate(cursor) for cursor in result.scalars().all()}
+
+async def upsert_subreddit_cursors(session: AsyncSession, cursors: list[RedditSubredditCursorCreate]):
+    """
+    Creates or moves forward the listing cursors of subreddits, including their backfill position.
+    The caller commits the session.
+    """
+    if not cursors:
+        return []
+
+    try:
+        values = [cursor.model_dump() for cursor in cursors]
+
+        stmt = insert(RedditSubredditCursorsModel).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["subreddit", "sort"],
+            set_={
+                "last_fullname": stmt.excluded.last_fullname,
+                "last_created_utc": stmt.excluded.last_created_utc,
+                "pending_fullname": stmt.excluded.pending_fullname,
+                "pending_created_utc": stmt.excluded.pending_created_utc,
+                "backfill_after": stmt.excluded.backfill_after,
+                "updated_utc": stmt.excluded.updated_utc,
+            }
+        )
+
+        await session.execute(stmt)
+
+        return values
+
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error occurred: {str(e)}; location Vd3kR8nYqL")
@@ -12,8 +12,14 @@ from app.api.routers.redditComments import router as redditComments_router
 from app.api.routers.currencyPrices import router as currencyPrices_router
 from app.api.routers.llm import router as llm_router
 from app.api.routers.ml import router as ml_router
+from app.api.routers.scheduler import router as scheduler_router
+from app.api.routers.database import router as database_router
 from app.settings.settings import get_settings
 from app.database import sessionmanager
+from app.clients import http_clients, REDDIT_OAUTH_HOST, REDDIT_HOST, COINGECKO_HOST
+from app.scheduler import scheduler
+from app.helper.jobLocks import PARTITION_MAINTENANCE_JOB
+from app.services.llmTokenUsage import llm_token_usage
 from fastapi import FastAPI
 
 settings = get_settings()
@@ -38,7 +44,18 @@ async def lifespan(app: FastAPI):
     Function that handles startup and shutdown events.
     To understand more, read https://fastapi.tiangolo.com/advanced/events/
     """
+    # Shared keep-alive HTTP clients for the outbound integrations
+    http_clients.init_clients([REDDIT_OAUTH_HOST, REDDIT_HOST, COINGECKO_HOST])
+    # Make sure the monthly partitions of the time series tables exist before serving requests
+    await scheduler.run_job(PARTITION_MAINTENANCE_JOB)
+    # Background ingestion, pricing and labeling jobs
+    if settings.scheduler_enabled:
+        scheduler.start()
     yield
+    await scheduler.stop()
+    # Write the buffered LLM token usage before the engine goes away
+    await llm_token_usage.stop()
+    await http_clients.close()
     if sessionmanager._engine is not None:
         # Close the DB connection
         await sessionmanager.close()
@@ -55,6 +72,8 @@ app.include_router(redditComments_router)
 app.include_router(currencyPrices_router)
 app.include_router(llm_router)
 app.include_router(ml_router)
+app.include_router(scheduler_router)
+app.include_router(database_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", reload=True, port=settings.app_port, log_level=settings.log_level.lower())
\ No newline at end of file
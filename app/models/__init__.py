@@ -7,8 +7,10 @@ from .reddit_comments import RedditComments
 from .reddit_tokens import RedditTokens
 from .currency_prices import CurrencyPrices
 from .reddit_sentiments import RedditSentiments
+from .reddit_sentiments_hourly import RedditSentimentsHourly
 from .llm_providers import LlmProviders
 from .ml_models import MlModels
 from .wallets import Wallets
 from .orders import Orders
-from .predictions import Predictions
\ No newline at end of file
+from .predictions import Predictions
+from .reddit_subreddit_cursors import RedditSubredditCursors
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import Base
@@ -10,10 +11,16 @@ class CurrencyPrices(Base):
     name: Mapped[str] = mapped_column(nullable=False)
     price: Mapped[float] = mapped_column(nullable=False)
     price_currency: Mapped[str] = mapped_column(nullable=False)
-    timestamp: Mapped[int] = mapped_column(nullable=False)
+    timestamp: Mapped[int] = mapped_column(primary_key=True, nullable=False, index=True)
     source: Mapped[str] = mapped_column(nullable=False)
     market_cap: Mapped[float] = mapped_column(nullable=True)
     total_volume: Mapped[float] = mapped_column(nullable=True)
     total_supply: Mapped[float] = mapped_column(nullable=True)
     ath: Mapped[float] = mapped_column(nullable=True)
-    ath_date: Mapped[str] = mapped_column(nullable=True)
\ No newline at end of file
+    ath_date: Mapped[str] = mapped_column(nullable=True)
+
+    # partitioned by month on timestamp, see app/helper/partitions.py
+    __table_args__ = (
+        Index('ix_currency_prices_currency_timestamp', 'currency', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import Base
@@ -12,5 +13,14 @@ class RedditComments(Base):
     author: Mapped[str] = mapped_column(nullable=False)
     body: Mapped[str] = mapped_column(nullable=False)
     score: Mapped[int] = mapped_column(nullable=False)
-    created_utc: Mapped[int] = mapped_column(nullable=False)
-    depth: Mapped[int] = mapped_column(nullable=False)
\ No newline at end of file
+    created_utc: Mapped[int] = mapped_column(primary_key=True, nullable=False, index=True)
+    depth: Mapped[int] = mapped_column(nullable=False)
+
+    # partitioned by month on created_utc, see app/helper/partitions.py
+    # unique indexes of a partitioned table must contain the partition key
+    __table_args__ = (
+        Index('uq_reddit_comments_post_comment', 'post_id', 'comment_id', 'created_utc', unique=True),
+        # keyset pagination of the comments of a post, see app/helper/pagination.py
+        Index('ix_reddit_comments_post_id_created_utc_id', 'post_id', 'created_utc', 'id'),
+        {'postgresql_partition_by': 'RANGE (created_utc)'},
+    )
\ No newline at end of file
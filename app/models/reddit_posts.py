@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import Base
@@ -14,4 +15,13 @@ class RedditPosts(Base):
     num_comments: Mapped[int] = mapped_column(nullable=False)
     created_utc: Mapped[int] = mapped_column(nullable=False)
     selftext: Mapped[str] = mapped_column(nullable=True)
-    url: Mapped[str] = mapped_column(nullable=False)
\ No newline at end of file
+    url: Mapped[str] = mapped_column(nullable=False)
+    last_seen_utc: Mapped[int | None] = mapped_column(nullable=True)
+    # num_comments of the listing when the comments were last written, the base of the re-fetch growth
+    comments_fetched_num_comments: Mapped[int | None] = mapped_column(nullable=True)
+
+    # keyset pagination walks these in (created_utc, id) order, see app/helper/pagination.py
+    __table_args__ = (
+        Index('ix_reddit_posts_author_created_utc_id', 'author', 'created_utc', 'id'),
+        Index('ix_reddit_posts_created_utc_id', 'created_utc', 'id'),
+    )
\ No newline at end of file
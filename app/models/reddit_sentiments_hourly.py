@@ -0,0 +1,19 @@
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+class RedditSentimentsHourly(Base):
+    __tablename__ = 'reddit_sentiments_hourly'
+
+    # number of labeled comments per hour of created_utc with a value of a sentiment field,
+    # kept up to date by app/helper/redditSentiments.py
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    hour_utc: Mapped[int] = mapped_column(nullable=False)
+    sentiment_field: Mapped[str] = mapped_column(nullable=False)
+    sentiment_value: Mapped[str] = mapped_column(nullable=False)
+    comment_count: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('hour_utc', 'sentiment_field', 'sentiment_value', name='uq_reddit_sentiments_hourly_value'),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+class RedditSubredditCursors(Base):
+    __tablename__ = 'reddit_subreddit_cursors'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    subreddit: Mapped[str] = mapped_column(nullable=False, index=True)
+    sort: Mapped[str] = mapped_column(nullable=False)
+    last_fullname: Mapped[str | None] = mapped_column(nullable=True)
+    last_created_utc: Mapped[int | None] = mapped_column(nullable=True)
+    # newest fetched post and the listing position to resume from while a gap below it is backfilled
+    pending_fullname: Mapped[str | None] = mapped_column(nullable=True)
+    pending_created_utc: Mapped[int | None] = mapped_column(nullable=True)
+    backfill_after: Mapped[str | None] = mapped_column(nullable=True)
+    updated_utc: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('subreddit', 'sort', name='uq_subreddit_sort'),
+    )
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable
+
+from app.database import sessionmanager
+from app.helper.jobLocks import (REDDIT_INGESTION_JOB, CURRENCY_PRICES_JOB, REDDIT_SENTIMENTS_LABELING_JOB,
+                                 PARTITION_MAINTENANCE_JOB, job_lock_name)
+from app.helper.partitions import ensure_monthly_partitions
+from app.schemas.scheduler import SchedulerJob, SchedulerJobRun
+from app.services.currencyPricesService import CurrencyPricesService
+from app.services.llmService import LLMService
+from app.services.redditPostsService import RedditPostsService
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+class ScheduledJob(object):
+    def __init__(self, name: str, func: Callable[[], Awaitable[str | None]], interval_seconds: float,
+                 jitter_seconds: float = 0.0, run_on_start: bool = False):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.run_on_start = run_on_start
+        self.next_run_at: datetime | None = None
+        self.last_run: SchedulerJobRun | None = None
+        self.lock: asyncio.Lock | None = None
+
+    def next_delay(self) -> float:
+        return self.interval_seconds + random.uniform(0, self.jitter_seconds)
+
+
+class JobScheduler(object):
+    """
+    Runs the data collection jobs inside the app process on their own intervals.
+    A random jitter is added to every interval so the jobs do not fire in lockstep.
+    A job never overlaps with itself: a run that is due while the previous one
+    is still going (e.g. triggered manually) is recorded as skipped.
+    With use_advisory_locks, a Postgres advisory lock per job makes sure only one
+    worker or node runs a job at a time; the other workers skip the run.
+    The last runs of all jobs are kept in memory as the run history.
+    """
+
+    def __init__(self, history_size: int = 100, use_advisory_locks: bool = True):
+        self.use_advisory_locks = use_advisory_locks
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._history: deque[SchedulerJobRun] = deque(maxlen=history_size)
+
+    def add_job(self, name: str, func: Callable[[], Awaitable[str | None]], interval_seconds: float,
+                jitter_seconds: float = 0.0, run_on_start: bool = False):
+        if name in self._jobs:
+            raise ValueError(f"Job {name} is already scheduled; location u8RbN2cWqk")
+        self._jobs[name] = ScheduledJob(name, func, interval_seconds, jitter_seconds, run_on_start)
+
+    def start(self):
+        """Start one loop per job. Must be called from a running event loop."""
+        if self._tasks:
+            return
+        for job in self._jobs.values():
+            self._tasks.append(asyncio.create_task(self._run_forever(job), name=f"scheduler:{job.name}"))
+
+    async def stop(self):
+        """Cancel the job loops and wait for the running jobs to be cancelled."""
+        tasks = self._tasks
+        self._tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            job.next_run_at = None
+
+    async def reset(self):
+        """Stop the loops and drop the locks bound to the current event loop. Safe for pytest loop resets."""
+        await self.stop()
+        for job in self._jobs.values():
+            job.lock = None
+        self._history.clear()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def _run_forever(self, job: ScheduledJob):
+        delay = 0.0 if job.run_on_start else job.next_delay()
+        while True:
+            job.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            await self.run_job(job.name)
+            delay = job.next_delay()
+
+    async def run_job(self, name: str) -> SchedulerJobRun:
+        """Run a job now, unless it is already running."""
+        job = self._jobs.get(name)
+        if job is None:
+            raise KeyError(f"Unknown job {name}; location Hq4xV7mZpe")
+        if job.lock is None:
+            job.lock = asyncio.Lock()
+        started_at = datetime.now(timezone.utc)
+        if job.lock.locked():
+            print(f"Skipping job {name}, the previous run is still going; location dW9sLk3Tfa")
+            return self._record(job, SchedulerJobRun(job=name, status="skipped", started_at=started_at,
+                                                     finished_at=started_at))
+        async with job.lock:
+            started = time.monotonic()
+            try:
+                if self.use_advisory_locks:
+                    async with sessionmanager.advisory_lock(job_lock_name(name)) as acquired:
+                        if not acquired:
+                            print(f"Skipping job {name}, another worker is running it; location Yt6pJa1MvW")
+                            return self._record(job, SchedulerJobRun(
+                                job=name, status="skipped", started_at=started_at,
+                                finished_at=datetime.now(timezone.utc), result="Running on another worker"
+                            ))
+                        result = await job.func()
+                else:
+                    result = await job.func()
+                run = SchedulerJobRun(job=name, status="success", started_at=started_at,
+                                      result=str(result) if result is not None else None)
+            except Exception as e:
+                print(f"Scheduled job {name} failed: {str(e)}; location Pz2gYc6RvN")
+                run = SchedulerJobRun(job=name, status="failed", started_at=started_at, error=str(e))
+            run.finished_at = datetime.now(timezone.utc)
+            run.duration_seconds = round(time.monotonic() - started, 3)
+        print(f"Scheduled job {name} finished with status {run.status} in {run.duration_seconds}s")
+        return self._record(job, run)
+
+    def _record(self, job: ScheduledJob, run: SchedulerJobRun) -> SchedulerJobRun:
+        job.last_run = run
+        self._history.append(run)
+        return run
+
+    def get_jobs(self) -> list[SchedulerJob]:
+        return [
+            SchedulerJob(
+                name=job.name,
+                interval_seconds=job.interval_seconds,
+                jitter_seconds=job.jitter_seconds,
+                running=job.lock is not None and job.lock.locked(),
+                next_run_at=job.next_run_at,
+                last_run=job.last_run,
+            )
+            for job in self._jobs.values()
+        ]
+
+    def get_history(self, name: str = None, limit: int = None) -> list[SchedulerJobRun]:
+        """Newest runs first."""
+        history = [run for run in reversed(self._history) if name is None or run.job == name]
+        return history[:limit] if limit else history
+
+
+async def fetch_posts_and_comments_job():
+    async with sessionmanager.session() as session:
+        reddit_posts_service = RedditPostsService(session)
+        posts_and_comments = await reddit_posts_service.fetch_posts_and_comments_from_reddit_service()
+        return f"{len(posts_and_comments.posts)} posts, {len(posts_and_comments.comments)} comments"
+
+
+async def fetch_currency_prices_job():
+    async with sessionmanager.session() as session:
+        currency_prices_service = CurrencyPricesService(session)
+        currency_prices = await currency_prices_service.create_currency_prices_service()
+        return f"{len(currency_prices)} currency prices"
+
+
+async def label_reddit_sentiments_job():
+    async with sessionmanager.session() as session:
+        # the read session is only needed for the existence check; the labeling reads its pages on
+        # sessions of its own, so close it before waiting instead of leaving it idle in a transaction
+        async with sessionmanager.read_session() as read_session:
+            llm_service = LLMService(session, read_session)
+            message, task = await llm_service.label_reddit_sentiments_today_service(
+                hours=settings.scheduler_labeling_hours, return_task=True
+            )
+        # wait for the labeling so the session stays open and overlap protection covers it
+        await task
+        return message
+
+
+async def ensure_monthly_partitions_job():
+    async with sessionmanager.session() as session:
+        created_partitions = await ensure_monthly_partitions(session, settings.partition_months_ahead)
+        await session.commit()
+        return f"Created partitions: {', '.join(created_partitions)}" if created_partitions else "No partitions created"
+
+
+scheduler = JobScheduler(settings.scheduler_history_size)
+scheduler.add_job(REDDIT_INGESTION_JOB, fetch_posts_and_comments_job,
+                  settings.scheduler_ingestion_interval_seconds, settings.scheduler_jitter_seconds)
+scheduler.add_job(CURRENCY_PRICES_JOB, fetch_currency_prices_job,
+                  settings.scheduler_prices_interval_seconds, settings.scheduler_jitter_seconds)
+scheduler.add_job(REDDIT_SENTIMENTS_LABELING_JOB, label_reddit_sentiments_job,
+                  settings.scheduler_labeling_interval_seconds, settings.scheduler_jitter_seconds)
+scheduler.add_job(PARTITION_MAINTENANCE_JOB, ensure_monthly_partitions_job,
+                  settings.scheduler_partitions_interval_seconds, settings.scheduler_jitter_seconds)
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+class DatabasePoolStatus(BaseModel):
+    pid: int  # every worker process has its own pool
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    wait_seconds_avg: float
@@ -15,4 +15,19 @@ class RedditCommentCreate(RedditComments):
     pass  # everything from base, no id
 
 class RedditComment(RedditComments):
-    id: int  # for GET responses
\ No newline at end of file
+    id: int  # for GET responses
+
+class RedditCommentsPage(BaseModel):
+    items: list[RedditComment]
+    next_cursor: str | None = None  # None on the last page
+
+class CommentHarvestStats(BaseModel):
+    posts: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+    comments: int = 0
+    write_batches: int = 0
+    failed_write_batches: int = 0
+    elapsed_seconds: float = 0.0
+    throttled_seconds: float = 0.0
+    requests_per_second: float = 0.0
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from app.schemas.reddit_comments import RedditCommentCreate
+from app.schemas.reddit_comments import RedditCommentCreate, CommentHarvestStats
 
 class RedditPostBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -12,11 +12,18 @@ class RedditPostBase(BaseModel):
     created_utc: int
     selftext: str | None = None
     url: str
+    last_seen_utc: int | None = None
+    comments_fetched_num_comments: int | None = None
 class RedditPostCreate(RedditPostBase):
     pass  # everything from base, no id
 class RedditPost(RedditPostBase):
     id: int  # for GET responses
 
+class RedditPostsPage(BaseModel):
+    items: list[RedditPost]
+    next_cursor: str | None = None  # None on the last page
+
 class RedditPostsAndComments(BaseModel):
     posts: list[RedditPostCreate]
-    comments: list[RedditCommentCreate] 
\ No newline at end of file
+    comments: list[RedditCommentCreate]
+    harvest_stats: CommentHarvestStats | None = None
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+
+class RedditSubredditCursorBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    subreddit: str
+    sort: str
+    last_fullname: str | None = None
+    last_created_utc: int | None = None
+    pending_fullname: str | None = None
+    pending_created_utc: int | None = None
+    backfill_after: str | None = None
+    updated_utc: int
+
+class RedditSubredditCursorCreate(RedditSubredditCursorBase):
+    pass  # everything from base, no id
+
+class RedditSubredditCursor(RedditSubredditCursorBase):
+    id: int  # for GET responses
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, ConfigDict
+
+class SchedulerJobRun(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    job: str
+    status: Literal["success", "failed", "skipped"]
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_seconds: float = 0.0
+    result: str | None = None
+    error: str | None = None
+
+class SchedulerJob(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    name: str
+    interval_seconds: float
+    jitter_seconds: float
+    running: bool = False
+    next_run_at: datetime | None = None
+    last_run: SchedulerJobRun | None = None
@@ -1,15 +1,19 @@
 
-from app.api.dependencies.core import DBSessionDep
+from app.api.dependencies.core import DBSessionDep, ReadSessionDep
 from app.schemas.currency_prices import CurrencyPricesCreate, CurrencyPrice
 from app.settings.settings import get_settings
 from app.services.redditTokenService import RedditTokenService
 from app.helper.currencyPrices import get_currency_prices_from_db, create_currency_prices, get_currency_prices_by_date_range
+from app.helper.currencyPrices import get_currency_prices_dataframe_by_date_range
 import httpx
+from app.clients import http_clients, COINGECKO_HOST
 from datetime import datetime
 
 class CurrencyPricesService(object):
-    def __init__(self, session: DBSessionDep):
+    def __init__(self, session: DBSessionDep, read_session: ReadSessionDep = None):
         self.session = session
+        # date range reads for the data preparation can go to the read database
+        self.read_session = read_session or session
         self.settings = get_settings()
         self.redditTokenService = RedditTokenService(session)
 
@@ -17,7 +21,11 @@ class CurrencyPricesService(object):
         await get_currency_prices_from_db(self.session)
 
     async def get_currency_prices_by_date_range_service(self, start_date: str, end_date: str):
-        return await get_currency_prices_by_date_range(self.session, start_date, end_date)
+        return await get_currency_prices_by_date_range(self.read_session, start_date, end_date)
+
+    async def get_currency_prices_dataframe_by_date_range_service(self, start_date: int, end_date: int,
+                                                                  currencies: list[str] = None):
+        return await get_currency_prices_dataframe_by_date_range(self.read_session, start_date, end_date, currencies)
 
     async def create_currency_prices_service(self, symbols: list[str] = None):
         if symbols is None or symbols == []:
@@ -44,33 +52,33 @@ class CurrencyPricesService(object):
                 "accept": "application/json",
                 "x-cg-demo-api-key": self.settings.coingecko_api_key
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                if not data:
-                    raise ValueError("No data returned from CoinGecko API; location BRwbHiJWQc")
-                currency_prices: list[CurrencyPricesCreate] = []
-                for item in data:
-                    try:
-                        currency_price = CurrencyPricesCreate(
-                            currency = item.get("symbol"),
-                            name = item.get("name"),
-                            price = item.get("current_price"),
-                            price_currency=self.settings.main_currency,
-                            timestamp=int(datetime.now().timestamp()),
-                            source="coingecko",
-                            market_cap=item.get("market_cap"),
-                            total_volume=item.get("total_volume"),
-                            total_supply=item.get("total_supply"),
-                            ath=item.get("ath"),
-                            ath_date=item.get("ath_date")
-                        )
-                        currency_prices.append(currency_price)
-                    except Exception as e:
-                        print(f"Error processing item {item}: {str(e)}; location F3NQKh0r3B")
-                        continue
-                return currency_prices
+            client = http_clients.get_client(COINGECKO_HOST)
+            response = await client.get(url, params=params, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            if not data:
+                raise ValueError("No data returned from CoinGecko API; location BRwbHiJWQc")
+            currency_prices: list[CurrencyPricesCreate] = []
+            for item in data:
+                try:
+                    currency_price = CurrencyPricesCreate(
+                        currency = item.get("symbol"),
+                        name = item.get("name"),
+                        price = item.get("current_price"),
+                        price_currency=self.settings.main_currency,
+                        timestamp=int(datetime.now().timestamp()),
+                        source="coingecko",
+                        market_cap=item.get("market_cap"),
+                        total_volume=item.get("total_volume"),
+                        total_supply=item.get("total_supply"),
+                        ath=item.get("ath"),
+                        ath_date=item.get("ath_date")
+                    )
+                    currency_prices.append(currency_price)
+                except Exception as e:
+                    print(f"Error processing item {item}: {str(e)}; location F3NQKh0r3B")
+                    continue
+            return currency_prices
         except httpx.HTTPStatusError as e:
             raise ValueError(f"HTTP error occurred while fetching currency prices: {str(e)}; location iFXLH2NKMQ") from e
         except httpx.RequestError as e:
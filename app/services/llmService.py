@@ -6,19 +6,23 @@ from app.services.redditCommentsService import RedditCommentsService
 from app.services.redditPostsService import RedditPostsService
 from app.settings.settings import get_settings
 from app.helper.llm import get_active_llm_provider, create_llm_provider, increment_llm_provider_token_usage
-from app.helper.llm import get_reddit_sentiments_by_post_ids
-from app.helper.redditSentiments import create_reddit_sentiments
+from app.helper.llm import get_reddit_posts_comments_sentiments_by_date_range
+from app.helper.redditSentiments import create_reddit_sentiments, get_reddit_sentiments_hourly_by_date_range
+from app.helper.redditComments import has_reddit_posts_comments_in_date_range, get_reddit_posts_comments_page_by_date_range
+from app.database import sessionmanager
+from app.services.llmTokenUsage import llm_token_usage
 from app.schemas.llm_providers import LLMProvider, LLMProviderCreate
 from app.schemas.reddit_sentiments import RedditSentimentsCreate
-import time
 import asyncio
 
 class LLMService(object):
-    def __init__(self, session):
+    def __init__(self, session, read_session=None):
         self.session = session
+        # date range reads for the data preparation can go to the read database
+        self.read_session = read_session or session
         self.settings = get_settings()
         self.reddit_comments_service = RedditCommentsService(session)
-        self.reddit_posts_service = RedditPostsService(session)
+        self.reddit_posts_service = RedditPostsService(session, read_session)
         cohere_service = CohereService(session)
         self.llmProviders = {
             "cohere": cohere_service,
@@ -61,9 +65,12 @@ class LLMService(object):
             response = await self.llmProviders[llm_provider.name].generate_text(prompt, llm_provider_config)
             # parse the response into desired format
             response_df = self.parse_sentiments_response(data, response.response_text)
-            await increment_llm_provider_token_usage(self.session, llm_provider_config.name,
-                                                     llm_provider_config.model,
-                                                     response.token_usage)
+            if self.settings.llm_token_usage_buffered:
+                llm_token_usage.add(llm_provider_config.name, llm_provider_config.model, response.token_usage)
+            else:
+                await increment_llm_provider_token_usage(self.session, llm_provider_config.name,
+                                                         llm_provider_config.model,
+                                                         response.token_usage)
             return response_df
         except Exception as e:
             raise ValueError(f"Failed to generate sentiments: {str(e)}; location xtY7QkX8gY")
@@ -129,42 +136,55 @@ class LLMService(object):
             batch_size = self.settings.reddit_fetch_batch_size
         # get active LLM provider
         llm_provider_config = await self.get_active_llm_provider_service()
-        # Get posts and comments from Reddit within the date range
-        reddit_posts_comments = await self.reddit_posts_service.get_merge_reddit_posts_comments_range(
-            start_date_timestamp,
-            end_date_timestamp
-        )
-        selected_df = reddit_posts_comments[['post_id', 'comment_id', 'title', 'selftext', 'body']].copy()
-        # divide the data into parts of batch_size rows for each cohere API call
-        selected_dfs = [selected_df[i:i+batch_size] for i in range(0, len(selected_df), batch_size)]
+        if not await has_reddit_posts_comments_in_date_range(self.read_session, start_date_timestamp, end_date_timestamp):
+            raise ValueError("No posts or comments found in the specified date range. location uM2wFJn2u")
         # Make it a background task due to the long processing time
         task = asyncio.create_task(
-            self.get_reddit_sentiments_dataframes(selected_dfs, llm_provider_config)
+            self.get_reddit_sentiments_stream(start_date_timestamp, end_date_timestamp, batch_size, llm_provider_config)
         )
         if return_task:
             return "Reddit sentiments are being processed in the background.", task
         else:
             return "Reddit sentiments are being processed in the background."
 
-    async def get_reddit_sentiments_dataframes(self, selected_dfs: list[pd.DataFrame], llm_provider: LLMProvider):
-        # Call get_sentiments method to get the sentiments
-        for part_df in selected_dfs:
-            response_df = await self.get_sentiments(part_df, llm_provider)
-            # add a delay of rate limit for api requests
-            delay = await self.calculate_api_request_delay(llm_provider)
-            time.sleep(delay)
-            try:
-                # save the sentiments to the database
-                await self.create_reddit_sentiments(response_df)
-                await self.session.commit()
-            except Exception as e:
-                print(f"Failed to create Reddit sentiments for batch {part_df.index[0]}-{part_df.index[-1]}: {str(e)}; location H7gBbcHpE8")
-                print("Skipping this batch and continuing with the next one.")
-                await self.session.rollback()
-                continue
-        print(f"Successfully processed {len(selected_dfs)} batches of Reddit sentiments. location u3nm5J8Bw")
+    async def get_reddit_sentiments_stream(self, start_date_timestamp: int, end_date_timestamp: int, batch_size: int,
+                                           llm_provider: LLMProvider):
+        """
+        Reads the posts and comments of the date range in keyset pages of batch_size rows, one page per LLM call,
+        so only one batch is held in memory. Every page is a short query on its own read session,
+        so no cursor or connection is held across the LLM calls and the rate-limit pauses.
+        """
+        batches = 0
+        cursor = None
+        while True:
+            async with sessionmanager.read_session() as read_session:
+                reddit_posts_comments, cursor = await get_reddit_posts_comments_page_by_date_range(
+                    read_session, start_date_timestamp, end_date_timestamp, cursor, batch_size
+                )
+            if reddit_posts_comments.empty:
+                break
+            part_df = reddit_posts_comments[['post_id', 'comment_id', 'title', 'selftext', 'body']]
+            await self.get_reddit_sentiments_batch(part_df, llm_provider, batches)
+            batches += 1
+            if cursor is None:
+                break
+        print(f"Successfully processed {batches} batches of Reddit sentiments. location u3nm5J8Bw")
         return "Reddit sentiments were created successfully."
 
+    async def get_reddit_sentiments_batch(self, part_df: pd.DataFrame, llm_provider: LLMProvider, batch_number: int = 0):
+        response_df = await self.get_sentiments(part_df, llm_provider)
+        # add a delay of rate limit for api requests, without blocking the event loop
+        delay = await self.calculate_api_request_delay(llm_provider)
+        await asyncio.sleep(delay)
+        try:
+            # save the sentiments to the database
+            await self.create_reddit_sentiments(response_df)
+            await self.session.commit()
+        except Exception as e:
+            print(f"Failed to create Reddit sentiments for batch {batch_number}: {str(e)}; location H7gBbcHpE8")
+            print("Skipping this batch and continuing with the next one.")
+            await self.session.rollback()
+
     async def create_reddit_sentiments(self, sentiments_df: pd.DataFrame):
         reddit_sentiments = []
         for _, row in sentiments_df.iterrows():
@@ -200,17 +220,21 @@ class LLMService(object):
     async def get_reddit_posts_comments_sentiments_by_date_range(self,
                                                     start_date_timestamp: int,
                                                     end_date_timestamp: int):
-        reddit_posts_comments = await self.reddit_posts_service.get_merge_reddit_posts_comments_range(
+        # posts, comments and sentiments are joined in the database
+        merged_df = await get_reddit_posts_comments_sentiments_by_date_range(
+            self.read_session,
+            start_date_timestamp,
+            end_date_timestamp
+        )
+        return merged_df
+
+    async def get_reddit_sentiments_hourly_by_date_range(self,
+                                                         start_date_timestamp: int,
+                                                         end_date_timestamp: int):
+        # one row per hour with the counts of each sentiment value
+        hourly_sentiments = await get_reddit_sentiments_hourly_by_date_range(
+            self.read_session,
             start_date_timestamp,
             end_date_timestamp
         )
-        # get unique post_id from reddit_posts_comments as a list of strings
-        post_ids = reddit_posts_comments['post_id'].unique().tolist()
-        post_ids = [str(post_id) for post_id in post_ids]
-        # get reddit sentiments by post_ids
-        reddit_sentiments = await get_reddit_sentiments_by_post_ids(self.session, post_ids)
-        # convert to DataFrame
-        sentiments_df = pd.DataFrame([sentiment.model_dump() for sentiment in reddit_sentiments])
-        # merge with reddit_posts_comments on post_id and comment_id
-        merged_df = pd.merge(reddit_posts_comments, sentiments_df, on=['post_id', 'comment_id'], how='inner')
-        return merged_df
\ No newline at end of file
+        return hourly_sentiments
@@ -0,0 +1,99 @@
+import asyncio
+
+from fastapi import HTTPException
+from app.database import sessionmanager
+from app.helper.llm import increment_llm_provider_token_usage
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+class LLMTokenUsageAccumulator(object):
+    """
+    Sums the token usage of LLM calls in memory and writes it to llm_providers every
+    `flush_seconds`, one UPDATE per provider, so concurrent labeling batches do not queue
+    on the provider row after every call. Usage that is not flushed yet is lost if the
+    process dies; stop() flushes it on shutdown. Usage of providers that do not exist is dropped.
+    One instance is shared by the whole process.
+    """
+
+    def __init__(self, flush_seconds: float = 10.0):
+        self.flush_seconds = flush_seconds
+        self._pending: dict[tuple[str, str], int] = {}
+        self._unknown_providers: set[tuple[str, str]] = set()
+        self._task: asyncio.Task | None = None
+
+    def add(self, name: str, model: str, tokens: int):
+        """Records the tokens of a call and makes sure the periodic flush is running."""
+        if not tokens:
+            return
+        key = (name, model)
+        self._pending[key] = self._pending.get(key, 0) + tokens
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_forever(), name="llm_token_usage")
+
+    @property
+    def pending(self) -> dict[tuple[str, str], int]:
+        return dict(self._pending)
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Writes the pending usage. Usage that fails to be written is kept for the next flush,
+        also when the flush is cancelled midway; usage of unknown providers is dropped.
+        Returns the number of flushed tokens.
+        """
+        pending = self._pending
+        self._pending = {}
+        unflushed = dict(pending)
+        flushed = 0
+        try:
+            for key, tokens in pending.items():
+                name, model = key
+                try:
+                    async with sessionmanager.session() as session:
+                        await increment_llm_provider_token_usage(session, name, model, tokens)
+                        # committed, must not be merged back even if closing the session is cancelled
+                        del unflushed[key]
+                    flushed += tokens
+                except HTTPException as e:
+                    if e.status_code != 404:
+                        print(f"Failed to flush {tokens} tokens of LLM provider {name}: {e.detail}; location Fm4tQw9ZcB")
+                        continue
+                    # retrying cannot succeed, the provider row does not exist
+                    del unflushed[key]
+                    if key not in self._unknown_providers:
+                        self._unknown_providers.add(key)
+                        print(f"Dropping the token usage of unknown LLM provider {name} ({model}); location Rk2vNc8WqT")
+                except Exception as e:
+                    print(f"Failed to flush {tokens} tokens of LLM provider {name}: {str(e)}; location Fm4tQw9ZcB")
+        finally:
+            for key, tokens in unflushed.items():
+                self._pending[key] = self._pending.get(key, 0) + tokens
+        return flushed
+
+    async def stop(self):
+        """Stop the periodic flush and write what is still pending. Call on shutdown."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    async def reset(self):
+        """Stop the periodic flush and drop the pending usage. Safe for pytest loop resets."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._pending = {}
+        self._unknown_providers = set()
+
+
+llm_token_usage = LLMTokenUsageAccumulator(settings.llm_token_usage_flush_seconds)
@@ -15,13 +15,15 @@ from xgboost import XGBRegressor
 import asyncio
 
 class MlService(object):
-    def __init__(self, session):
+    def __init__(self, session, read_session=None):
         self.session = session
+        # the training data is read from the read database when one is set
+        self.read_session = read_session or session
         self.settings = get_settings()
         self.reddit_comments_service = RedditCommentsService(session)
-        self.reddit_posts_service = RedditPostsService(session)
-        self.reddit_llm_service = LLMService(session)
-        self.currency_prices_service = CurrencyPricesService(session)
+        self.reddit_posts_service = RedditPostsService(session, read_session)
+        self.reddit_llm_service = LLMService(session, read_session)
+        self.currency_prices_service = CurrencyPricesService(session, read_session)
     
     async def get_active_ml_model(self, prediction_currency: str = None, provider: str = None, model: str = None):
         ml_model = await get_active_ml_model(
@@ -182,10 +184,19 @@ class MlService(object):
                 raise ValueError(f"Unsupported ML model provider: {ml_model.provider}; location 7uBsE6A3gB")
 
     async def prepare_sentiment_data(self, start_date: int, end_date: int, prediction_hour_interval: int = 12):
-        extracted_sentiments = await self.reddit_llm_service.get_reddit_posts_comments_sentiments_by_date_range(
-            start_date_timestamp=start_date,
-            end_date_timestamp=end_date
-        )
+        if self.settings.ml_hourly_sentiments:
+            # one row per hour with sentiment counts instead of one row per comment
+            extracted_sentiments = await self.reddit_llm_service.get_reddit_sentiments_hourly_by_date_range(
+                start_date_timestamp=start_date,
+                end_date_timestamp=end_date
+            )
+            # the start of the hour stands in for the comment time in the steps below
+            extracted_sentiments['created_utc_y'] = extracted_sentiments['hour_utc']
+        else:
+            extracted_sentiments = await self.reddit_llm_service.get_reddit_posts_comments_sentiments_by_date_range(
+                start_date_timestamp=start_date,
+                end_date_timestamp=end_date
+            )
         merged_df = await self.add_currency_prices_to_sentiment_data(
             extracted_sentiments=extracted_sentiments,
             start_date=start_date,
@@ -225,13 +236,11 @@ class MlService(object):
                                                     start_date: int,
                                                     end_date: int,
                                                     prediction_hour_interval: int = 12):
-        # Get the latest currency prices
-        currency_prices_data = await self.currency_prices_service.get_currency_prices_by_date_range_service(
+        # Get the latest currency prices as a DataFrame
+        currency_prices = await self.currency_prices_service.get_currency_prices_dataframe_by_date_range_service(
             start_date=start_date,
             end_date=end_date
         )
-        # Convert the currency prices to a DataFrame
-        currency_prices = pd.DataFrame([price.model_dump() for price in currency_prices_data])
         # create a field in extracted_sentiments which gets date and hour from created_date_utc_y and call it date_and_hour
         extracted_sentiments['date_and_hour'] = extracted_sentiments['created_utc_y'].dt.strftime('%Y-%m-%d %H:00')
         # from currency_prices timestamp (unix string) get date and hour from created_date_utc_y and call it date_and_hour
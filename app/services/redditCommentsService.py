@@ -1,12 +1,20 @@
 
 from app.api.dependencies.core import DBSessionDep
 from app.helper.redditComments import get_reddit_comments_post, create_reddit_comments, get_reddit_comments_by_date_range
-from app.schemas.reddit_comments import RedditCommentCreate
+from app.helper.redditComments import get_reddit_comment_counts_by_post_ids, delete_duplicate_reddit_comments
+from app.helper.redditComments import stream_reddit_comments_by_date_range
+from app.helper.redditComments import get_reddit_comments_post_page, get_reddit_comments_page_by_date_range
+from app.schemas.reddit_comments import RedditCommentCreate, CommentHarvestStats
 from app.settings.settings import get_settings
-import httpx
+from pydantic import TypeAdapter, ValidationError
+import asyncio
+from app.clients import http_clients, REDDIT_OAUTH_HOST
 from app.services.redditTokenService import RedditTokenService
+from app.services.redditRateLimiter import reddit_rate_limiter
+from app.services.redditIngestionPipeline import RedditIngestionPipeline
 
 settings = get_settings()
+comment_list_adapter = TypeAdapter(list[RedditCommentCreate])
 
 class RedditCommentsService(object):
     def __init__(self, session: DBSessionDep):
@@ -19,22 +27,54 @@ class RedditCommentsService(object):
         reddit_comments = await get_reddit_comments_post(self.session, post_id)
         return reddit_comments
 
+    async def get_reddit_comments_post_page_service(self, post_id: str, cursor: str = None, limit: int = None):
+        reddit_comments_page = await get_reddit_comments_post_page(self.session, post_id, cursor, limit)
+        return reddit_comments_page
+
+    async def get_reddit_comment_counts_service(self, post_ids: list[str]):
+        comment_counts = await get_reddit_comment_counts_by_post_ids(self.session, post_ids)
+        return comment_counts
+
     async def get_reddit_comments_date_range_service(self, start_date_timestamp: int, end_date_timestamp: int):
         reddit_comments = await get_reddit_comments_by_date_range(self.session, start_date_timestamp, end_date_timestamp)
         return reddit_comments
+
+    async def get_reddit_comments_page_by_date_range_service(self, start_date_timestamp: int, end_date_timestamp: int,
+                                                             cursor: str = None, limit: int = None):
+        reddit_comments_page = await get_reddit_comments_page_by_date_range(self.session, start_date_timestamp,
+                                                                            end_date_timestamp, cursor, limit)
+        return reddit_comments_page
+
+    async def stream_reddit_comments_date_range_service(self, start_date_timestamp: int, end_date_timestamp: int,
+                                                        chunk_size: int = None):
+        if chunk_size is None:
+            chunk_size = self.settings.stream_chunk_size
+        async for reddit_comments in stream_reddit_comments_by_date_range(self.session, start_date_timestamp,
+                                                                          end_date_timestamp, chunk_size):
+            yield reddit_comments
     
     async def create_reddit_comments_service(self, reddit_comments: list[RedditCommentCreate]):
         try:
-            created_comments = create_reddit_comments(self.session, reddit_comments)
+            created_comments = await create_reddit_comments(self.session, reddit_comments)
             await self.session.commit()
             return created_comments
         except Exception as e:
             await self.session.rollback()
             raise e
         
-    async def fetch_comments_from_reddit_service(self, post_id: str, sort: str = "top"):
+    async def deduplicate_reddit_comments_service(self):
+        try:
+            deleted_count = await delete_duplicate_reddit_comments(self.session)
+            await self.session.commit()
+            return deleted_count
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+
+    async def fetch_comments_from_reddit_service(self, post_id: str, sort: str = "top", expand_more: bool = False):
         """
         Fetches comments for a specific Reddit post.
+        With expand_more, the "more" placeholders of truncated threads are resolved as well.
         """
         try:
             if not post_id:
@@ -49,7 +89,10 @@ class RedditCommentsService(object):
                 print(f"No comments found for post {post_id}; location X1HfZvbBdQ")
                 return []
             
-            reddit_comments = self.convert_comments_to_schema(post_id, comments)
+            reddit_comments, more_children_ids = self.parse_comment_tree(post_id, comments)
+            if expand_more:
+                more_comments = await self.expand_more_comments(post_id, more_children_ids, sort)
+                reddit_comments.extend(self.convert_more_comments_to_schema(post_id, more_comments))
             await self.create_reddit_comments_service(reddit_comments)
             return reddit_comments
         except Exception as e:
@@ -57,66 +100,187 @@ class RedditCommentsService(object):
             raise Exception(f"Failed to fetch comments for post {post_id}: {str(e)}; location Zqrn2pdH7J") from e
          
         
-    async def fetch_comments_from_reddit(self, post_id: str, sort: str = "top"):
+    async def harvest_comments_service(self, post_ids: list[str], sort: str = "top", concurrency: int = None,
+                                       expand_more_post_ids: set[str] = None):
+        """
+        Fetches comments for many posts through the staged ingestion pipeline:
+        concurrent fetchers paced by the shared Reddit rate limiter, a parser and a batching writer.
+        Returns the comments and the stats of the run.
+        Truncated threads of the posts in expand_more_post_ids are expanded with morechildren calls.
+        """
+        if sort not in ["top", "new", "old", "controversial"]:
+            raise ValueError(f"Invalid sort option: {sort}; location P1uDk8sYwN")
+        pipeline = RedditIngestionPipeline(self, sort=sort, fetchers=concurrency,
+                                           expand_more_post_ids=expand_more_post_ids)
+        return await pipeline.run(post_ids)
+
+    async def fetch_comments_from_reddit(self, post_id: str, sort: str = "top", access_token: str = None,
+                                         stats: CommentHarvestStats = None):
         url = f"https://oauth.reddit.com/comments/{post_id}.json"
-        access_token = await self.redditTokenService.get_reddit_token()
         params = {
             "depth": self.settings.comment_depth,
             "limit": self.settings.comments_per_post,
             "sort": sort
         }
+        response = await self.get_from_reddit(url, params, access_token=access_token, stats=stats)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch comments from Reddit: {response.text}")
+        data = response.json()
+        comments = data[1]['data']['children']
+        # keep the kind so "more" placeholders can be told apart from comments
+        return [{**comment['data'], 'kind': comment.get('kind')} for comment in comments if 'data' in comment]
+
+    async def fetch_more_children_from_reddit(self, post_id: str, children_ids: list[str], sort: str = "top",
+                                              access_token: str = None, stats: CommentHarvestStats = None):
+        """
+        Resolves up to 100 "more" placeholder IDs of a post with one /api/morechildren call.
+        Returns the flat list of comments Reddit sends back.
+        """
+        url = "https://oauth.reddit.com/api/morechildren"
+        params = {
+            "api_type": "json",
+            "link_id": f"t3_{post_id}",
+            "children": ",".join(children_ids),
+            "sort": sort,
+            "depth": self.settings.comment_depth,
+            "limit_children": "false"
+        }
+        response = await self.get_from_reddit(url, params, access_token=access_token, stats=stats)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch more comments from Reddit: {response.text}; location Lq5hTz0vNe")
+        things = response.json().get('json', {}).get('data', {}).get('things', [])
+        return [{**thing['data'], 'kind': thing.get('kind')} for thing in things if 'data' in thing]
+
+    async def expand_more_comments(self, post_id: str, more_children_ids: list[str], sort: str = "top",
+                                   access_token: str = None, stats: CommentHarvestStats = None,
+                                   semaphore: asyncio.Semaphore = None):
+        """
+        Resolves the "more" placeholder IDs of a post in batches of up to 100 IDs,
+        running the batches concurrently under the shared rate limiter.
+        At most settings.more_children_max_batches calls are made per post.
+        """
+        if not more_children_ids:
+            return []
+        if access_token is None:
+            access_token = await self.redditTokenService.get_reddit_token()
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.settings.comment_fetch_concurrency)
+        batch_size = min(self.settings.more_children_batch_size, 100)
+        batches = [more_children_ids[i:i + batch_size] for i in range(0, len(more_children_ids), batch_size)]
+        batches = batches[:self.settings.more_children_max_batches]
+
+        async def fetch_batch(children_ids: list[str]):
+            async with semaphore:
+                return await self.fetch_more_children_from_reddit(post_id, children_ids, sort,
+                                                                  access_token=access_token, stats=stats)
+
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+        more_comments: list[dict] = []
+        for result in results:
+            if isinstance(result, Exception):
+                if stats is not None:
+                    stats.failed_requests += 1
+                print(f"Failed to expand more comments for post {post_id}: {str(result)}; location Gc8wNf2YbT")
+                continue
+            more_comments.extend(result)
+        return more_comments
+
+    async def get_from_reddit(self, url: str, params: dict, access_token: str = None, stats: CommentHarvestStats = None):
+        """
+        Sends a GET request to the Reddit API, paced by the shared rate limiter.
+        """
+        if access_token is None:
+            access_token = await self.redditTokenService.get_reddit_token()
         headers = {
             "User-Agent": self.settings.reddit_user_agent,
             "Authorization": f"Bearer {access_token}"
         }
-        async with httpx.AsyncClient() as client:
+        client = http_clients.get_client(REDDIT_OAUTH_HOST)
+        # retry once if the rate limit was hit anyway
+        for _ in range(2):
+            throttled_seconds = await reddit_rate_limiter.acquire()
             response = await client.get(url, params=params, headers=headers)
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch comments from Reddit: {response.text}")
-            data = response.json()
-            comments = data[1]['data']['children']
-            return [comment['data'] for comment in comments if 'data' in comment]
-        
+            if stats is not None:
+                stats.requests += 1
+                stats.throttled_seconds = round(stats.throttled_seconds + throttled_seconds, 3)
+            if response.status_code != 429:
+                break
+            reddit_rate_limiter.block_until_reset(response.headers)
+        reddit_rate_limiter.update(response.headers)
+        return response
+
+    def parse_comment_tree(self, post_id: str, comments: list[dict]):
+        """
+        Flattens a fetched comment tree and validates it in one pass.
+        Returns the comments and the IDs behind every "more" placeholder in the tree.
+        """
+        rows, more_children_ids = self.flatten_comment_tree(post_id, comments)
+        return self.validate_comment_rows(rows), more_children_ids
+
     def convert_comments_to_schema(self, post_id: str, comments: list[dict]):
-        reddit_comments: list[RedditCommentCreate] = []
-        for comment in comments:
-            try:
-                comment['comment_id'] = comment.pop('id', None)
-                comment['post_id'] = post_id
-                validated_comment = RedditCommentCreate(**comment)
-                reddit_comments.append(validated_comment)
-                # get child comments recursively
-                child_comments: list[RedditCommentCreate] = []
-                self.convert_child_comments_to_schema(post_id, comment, child_comments, current_depth=0)
-                reddit_comments.extend(child_comments)
-            except:
-                pass
+        reddit_comments, _ = self.parse_comment_tree(post_id, comments)
         return reddit_comments
-    
-    def convert_child_comments_to_schema(self, post_id: str, 
-                                         comment: dict, 
-                                         child_comments: list[RedditCommentCreate]
-                                         , current_depth: int):
-        if (
-        comment.get('replies')
-        and isinstance(comment['replies'], dict)
-        and 'data' in comment['replies']
-        and current_depth < self.settings.comment_depth):
-                        children = comment['replies']['data'].get('children', [])
-                        for child in children:
-                            try:
-                                child_data = child.get('data')
-                                if not child_data or child_data.get('body') is None:
-                                    continue
-
-                                child_data['comment_id'] = child_data.pop('id', None)
-                                child_data['post_id'] = post_id
-                                validated_child = RedditCommentCreate(**child_data)
-                                child_comments.append(validated_child)
-
-                                # recursively fetch deeper comments
-                                self.convert_child_comments_to_schema(
-                                    post_id, child_data, child_comments, current_depth + 1)
-                            except Exception as e:
-                                print(f"Error converting child comment: {e}")
-                                pass
\ No newline at end of file
+
+    def convert_more_comments_to_schema(self, post_id: str, more_comments: list[dict]):
+        """
+        Converts the flat comments returned by morechildren calls; nested placeholders are skipped.
+        """
+        rows = [
+            extract_comment_row(post_id, comment) for comment in more_comments
+            if comment.get('kind') == 't1' and comment.get('body') is not None
+        ]
+        return self.validate_comment_rows(rows)
+
+    def flatten_comment_tree(self, post_id: str, comments: list[dict]):
+        """
+        Walks the comment tree depth-first with an explicit stack, in the same order as the listing.
+        Only the fields of RedditCommentCreate are copied out; the raw dicts are left untouched.
+        Replies are followed up to settings.comment_depth levels below the top-level comments.
+        """
+        rows: list[dict] = []
+        more_children_ids: list[str] = []
+        max_depth = self.settings.comment_depth
+        stack = [(comment, comment.get('kind'), 0) for comment in reversed(comments)]
+        while stack:
+            node, kind, level = stack.pop()
+            if kind == 'more':
+                more_children_ids.extend(node.get('children') or [])
+                continue
+            if node.get('body') is None:
+                continue
+            rows.append(extract_comment_row(post_id, node))
+            replies = node.get('replies')
+            if level < max_depth and isinstance(replies, dict) and 'data' in replies:
+                children = replies['data'].get('children', [])
+                for child in reversed(children):
+                    child_data = child.get('data')
+                    if child_data:
+                        stack.append((child_data, child.get('kind'), level + 1))
+        return rows, more_children_ids
+
+    def validate_comment_rows(self, rows: list[dict]) -> list[RedditCommentCreate]:
+        """
+        Validates all rows with one TypeAdapter call. Rows that fail are dropped and the rest revalidated.
+        """
+        if not rows:
+            return []
+        try:
+            return comment_list_adapter.validate_python(rows)
+        except ValidationError as e:
+            invalid_rows = {error['loc'][0] for error in e.errors() if error['loc']}
+            print(f"Skipping {len(invalid_rows)} invalid comments; location Yf6nJx3Qkd")
+            valid_rows = [row for index, row in enumerate(rows) if index not in invalid_rows]
+            return comment_list_adapter.validate_python(valid_rows)
+
+
+def extract_comment_row(post_id: str, comment: dict) -> dict:
+    return {
+        'post_id': post_id,
+        'parent_id': comment.get('parent_id'),
+        'comment_id': comment.get('id'),
+        'author': comment.get('author'),
+        'body': comment.get('body'),
+        'score': comment.get('score'),
+        'created_utc': comment.get('created_utc'),
+        'depth': comment.get('depth'),
+    }
@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+from app.schemas.reddit_comments import RedditCommentCreate, CommentHarvestStats
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+class RedditIngestionPipeline(object):
+    """
+    Harvests the comments of many posts with three asyncio stages connected by bounded queues:
+    fetchers call the Reddit API, a parser flattens and validates the comment trees,
+    and a single writer batches the rows of many posts into large upserts.
+    The bounded queues give backpressure: fetchers wait when parsing falls behind,
+    and the parser waits while the writer is busy with Postgres.
+    Only the writer touches the database session.
+    """
+
+    def __init__(self, reddit_comments_service, sort: str = "top", fetchers: int = None,
+                 expand_more_post_ids: set[str] = None, queue_size: int = None,
+                 write_batch_size: int = None, flush_seconds: float = None):
+        self.reddit_comments_service = reddit_comments_service
+        self.sort = sort
+        self.fetchers = fetchers or settings.comment_fetch_concurrency
+        self.expand_more_post_ids = expand_more_post_ids or set()
+        self.queue_size = queue_size or settings.ingestion_queue_size
+        self.write_batch_size = write_batch_size or settings.ingestion_write_batch_size
+        self.flush_seconds = flush_seconds or settings.ingestion_flush_seconds
+        self._pending = 0
+        self._drained: asyncio.Event | None = None
+
+    async def run(self, post_ids: list[str]) -> tuple[list[RedditCommentCreate], CommentHarvestStats]:
+        """
+        Runs the pipeline until every post (and every morechildren batch it produced) is written.
+        Returns the comments and the stats of the run.
+        """
+        stats = CommentHarvestStats(posts=len(post_ids))
+        if not post_ids:
+            return [], stats
+        # fetch the token once up front; the session belongs to the writer from here on
+        access_token = await self.reddit_comments_service.redditTokenService.get_reddit_token()
+
+        # the fetch queue is unbounded because the parser feeds morechildren batches back into it
+        fetch_queue: asyncio.Queue = asyncio.Queue()
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pending = 0
+        self._drained = asyncio.Event()
+        for post_id in post_ids:
+            self.add_work(fetch_queue, (post_id, None))
+
+        started_at = time.monotonic()
+        workers = [
+            asyncio.create_task(self.fetch_stage(fetch_queue, parse_queue, access_token, stats))
+            for _ in range(self.fetchers)
+        ]
+        workers.append(asyncio.create_task(self.parse_stage(parse_queue, fetch_queue, write_queue, stats)))
+        writer = asyncio.create_task(self.write_stage(write_queue, stats))
+        drained = asyncio.create_task(self._drained.wait())
+        try:
+            done, _ = await asyncio.wait({drained, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if writer in done:
+                # failed batches are counted, so the writer only stops early on an unexpected error
+                writer.result()
+            await write_queue.put(None)
+            all_comments = await writer
+        finally:
+            for task in (*workers, drained, writer):
+                task.cancel()
+            await asyncio.gather(*workers, drained, writer, return_exceptions=True)
+
+        stats.comments = len(all_comments)
+        stats.elapsed_seconds = round(time.monotonic() - started_at, 3)
+        if stats.elapsed_seconds > 0:
+            stats.requests_per_second = round(stats.requests / stats.elapsed_seconds, 3)
+        return all_comments, stats
+
+    def add_work(self, fetch_queue: asyncio.Queue, item: tuple[str, list[str] | None]):
+        self._pending += 1
+        fetch_queue.put_nowait(item)
+
+    def finish_work(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self._drained.set()
+
+    async def fetch_stage(self, fetch_queue: asyncio.Queue, parse_queue: asyncio.Queue,
+                          access_token: str, stats: CommentHarvestStats):
+        """
+        Takes a post ID (or a post ID with a batch of "more" IDs) and fetches the raw comments.
+        """
+        service = self.reddit_comments_service
+        while True:
+            post_id, children_ids = await fetch_queue.get()
+            try:
+                if children_ids is None:
+                    comments = await service.fetch_comments_from_reddit(post_id, self.sort,
+                                                                        access_token=access_token, stats=stats)
+                else:
+                    comments = await service.fetch_more_children_from_reddit(post_id, children_ids, self.sort,
+                                                                             access_token=access_token, stats=stats)
+            except Exception as e:
+                stats.failed_requests += 1
+                print(f"Failed to fetch comments for post {post_id}: {str(e)}; location 0kgrYTra7k")
+                self.finish_work()
+                continue
+            await parse_queue.put((post_id, children_ids is not None, comments))
+
+    async def parse_stage(self, parse_queue: asyncio.Queue, fetch_queue: asyncio.Queue,
+                          write_queue: asyncio.Queue, stats: CommentHarvestStats):
+        """
+        Flattens and validates the fetched comments and hands the rows to the writer.
+        Truncated threads of the posts to expand are queued back to the fetchers in morechildren batches.
+        """
+        service = self.reddit_comments_service
+        batch_size = min(settings.more_children_batch_size, 100)
+        while True:
+            post_id, is_more_batch, comments = await parse_queue.get()
+            try:
+                if is_more_batch:
+                    reddit_comments = service.convert_more_comments_to_schema(post_id, comments)
+                else:
+                    reddit_comments, more_children_ids = service.parse_comment_tree(post_id, comments)
+                    if post_id in self.expand_more_post_ids:
+                        batches = [more_children_ids[i:i + batch_size]
+                                   for i in range(0, len(more_children_ids), batch_size)]
+                        for children_ids in batches[:settings.more_children_max_batches]:
+                            self.add_work(fetch_queue, (post_id, children_ids))
+                if reddit_comments:
+                    print(f"Fetched {len(reddit_comments)} comments for post {post_id}")
+                    await write_queue.put(reddit_comments)
+                elif not is_more_batch:
+                    print(f"No comments found for post {post_id}; location X1HfZvbBdQ")
+            except Exception as e:
+                print(f"Failed to parse comments for post {post_id}: {str(e)}; location Rm3vXe8qLd")
+            finally:
+                self.finish_work()
+
+    async def write_stage(self, write_queue: asyncio.Queue, stats: CommentHarvestStats):
+        """
+        Buffers the rows of many posts and upserts them when the buffer reaches the batch size
+        or the flush interval has passed. Stops at the None sentinel after a final flush.
+        A failed batch is counted and dropped, and only the written comments are returned.
+        """
+        all_comments: list[RedditCommentCreate] = []
+        buffer: list[RedditCommentCreate] = []
+        last_flush_at = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_seconds - (time.monotonic() - last_flush_at))
+            try:
+                reddit_comments = await asyncio.wait_for(write_queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if buffer:
+                    if await self.flush(buffer, stats):
+                        all_comments.extend(buffer)
+                    buffer = []
+                last_flush_at = time.monotonic()
+                continue
+            if reddit_comments is None:
+                if buffer and await self.flush(buffer, stats):
+                    all_comments.extend(buffer)
+                return all_comments
+            buffer.extend(reddit_comments)
+            if len(buffer) >= self.write_batch_size or time.monotonic() - last_flush_at >= self.flush_seconds:
+                if await self.flush(buffer, stats):
+                    all_comments.extend(buffer)
+                buffer = []
+                last_flush_at = time.monotonic()
+
+    async def flush(self, buffer: list[RedditCommentCreate], stats: CommentHarvestStats) -> bool:
+        """
+        Upserts one batch. Returns False when the write failed; the service has rolled the session back,
+        so the harvest keeps draining instead of losing the posts still in flight.
+        """
+        try:
+            await self.reddit_comments_service.create_reddit_comments_service(buffer)
+        except Exception as e:
+            stats.failed_write_batches += 1
+            print(f"Failed to write a batch of {len(buffer)} comments: {str(e)}; location Hq4tWz9NcE")
+            return False
+        stats.write_batches += 1
+        print(f"Wrote a batch of {len(buffer)} comments")
+        return True
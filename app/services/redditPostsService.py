@@ -1,22 +1,32 @@
 
 import asyncio
 
-import pandas as pd
-from app.api.dependencies.core import DBSessionDep
-from app.helper.redditPosts import get_reddit_posts_user, create_reddit_posts, create_unique_reddit_posts
+from app.api.dependencies.core import DBSessionDep, ReadSessionDep
+from app.helper.redditPosts import get_reddit_posts_user, create_reddit_posts, upsert_reddit_posts
 from app.helper.redditPosts import get_reddit_posts_by_date_range, get_reddit_posts_by_post_ids
+from app.helper.redditPosts import get_reddit_posts_user_page, get_reddit_posts_page_by_date_range
+from app.helper.redditPosts import get_comments_fetched_num_comments, set_comments_fetched_num_comments
+from app.helper.redditSubredditCursors import get_subreddit_cursors, upsert_subreddit_cursors
+from app.helper.redditComments import get_reddit_posts_comments_by_date_range
 from app.schemas.reddit_posts import RedditPostCreate, RedditPostsAndComments
+from app.schemas.reddit_subreddit_cursors import RedditSubredditCursor, RedditSubredditCursorCreate
 from app.settings.settings import get_settings
-import httpx
+from app.clients import http_clients, REDDIT_OAUTH_HOST
 from app.services.redditCommentsService import RedditCommentsService
 from app.services.redditTokenService import RedditTokenService
+from app.services.redditRateLimiter import reddit_rate_limiter
 import time
 
 settings = get_settings()
 
+# listings ordered newest first; the incremental cursor relies on that order
+INCREMENTAL_SORTS = {"new"}
+
 class RedditPostsService(object):
-    def __init__(self, session: DBSessionDep):
+    def __init__(self, session: DBSessionDep, read_session: ReadSessionDep = None):
         self.session = session
+        # date range reads for the data preparation can go to the read database
+        self.read_session = read_session or session
         self.settings = settings
         self.redditTokenService = RedditTokenService(session)
     
@@ -24,6 +34,10 @@ class RedditPostsService(object):
          # TODO: ADD VALIDATION FOR AUTHOR ID
         reddit_posts = await get_reddit_posts_user(self.session, author)
         return reddit_posts
+
+    async def get_reddit_posts_user_page_service(self, author: str, cursor: str = None, limit: int = None):
+        reddit_posts_page = await get_reddit_posts_user_page(self.session, author, cursor, limit)
+        return reddit_posts_page
     
     async def get_reddit_posts_by_date_range_service(self,
                                                     start_date_timestamp: int,
@@ -31,6 +45,12 @@ class RedditPostsService(object):
         reddit_posts = await get_reddit_posts_by_date_range(self.session, start_date_timestamp, end_date_timestamp)
         return reddit_posts
 
+    async def get_reddit_posts_page_by_date_range_service(self, start_date_timestamp: int, end_date_timestamp: int,
+                                                          cursor: str = None, limit: int = None):
+        reddit_posts_page = await get_reddit_posts_page_by_date_range(self.session, start_date_timestamp,
+                                                                      end_date_timestamp, cursor, limit)
+        return reddit_posts_page
+
     async def get_reddit_posts_by_post_ids_service(self, post_ids: list[str]):
         reddit_posts = await get_reddit_posts_by_post_ids(self.session, post_ids)
         return reddit_posts
@@ -73,34 +93,86 @@ class RedditPostsService(object):
                 subreddit_sort=subreddit_sort
             )
             reddit_comments_service = RedditCommentsService(self.session)
-            # Fetch comments for each post
-            all_comments: list[RedditPostCreate] = []
+            # posts without stored comments are always fetched,
+            # posts with comments only when the planner picks them for a re-fetch
+            post_ids = [post.post_id for post in reddit_posts]
+            comment_counts = await reddit_comments_service.get_reddit_comment_counts_service(post_ids)
+            fetched_num_comments = await get_comments_fetched_num_comments(self.session, post_ids)
+            refetch_post_ids = set(self.plan_comment_refetches(reddit_posts, comment_counts, fetched_num_comments))
+            post_ids_to_fetch: list[str] = []
             for post in reddit_posts:
-                try:
-                    post_id = post.post_id
-                    # from database post_id has comments, do not fetch comments again
-                    existing_comments = await reddit_comments_service.get_reddit_comments_post_service(post_id)
-                    if existing_comments:
-                        print(f"Comments already exist for post {post_id}, skipping fetch; location u2bsHTra7k")
-                        continue
-                    comments = await reddit_comments_service.fetch_comments_from_reddit_service(post_id, comment_sort)
-                    all_comments.extend(comments)
-                    print(f"Fetched {len(comments)} comments for post {post_id}")
-                except Exception as e:
-                    print(f"Failed to fetch comments for post {post.post_id}: {str(e)}; location 0kgrYTra7k")
+                if comment_counts.get(post.post_id) and post.post_id not in refetch_post_ids:
+                    print(f"Comments already exist for post {post.post_id}, skipping fetch; location u2bsHTra7k")
                     continue
+                post_ids_to_fetch.append(post.post_id)
+            if refetch_post_ids:
+                print(f"Re-fetching comments for {len(refetch_post_ids)} growing posts")
+            # Expand the truncated threads of the most commented posts
+            fetch_post_ids = set(post_ids_to_fetch)
+            posts_to_fetch = [post for post in reddit_posts if post.post_id in fetch_post_ids]
+            posts_to_fetch.sort(key=lambda post: post.num_comments, reverse=True)
+            expand_more_post_ids = {post.post_id for post in posts_to_fetch[:self.settings.more_children_posts_per_cycle]}
+            # Fetch comments for the remaining posts concurrently
+            all_comments, harvest_stats = await reddit_comments_service.harvest_comments_service(
+                post_ids_to_fetch, comment_sort, expand_more_post_ids=expand_more_post_ids
+            )
+            print(f"Comment harvest: {harvest_stats.requests} requests in {harvest_stats.elapsed_seconds}s "
+                  f"({harvest_stats.requests_per_second} req/s), throttled for {harvest_stats.throttled_seconds}s, "
+                  f"{harvest_stats.failed_requests} failed, {harvest_stats.write_batches} write batches "
+                  f"({harvest_stats.failed_write_batches} failed)")
+            # the base of the next growth check, for the posts whose comments were written
+            written_post_ids = {comment.post_id for comment in all_comments}
+            await set_comments_fetched_num_comments(self.session, {
+                post.post_id: post.num_comments for post in reddit_posts if post.post_id in written_post_ids
+            })
+            await self.session.commit()
             posts_and_comments = RedditPostsAndComments(
                 posts=reddit_posts,
-                comments=all_comments
+                comments=all_comments,
+                harvest_stats=harvest_stats
             )
             return posts_and_comments
         except Exception as e:
             await self.session.rollback()
             raise Exception(f"Failed to fetch posts and comments from Reddit: {str(e)}; location HqE4RTwQR9") from e
 
-    async def get_posts_from_subreddits_service(self, subreddits: list[str], posts_per_subreddit: int, subreddit_sort: str):
+    def plan_comment_refetches(self, reddit_posts: list[RedditPostCreate], comment_counts: dict[str, int],
+                               fetched_num_comments: dict[str, int] = None, budget: int = None, min_growth: int = None):
+        """
+        Picks the posts that already have comments but are still growing.
+        Growth is the live num_comments from the listing minus the num_comments seen when the comments
+        were last written. The stored comment count is capped by comments_per_post, the depth and the
+        morechildren caps, so it is only the base for posts written before that was recorded.
+        Posts growing by at least min_growth are returned fastest-growing first, at most budget of them.
+        """
+        fetched_num_comments = fetched_num_comments or {}
+        if budget is None:
+            budget = self.settings.comment_refetch_budget
+        if min_growth is None:
+            min_growth = self.settings.comment_refetch_min_growth
+        if budget <= 0:
+            return []
+        candidates: list[tuple[int, str]] = []
+        for post in reddit_posts:
+            stored_count = comment_counts.get(post.post_id, 0)
+            if not stored_count:
+                continue
+            growth = post.num_comments - fetched_num_comments.get(post.post_id, stored_count)
+            if growth >= min_growth:
+                candidates.append((growth, post.post_id))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [post_id for _, post_id in candidates[:budget]]
+
+    async def get_posts_from_subreddits_service(self, subreddits: list[str], posts_per_subreddit: int, subreddit_sort: str,
+                                                concurrency: int = None, incremental: bool = None, max_pages: int = None):
         """
         Fetches posts from specified subreddits.
+        When concurrency is greater than 1, the listing requests are issued in parallel
+        (at most `concurrency` at a time) and all results are written with a single upsert.
+        In incremental mode, each subreddit's listing is paged with Reddit's `after` token
+        (up to `max_pages` pages of `posts_per_subreddit`) until already-seen posts are reached.
+        When the page cap is hit first, the next run resumes below the last fetched page until the gap is closed.
+        Incremental mode only applies to the "new" sort; other sorts always fetch the full listing.
         """
         try:
             # TODO: MOVE VALIADATIONS TO A SEPARATE FUNCTION
@@ -110,66 +182,233 @@ class RedditPostsService(object):
                 raise ValueError("Posts per subreddit must be greater than 0; location fByiL1JTjd")
             if subreddit_sort not in ["hot", "new", "top", "rising"]:
                 raise ValueError(f"Invalid subreddit sort option: {subreddit_sort}; location fByiL1JTjd")
+            if concurrency is None:
+                concurrency = self.settings.subreddit_fetch_concurrency
+            if incremental is None:
+                incremental = self.settings.subreddit_incremental
+            if incremental and subreddit_sort not in INCREMENTAL_SORTS:
+                # other sorts are not newest first, stopping at seen posts would drop rising posts and their score refresh
+                print(f"Incremental mode only supports the 'new' sort, fetching the full '{subreddit_sort}' listing; location Pn6rKw2XbT")
+                incremental = False
+            if max_pages is None:
+                max_pages = self.settings.subreddit_max_pages
+            cursors: dict[str, RedditSubredditCursor] = {}
+            if incremental:
+                cursors = await get_subreddit_cursors(self.session, subreddits, subreddit_sort)
+            if concurrency > 1:
+                return await self.get_posts_from_subreddits_concurrently(subreddits, posts_per_subreddit, subreddit_sort, concurrency,
+                                                                         incremental, max_pages, cursors)
             all_posts: list[RedditPostCreate] = []
             for subreddit in subreddits:
-                reddit_posts: list[RedditPostCreate] = []
-                posts = await self.get_reddit_posts_from_subreddit(subreddit, posts_per_subreddit, subreddit_sort)
+                posts, new_cursor = await self.fetch_subreddit_posts(subreddit, posts_per_subreddit, subreddit_sort,
+                                                                     incremental=incremental, max_pages=max_pages,
+                                                                     cursor=cursors.get(subreddit))
                 if not posts:
                     print(f"No posts found for subreddit {subreddit}; location fByiL1JTjd")
+                    # closing a backfill gap can end on already-seen posts only
+                    if new_cursor:
+                        await upsert_subreddit_cursors(self.session, [new_cursor])
+                        await self.session.commit()
                     continue
                 print(f"Fetched {len(posts)} posts from subreddit {subreddit}")
-                for post in posts:
-                    try:
-                        # replace id with post_id to avoid conflicts
-                        post["post_id"] = post.pop("id")
-                        reddit_posts.append(RedditPostCreate(**post))
-                    except:
-                        continue
+                reddit_posts = self.convert_posts_to_schema(posts)
                 all_posts.extend(reddit_posts)
-                await create_unique_reddit_posts(self.session, reddit_posts)
+                await upsert_reddit_posts(self.session, reddit_posts)
+                if new_cursor:
+                    await upsert_subreddit_cursors(self.session, [new_cursor])
                 await self.session.commit()
             return all_posts
         except Exception as e:
             await self.session.rollback()
             raise Exception(f"Failed to fetch posts from subreddits: {str(e)}; location UMJGmbCEpr") from e
-        
-    async def get_reddit_posts_from_subreddit(self, subreddit: str, posts_per_subreddit: int, subreddit_sort: str):
-        url = f"https://oauth.reddit.com/r/{subreddit}/{subreddit_sort}.json?limit={posts_per_subreddit}"
+
+    async def get_posts_from_subreddits_concurrently(self, subreddits: list[str], posts_per_subreddit: int, subreddit_sort: str,
+                                                     concurrency: int, incremental: bool = False, max_pages: int = 1,
+                                                     cursors: dict[str, RedditSubredditCursor] = None):
+        """
+        Fetches the subreddit listings in parallel and saves all posts in one upsert.
+        A failing subreddit is skipped so it does not discard the other listings.
+        """
+        cursors = cursors or {}
+        # fetch the token once up front; the session must not be shared by concurrent requests
         access_token = await self.redditTokenService.get_reddit_token()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_subreddit(subreddit: str):
+            async with semaphore:
+                return await self.fetch_subreddit_posts(subreddit, posts_per_subreddit, subreddit_sort,
+                                                        access_token=access_token, incremental=incremental,
+                                                        max_pages=max_pages, cursor=cursors.get(subreddit))
+
+        results = await asyncio.gather(*(fetch_subreddit(subreddit) for subreddit in subreddits), return_exceptions=True)
+        all_posts: list[RedditPostCreate] = []
+        new_cursors: list[RedditSubredditCursorCreate] = []
+        seen_post_ids: set[str] = set()
+        for subreddit, result in zip(subreddits, results):
+            if isinstance(result, Exception):
+                print(f"Failed to fetch posts from subreddit {subreddit}: {str(result)}; location Qm7vXc2LpA")
+                continue
+            posts, new_cursor = result
+            if new_cursor:
+                new_cursors.append(new_cursor)
+            if not posts:
+                print(f"No posts found for subreddit {subreddit}; location fByiL1JTjd")
+                continue
+            print(f"Fetched {len(posts)} posts from subreddit {subreddit}")
+            for post in self.convert_posts_to_schema(posts):
+                if post.post_id in seen_post_ids:
+                    continue
+                seen_post_ids.add(post.post_id)
+                all_posts.append(post)
+        if all_posts or new_cursors:
+            await upsert_reddit_posts(self.session, all_posts)
+            await upsert_subreddit_cursors(self.session, new_cursors)
+            await self.session.commit()
+        return all_posts
+
+    async def fetch_subreddit_posts(self, subreddit: str, posts_per_subreddit: int, subreddit_sort: str,
+                                    access_token: str = None, incremental: bool = False, max_pages: int = 1,
+                                    cursor: RedditSubredditCursor = None):
+        """
+        Returns the fetched posts and, in incremental mode, the new cursor of the subreddit (None if unchanged).
+        """
+        if incremental and subreddit_sort in INCREMENTAL_SORTS:
+            posts, caught_up, after = await self.get_new_reddit_posts_from_subreddit(
+                subreddit, posts_per_subreddit, subreddit_sort, cursor=cursor, max_pages=max_pages,
+                access_token=access_token
+            )
+            return posts, self.build_subreddit_cursor(subreddit, subreddit_sort, posts, cursor, caught_up, after)
+        posts = await self.get_reddit_posts_from_subreddit(subreddit, posts_per_subreddit, subreddit_sort,
+                                                           access_token=access_token)
+        return posts, None
+
+    def build_subreddit_cursor(self, subreddit: str, subreddit_sort: str, posts: list[dict],
+                               cursor: RedditSubredditCursor = None, caught_up: bool = True, after: str = None):
+        """
+        Returns the next cursor of a subreddit, or None if there is nothing to change.
+        Once the fetch caught up with already-seen posts (or the end of the listing), the cursor moves to
+        the newest post fetched so far. Otherwise it stays where it was and remembers the newest post and
+        the `after` token to resume from, so the posts between the last fetched page and the cursor are not skipped.
+        """
+        newest_fullname, newest_created_utc = None, None
+        dated_posts = [post for post in posts if post.get("name") and post.get("created_utc") is not None]
+        if dated_posts:
+            newest_post = max(dated_posts, key=lambda post: post["created_utc"])
+            newest_fullname, newest_created_utc = newest_post["name"], int(newest_post["created_utc"])
+        # while backfilling, the posts of the first page of the gap are newer than anything fetched since
+        if cursor and cursor.pending_created_utc is not None and (
+                newest_created_utc is None or cursor.pending_created_utc >= newest_created_utc):
+            newest_fullname, newest_created_utc = cursor.pending_fullname, cursor.pending_created_utc
+        if newest_created_utc is None:
+            return None
+        if caught_up:
+            return RedditSubredditCursorCreate(
+                subreddit=subreddit,
+                sort=subreddit_sort,
+                last_fullname=newest_fullname,
+                last_created_utc=newest_created_utc,
+                updated_utc=int(time.time())
+            )
+        return RedditSubredditCursorCreate(
+            subreddit=subreddit,
+            sort=subreddit_sort,
+            last_fullname=cursor.last_fullname,
+            last_created_utc=cursor.last_created_utc,
+            pending_fullname=newest_fullname,
+            pending_created_utc=newest_created_utc,
+            backfill_after=after,
+            updated_utc=int(time.time())
+        )
+
+    def convert_posts_to_schema(self, posts: list[dict]):
+        reddit_posts: list[RedditPostCreate] = []
+        for post in posts:
+            try:
+                # replace id with post_id to avoid conflicts
+                post["post_id"] = post.pop("id")
+                reddit_posts.append(RedditPostCreate(**post))
+            except:
+                continue
+        return reddit_posts
+
+    async def get_reddit_posts_from_subreddit(self, subreddit: str, posts_per_subreddit: int, subreddit_sort: str,
+                                              access_token: str = None):
+        posts, _ = await self.get_reddit_listing_page(subreddit, posts_per_subreddit, subreddit_sort, access_token=access_token)
+        # make sure the limit is respected
+        return posts[:posts_per_subreddit]
+
+    async def get_new_reddit_posts_from_subreddit(self, subreddit: str, posts_per_page: int, subreddit_sort: str,
+                                                  cursor: RedditSubredditCursor = None, max_pages: int = 1,
+                                                  access_token: str = None):
+        """
+        Follows the listing's `after` pagination and returns only the posts newer than the cursor.
+        Paging stops at the first page that reaches already-seen content, when the listing ends,
+        or after max_pages pages. Without a cursor, up to max_pages pages are returned.
+        A cursor with a backfill position resumes paging there instead of at the top of the listing.
+        Listings are newest-first only for the "new" sort, which is what this mode is meant for.
+        Returns the posts, whether the fetch caught up with already-seen posts (or the end of the listing),
+        and the `after` token of the next page.
+        """
+        if access_token is None:
+            access_token = await self.redditTokenService.get_reddit_token()
+        new_posts: list[dict] = []
+        after = cursor.backfill_after if cursor else None
+        # without a seen post there is no gap to close, the listing is followed from the newest post on
+        caught_up = cursor is None or (cursor.last_fullname is None and cursor.last_created_utc is None)
+        for _ in range(max(max_pages, 1)):
+            posts, after = await self.get_reddit_listing_page(subreddit, posts_per_page, subreddit_sort,
+                                                              access_token=access_token, after=after)
+            reached_seen_posts = False
+            for post in posts:
+                if cursor and (post.get("name") == cursor.last_fullname
+                               or (cursor.last_created_utc is not None
+                                   and post.get("created_utc", 0) <= cursor.last_created_utc)):
+                    reached_seen_posts = True
+                    continue
+                new_posts.append(post)
+            if reached_seen_posts or not after:
+                caught_up = True
+                break
+        return new_posts, caught_up, after
+
+    async def get_reddit_listing_page(self, subreddit: str, limit: int, subreddit_sort: str,
+                                      access_token: str = None, after: str = None):
+        """
+        Fetches one page of a subreddit listing. Returns the posts and the `after` token of the next page.
+        """
+        url = f"https://oauth.reddit.com/r/{subreddit}/{subreddit_sort}.json"
+        # Reddit serves at most 100 posts per listing page
+        params = {"limit": min(limit, 100)}
+        if after:
+            params["after"] = after
+        if access_token is None:
+            access_token = await self.redditTokenService.get_reddit_token()
         headers = {
             "User-Agent": settings.reddit_user_agent,
             "Authorization": f"Bearer {access_token}"
         }
         # send a GET request to the Reddit API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                posts = data.get("data", {}).get("children", [])
-                # make sure the limit is respected
-                return [post["data"] for post in posts[:posts_per_subreddit]]
-            else:
-                raise Exception(f"Failed to fetch posts from subreddit {subreddit}: {response.status_code} - {response.text}; location fByiL1JTjd")
+        client = http_clients.get_client(REDDIT_OAUTH_HOST)
+        await reddit_rate_limiter.acquire()
+        response = await client.get(url, params=params, headers=headers)
+        reddit_rate_limiter.update(response.headers)
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            posts = data.get("children", [])
+            return [post["data"] for post in posts], data.get("after")
+        else:
+            raise Exception(f"Failed to fetch posts from subreddit {subreddit}: {response.status_code} - {response.text}; location fByiL1JTjd")
             
     async def get_merge_reddit_posts_comments_range(self,
                                                     start_date_timestamp: int,
                                                     end_date_timestamp: int):
-        # initialize RedditCommentsService
-        reddit_comments_service = RedditCommentsService(self.session)
-        # get posts and comments from Reddit within the date range
-        comments = await reddit_comments_service.get_reddit_comments_date_range_service(start_date_timestamp, end_date_timestamp)
-        # Get posts with comments unique post_ids
-        post_ids = list(set(comment.post_id for comment in comments))
-        posts = await self.get_reddit_posts_by_post_ids_service(post_ids)
-        if not posts or not comments:
+        # comments within the date range joined with their posts, built column by column
+        reddit_posts_comments = await get_reddit_posts_comments_by_date_range(
+            self.read_session,
+            start_date_timestamp,
+            end_date_timestamp
+        )
+        if reddit_posts_comments.empty:
             raise ValueError("No posts or comments found in the specified date range. location uM2wFJn2u")
-        # convert posts and comments to DataFrames
-        posts_df = pd.DataFrame([post.model_dump() for post in posts])
-        comments_df = pd.DataFrame([comment.model_dump() for comment in comments])
-        # connect reddit posts and comments using post_id
-        reddit_posts_comments = pd.merge(posts_df, comments_df, on='post_id')
-        # convert created_utc_x and created_utc_y to dates from timestamp
-        reddit_posts_comments['created_utc_x'] = pd.to_datetime(reddit_posts_comments['created_utc_x'], unit='s')
-        reddit_posts_comments['created_utc_y'] = pd.to_datetime(reddit_posts_comments['created_utc_y'], unit='s')
 
         return reddit_posts_comments        
\ No newline at end of file
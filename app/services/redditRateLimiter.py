@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+class RedditRateLimiter(object):
+    """
+    Paces outbound Reddit API requests using the X-Ratelimit-* response headers.
+    The remaining quota is spread evenly over the time left in the current window,
+    keeping `safety_margin` requests in reserve so the client never hits a 429.
+    One instance is shared by the whole process because the quota belongs to the OAuth client.
+    """
+
+    def __init__(self, safety_margin: int = 5):
+        self.safety_margin = safety_margin
+        self._remaining: float | None = None
+        self._reset_at: float | None = None
+        self._next_request_at: float = 0.0
+        self._lock: asyncio.Lock | None = None
+
+    def reset(self):
+        """Forget the current window. Safe for pytest loop resets."""
+        self._remaining = None
+        self._reset_at = None
+        self._next_request_at = 0.0
+        self._lock = None
+
+    async def acquire(self) -> float:
+        """
+        Waits until the next request may be sent.
+        Returns the number of seconds spent throttled.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._reset_at is not None and now >= self._reset_at:
+                # the window has rolled over, the next response will tell us the new quota
+                self._remaining = None
+                self._reset_at = None
+                self._next_request_at = 0.0
+            delay = 0.0
+            if self._remaining is not None and self._reset_at is not None:
+                usable = self._remaining - self.safety_margin
+                if usable < 1:
+                    # out of quota, wait for the window to reset
+                    delay = self._reset_at - now
+                else:
+                    interval = (self._reset_at - now) / usable
+                    delay = max(0.0, self._next_request_at - now)
+                    self._next_request_at = now + delay + interval
+                self._remaining -= 1
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return delay
+
+    def update(self, headers) -> None:
+        """Updates the quota from the X-Ratelimit-Remaining and X-Ratelimit-Reset headers of a response."""
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            self._remaining = float(remaining)
+            self._reset_at = time.monotonic() + float(reset)
+        except ValueError:
+            print(f"Invalid Reddit rate limit headers: remaining={remaining}, reset={reset}; location b4KpW0sZqe")
+
+    def block_until_reset(self, headers) -> None:
+        """Marks the quota as exhausted after a 429 response."""
+        self.update(headers)
+        self._remaining = 0
+        if self._reset_at is None:
+            retry_after = headers.get("retry-after")
+            try:
+                wait = float(retry_after) if retry_after else 60.0
+            except ValueError:
+                wait = 60.0
+            self._reset_at = time.monotonic() + wait
+
+
+# Shared by every service that calls the Reddit API
+reddit_rate_limiter = RedditRateLimiter(settings.reddit_rate_limit_safety_margin)
@@ -3,22 +3,77 @@ from app.api.dependencies.core import DBSessionDep
 from app.schemas.reddit_tokens import RedditTokenCreate
 from app.settings.settings import get_settings
 from app.helper.redditTokens import get_reddit_token, create_reddit_token, delete_reddit_token
+import asyncio
 import httpx
+from app.clients import http_clients, REDDIT_HOST
 import time
 
+
+class RedditTokenCache(object):
+    """
+    Process-level cache of the Reddit access token and its expiry.
+    Only one refresh runs at a time; callers waiting on the lock reuse its result.
+    """
+
+    def __init__(self):
+        self.access_token: str | None = None
+        self.expires_at: int = 0
+        self._lock: asyncio.Lock | None = None
+
+    def get_valid_token(self, refresh_margin: int) -> str | None:
+        """Returns the cached token unless it expires within refresh_margin seconds."""
+        if self.access_token and int(time.time()) < self.expires_at - refresh_margin:
+            return self.access_token
+        return None
+
+    def set(self, access_token: str, expires_at: int):
+        self.access_token = access_token
+        self.expires_at = expires_at
+
+    @property
+    def refresh_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def reset(self):
+        """Forget the cached token. Safe for pytest loop resets."""
+        self.access_token = None
+        self.expires_at = 0
+        self._lock = None
+
+
+reddit_token_cache = RedditTokenCache()
+
+
 class RedditTokenService(object):
     def __init__(self, session: DBSessionDep):
         self.session = session
         self.settings = get_settings()
 
     async def get_reddit_token(self):
+        access_token = reddit_token_cache.get_valid_token(self.settings.reddit_token_refresh_margin)
+        if access_token:
+            return access_token
+        async with reddit_token_cache.refresh_lock:
+            # another caller may have refreshed the token while this one was waiting
+            access_token = reddit_token_cache.get_valid_token(self.settings.reddit_token_refresh_margin)
+            if access_token:
+                return access_token
+            return await self.refresh_reddit_token()
+
+    async def refresh_reddit_token(self):
+        """
+        Loads the token from the database on a cold start, or fetches a new one
+        from Reddit when the stored token is missing or about to expire.
+        """
         try:
             reddit_token = await get_reddit_token(self.session)
             if reddit_token:
                 if await self.is_token_expired(reddit_token):
                     await delete_reddit_token(self.session, reddit_token.id)
-                    self.session.commit()
                 else:
+                    reddit_token_cache.set(reddit_token.access_token, reddit_token.created_at + reddit_token.expires_in)
                     return reddit_token.access_token
             # If no valid token exists, fetch a new one from Reddit
             reddit_token_data = await self.get_reddit_token_from_reddit()
@@ -31,30 +86,29 @@ class RedditTokenService(object):
                     scope=reddit_token_data.get('scope', '')
                 )
                 reddit_token = await create_reddit_token(self.session, reddit_token_create)
+                reddit_token_cache.set(reddit_token.access_token, reddit_token.created_at + reddit_token.expires_in)
                 return reddit_token.access_token
             else:
                 raise Exception("Failed to fetch Reddit token from Reddit API; location j8we9g2H5K")
         except Exception as e:
-            self.session.rollback()
+            await self.session.rollback()
             raise Exception(f"Error fetching Reddit token: {str(e)} location ZENfFU44Ry") from e
 
-        
-    
     async def get_reddit_token_from_reddit(self):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://www.reddit.com/api/v1/access_token",
-                    data={"grant_type": "client_credentials"},
-                    auth=(self.settings.reddit_client_id, self.settings.reddit_client_secret),
-                    headers={"User-Agent": self.settings.reddit_user_agent},
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_clients.get_client(REDDIT_HOST)
+            response = await client.post(
+                "https://www.reddit.com/api/v1/access_token",
+                data={"grant_type": "client_credentials"},
+                auth=(self.settings.reddit_client_id, self.settings.reddit_client_secret),
+                headers={"User-Agent": self.settings.reddit_user_agent},
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             raise Exception(f"Failed to fetch Reddit token: {e.response.text} location H3s0O9d4kA") from e
     
     async def is_token_expired(self, reddit_token):
-        # Compare created_at and expires_in to determine if the token is expired
+        # Compare created_at and expires_in to determine if the token is expired or about to expire
         current_time = int(time.time())
-        return (current_time - reddit_token.created_at) >= reddit_token.expires_in
\ No newline at end of file
+        return (current_time - reddit_token.created_at) >= reddit_token.expires_in - self.settings.reddit_token_refresh_margin
\ No newline at end of file
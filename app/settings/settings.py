@@ -10,7 +10,19 @@ class Settings(BaseSettings):
     db_host: str = os.getenv("DB_HOST", "localhost")
     db_port: int = int(os.getenv("DB_PORT", 5432))
     db_name: str = os.getenv("DB_NAME", "dev_db")
+    db_read_host: str | None = os.getenv("DB_READ_HOST")  # e.g. a streaming replica, same user and database
+    db_read_port: int = int(os.getenv("DB_READ_PORT", os.getenv("DB_PORT", 5432)))
+    db_read_fallback_to_primary: bool = True
+    db_read_connect_timeout: float = 5.0
+    db_read_retry_seconds: float = 30.0
     echo_sql: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_prepared_statement_cache_size: int = 100
+    db_pgbouncer: bool = False
     project_name: str
     log_level: str = "DEBUG"
     debug_logs: bool = False
@@ -22,16 +34,58 @@ class Settings(BaseSettings):
     comment_depth: int = 3
     reddit_client_id: str = os.getenv("REDDIT_CLIENT_ID","")
     reddit_client_secret: str = os.getenv("REDDIT_CLIENT_SECRET","")
+    reddit_token_refresh_margin: int = 60
     reddit_user_agent: str = os.getenv("REDDIT_USER_AGENT", "testscript:v1.0.1 (by /u/testscript)")
     main_currency: str = "usd"
     currency_list: list[str] = ["btc", "eth", "usdt", "bnb", "xrp", "ada", "sol", "usdc", "doge", "steth", "sui", "trx", "link", "leo", "avax", "xlm", "ton", "shib", "ltc", "xmr", "bgb", "pi", "uni"]
     coingecko_api_key: str = os.getenv("COINGECKO_API_KEY", "")
     reddit_fetch_batch_size: int = 100
+    subreddit_fetch_concurrency: int = 4
+    subreddit_incremental: bool = False
+    subreddit_max_pages: int = 1
+    comment_fetch_concurrency: int = 8
+    comment_refetch_budget: int = 10
+    comment_refetch_min_growth: int = 10
+    more_children_posts_per_cycle: int = 3
+    more_children_batch_size: int = 100
+    more_children_max_batches: int = 5
+    reddit_rate_limit_safety_margin: int = 5
+    ingestion_queue_size: int = 32
+    ingestion_write_batch_size: int = 5000
+    ingestion_flush_seconds: float = 5.0
+    bulk_copy_threshold: int = 5000
+    stream_chunk_size: int = 5000
+    page_size: int = 100
+    max_page_size: int = 1000
+    ml_hourly_sentiments: bool = False
+    llm_token_usage_buffered: bool = False
+    llm_token_usage_flush_seconds: float = 10.0
+    scheduler_enabled: bool = False
+    scheduler_jitter_seconds: float = 30.0
+    scheduler_history_size: int = 100
+    scheduler_ingestion_interval_seconds: int = 900
+    scheduler_prices_interval_seconds: int = 300
+    scheduler_labeling_interval_seconds: int = 3600
+    scheduler_labeling_hours: int = 1
+    scheduler_partitions_interval_seconds: int = 86400
+    partition_months_ahead: int = 3
+    http2_enabled: bool = True
+    http_max_connections_per_host: int = 20
+    http_max_keepalive_connections_per_host: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
 
     @property
     def database_url(self) -> str:
         return f"postgresql+asyncpg://{self.db_user}:{self.db_pass}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def read_database_url(self) -> str | None:
+        if not self.db_read_host:
+            return None
+        return f"postgresql+asyncpg://{self.db_user}:{self.db_pass}@{self.db_read_host}:{self.db_read_port}/{self.db_name}"
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(__file__), f".env.{env}"),
         env_file_encoding="utf-8"
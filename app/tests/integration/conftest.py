@@ -1,7 +1,9 @@
 import os
+import re
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy import text
+from sqlalchemy import Select, text
+from sqlalchemy.dialects import postgresql
 from app.settings.settings import get_settings
 
 dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
@@ -9,23 +11,68 @@ load_dotenv(dotenv_path, override=True)
 print("Loaded environment variables from .env")
 table_names = ["reddit_posts", "reddit_comments", "reddit_tokens",
                "currency_prices", "llm_providers", "reddit_sentiments",
-               "ml_models", "orders", "wallets"]
+               "ml_models", "orders", "wallets", "reddit_subreddit_cursors",
+               "reddit_sentiments_hourly"]
 
 settings = get_settings()
 
 import pytest
 from app.database import get_db_session, sessionmanager
+from app.services.redditRateLimiter import reddit_rate_limiter
+from app.clients import http_clients
+from app.services.redditTokenService import reddit_token_cache
+from app.scheduler import scheduler
+from app.services.llmTokenUsage import llm_token_usage
 @pytest.fixture(autouse=True)
 async def reset_database_session_manager():
     # Ensure engine/sessionmaker are recreated for each test loop
     await sessionmanager.reset()
+    await http_clients.reset()
+    reddit_rate_limiter.reset()
+    reddit_token_cache.reset()
+    await scheduler.reset()
+    await llm_token_usage.reset()
     yield
     await sessionmanager.reset()
+    await http_clients.reset()
+    reddit_rate_limiter.reset()
+    reddit_token_cache.reset()
+    await scheduler.reset()
+    await llm_token_usage.reset()
 
 @pytest.fixture
 async def session():
     async for s in get_db_session():
         yield s
+
+# "Index [Only] Scan [Backward] using <index> on" and "Bitmap Index Scan on <index>"
+PLAN_INDEX_PATTERN = re.compile(r"Index (?:Only )?Scan (?:Backward )?using (\S+) on|Bitmap Index Scan on (\S+)")
+
+@pytest.fixture
+def explain_indexes():
+    """
+    Returns a function that explains a select, compiled as the app issues it, and returns the names
+    of the indexes its plan scans. Indexes of partitions are reported by the name of the partitioned
+    table's index they belong to.
+    """
+    async def explain(session, query: Select) -> set[str]:
+        sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        result = await session.execute(text(f"EXPLAIN {sql}"))
+        plan = "\n".join(row[0] for row in result.all())
+        scanned = {next(name for name in match if name) for match in PLAN_INDEX_PATTERN.findall(plan)}
+        if not scanned:
+            return set()
+        result = await session.execute(text(
+            """
+            SELECT coalesce(parent.relname, child.relname)
+            FROM pg_class child
+            LEFT JOIN pg_inherits ON pg_inherits.inhrelid = child.oid
+            LEFT JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            WHERE child.relname = ANY(:index_names)
+            """
+        ), {"index_names": list(scanned)})
+        return set(result.scalars().all())
+    return explain
         
 
 @pytest.fixture(scope="function", autouse=True)
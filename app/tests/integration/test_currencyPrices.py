@@ -1,8 +1,10 @@
 import pytest
 from app.schemas.currency_prices import CurrencyPricesCreate, CurrencyPrice
 from app.services.currencyPricesService import CurrencyPricesService
+from app.helper.currencyPrices import currency_prices_dataframe_query
 from app.settings.settings import get_settings
 from datetime import datetime
+from sqlalchemy import text
 
 settings = get_settings()
 
@@ -83,4 +85,55 @@ async def test_003_get_currency_prices_by_date_range(session):
         assert len(currency_prices) > 0, "Currency prices list should not be empty"
         
     except Exception as e:
-        assert False, f"Failed to set up date range for test: {str(e)}"
\ No newline at end of file
+        assert False, f"Failed to set up date range for test: {str(e)}"
+
+@pytest.mark.asyncio
+async def test_004_date_range_queries_use_indexes(session, explain_indexes):
+    """
+    Test that the currency_prices date range queries are served by the timestamp indexes.
+    """
+    try:
+        # with sequential scans disabled, the planner only avoids one when no index applies
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        queries = [
+            (currency_prices_dataframe_query(1735689600, 1767225600), "ix_currency_prices_timestamp"),
+            (currency_prices_dataframe_query(1735689600, 1767225600, ["btc"]), "ix_currency_prices_currency_timestamp"),
+        ]
+        for query, index_name in queries:
+            indexes = await explain_indexes(session, query)
+            assert index_name in indexes, f"Expected {index_name}, got: {indexes}"
+        await session.rollback()
+    except Exception as e:
+        assert False, f"Failed to explain the date range queries: {str(e)}"
+
+@pytest.mark.asyncio
+async def test_005_get_currency_prices_dataframe_by_date_range(session):
+    """
+    Test fetching currency prices by date range as a DataFrame.
+    """
+    try:
+        currency_service = CurrencyPricesService(session)
+        await currency_service.create_currency_prices_service(["btc", "eth", "ada"])
+        start_date = int(datetime(2025, 1, 1).timestamp())
+        end_date = int(datetime.now().timestamp()) + 86400
+
+        currency_prices = await currency_service.get_currency_prices_dataframe_by_date_range_service(
+            start_date=start_date,
+            end_date=end_date
+        )
+
+        assert not currency_prices.empty, "Currency prices DataFrame should not be empty"
+        assert list(currency_prices.columns) == list(CurrencyPrice.model_fields), "Columns should match CurrencyPrice"
+        assert currency_prices['price'].dtype == 'float64', "Prices should be floats"
+        assert currency_prices['timestamp'].dtype == 'int64', "Timestamps should be integers"
+        assert currency_prices['timestamp'].is_monotonic_increasing, "Prices should be ordered by timestamp"
+
+        btc_prices = await currency_service.get_currency_prices_dataframe_by_date_range_service(
+            start_date=start_date,
+            end_date=end_date,
+            currencies=["btc"]
+        )
+        assert not btc_prices.empty and set(btc_prices['currency']) == {"btc"}, "Expected only the requested currency"
+
+    except Exception as e:
+        assert False, f"Failed to fetch currency prices as a DataFrame: {str(e)}"
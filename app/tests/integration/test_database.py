@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import text
+from app.database import DatabaseSessionManager, database_engine_kwargs, database_read_engine_kwargs, sessionmanager
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_000():
+    """
+    Test to ensure the test suite is running.
+    """
+    assert True, "Test suite is running correctly."
+
+@pytest.mark.asyncio
+async def test_001_pool_status_counts_checkouts():
+    """
+    Test that the pool gauges follow a checked out connection and the checkout is counted.
+    """
+    try:
+        status = sessionmanager.pool_status()
+        assert status.pool_size == settings.db_pool_size, "Expected the configured pool size."
+        assert status.checked_out == 0, "Expected no checked out connections before the session."
+
+        async with sessionmanager.session() as session:
+            await session.execute(text("SELECT 1"))
+            status = sessionmanager.pool_status()
+            assert status.checked_out == 1, "Expected the session to hold one connection."
+
+        status = sessionmanager.pool_status()
+        assert status.checked_out == 0, "Expected the connection to be back in the pool."
+        assert status.checked_in == 1, "Expected one idle connection in the pool."
+        assert status.checkouts == 1, "Expected one counted checkout."
+        assert status.timeouts == 0, "Expected no checkout timeouts."
+        assert status.wait_seconds_max >= status.wait_seconds_avg >= 0, "Expected consistent wait times."
+    except Exception as e:
+        pytest.fail(f"Failed to read the pool status: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_002_read_session_falls_back_to_primary():
+    """
+    Test that read sessions use the primary when the read database cannot be reached, unless fallback is off.
+    """
+    unreachable_url = settings.database_url.replace(f"@{settings.db_host}:{settings.db_port}/", "@127.0.0.1:1/")
+    manager = DatabaseSessionManager(settings.database_url, database_engine_kwargs(settings),
+                                     read_database_url=unreachable_url, read_fallback_to_primary=True)
+    try:
+        async with manager.read_session() as session:
+            result = await session.execute(text("SELECT 1"))
+            assert result.scalar() == 1, "Expected the read to be served by the primary."
+        assert manager.pool_status().checkouts == 1, "Expected the primary to serve the read."
+    finally:
+        await manager.close()
+
+    manager = DatabaseSessionManager(settings.database_url, database_engine_kwargs(settings),
+                                     read_database_url=unreachable_url, read_fallback_to_primary=False)
+    try:
+        with pytest.raises(Exception):
+            async with manager.read_session() as session:
+                await session.execute(text("SELECT 1"))
+        assert manager.pool_status().checkouts == 0, "Expected no fallback to the primary."
+    finally:
+        await manager.close()
+
+@pytest.mark.asyncio
+async def test_003_unreachable_read_database_is_skipped_for_a_while():
+    """
+    Test that the read engine connects with a short timeout, and that a read database that could not be
+    reached is not tried again until read_retry_seconds have passed.
+    """
+    read_engine_kwargs = database_read_engine_kwargs(settings)
+    assert read_engine_kwargs["connect_args"]["timeout"] == settings.db_read_connect_timeout, \
+        "Expected the connect timeout of the read database."
+    assert "timeout" not in database_engine_kwargs(settings)["connect_args"], \
+        "Expected the primary to keep the default connect timeout."
+
+    unreachable_url = settings.database_url.replace(f"@{settings.db_host}:{settings.db_port}/", "@127.0.0.1:1/")
+    manager = DatabaseSessionManager(settings.database_url, database_engine_kwargs(settings),
+                                     read_database_url=unreachable_url, read_fallback_to_primary=True,
+                                     read_engine_kwargs=read_engine_kwargs, read_retry_seconds=60)
+    try:
+        async with manager.read_session() as session:
+            await session.execute(text("SELECT 1"))
+        read_attempts = []
+        read_sessionmaker = manager._read_sessionmaker
+
+        def counting_read_sessionmaker():
+            read_attempts.append(1)
+            return read_sessionmaker()
+
+        manager._read_sessionmaker = counting_read_sessionmaker
+        async with manager.read_session() as session:
+            result = await session.execute(text("SELECT 1"))
+            assert result.scalar() == 1, "Expected the read to be served by the primary."
+        assert not read_attempts, "Expected the read database to be skipped during the retry interval."
+        assert manager.pool_status().checkouts == 2, "Expected the primary to serve both reads."
+
+        manager._read_unavailable_until = 0.0
+        async with manager.read_session() as session:
+            await session.execute(text("SELECT 1"))
+        assert read_attempts == [1], "Expected the read database to be tried again after the retry interval."
+    finally:
+        await manager.close()
@@ -1,8 +1,14 @@
+import asyncio
 import pytest
 from app.schemas.llm_providers import LLMProvider, LLMProviderCreate
 from app.schemas.reddit_posts import RedditPostCreate
 from app.schemas.reddit_comments import RedditCommentCreate
 from app.services.llmService import LLMService
+from app.services.llmTokenUsage import LLMTokenUsageAccumulator
+import app.services.llmTokenUsage as llm_token_usage_module
+from app.helper.llm import increment_llm_provider_token_usage
+from app.helper.redditComments import get_reddit_posts_comments_by_date_range, get_reddit_posts_comments_page_by_date_range
+from app.database import sessionmanager
 from app.services.cohereService import CohereService
 from app.settings.settings import get_settings
 from app.services.redditCommentsService import RedditCommentsService
@@ -201,3 +207,131 @@ async def test_004_create_reddit_sentiments(session):
 
     except Exception as e:
         pytest.fail(f"Failed to prepare data for Reddit sentiments: {str(e)}")
+
+async def create_test_llm_provider(llm_service: LLMService) -> LLMProvider:
+    provider_file_path = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+        "test_llm",
+        "test_001_provider_data.json"
+    )
+    with open(provider_file_path, 'r') as file:
+        provider_data = json.load(file)
+    provider_data = LLMProviderCreate(**provider_data)
+    return await llm_service.create_llm_provider(provider_data)
+
+@pytest.mark.asyncio
+async def test_005_increment_llm_provider_token_usage_concurrently(session):
+    """
+    Test that concurrent token usage increments are all counted.
+    """
+    llm_provider = await create_test_llm_provider(LLMService(session))
+    initial_tokens = llm_provider.total_used_tokens or 0
+
+    async def increment(tokens: int):
+        async with sessionmanager.session() as increment_session:
+            return await increment_llm_provider_token_usage(increment_session, llm_provider.name,
+                                                            llm_provider.model, tokens)
+
+    updated_providers = await asyncio.gather(*(increment(tokens) for tokens in range(1, 21)))
+    assert max(provider.total_used_tokens for provider in updated_providers) == initial_tokens + 210, \
+        "Expected the last increment to return the full total."
+    result = await session.execute(text("SELECT total_used_tokens FROM llm_providers WHERE name = :name"),
+                                   {"name": llm_provider.name})
+    assert result.scalar() == initial_tokens + 210, "Expected no lost token usage updates."
+
+    with pytest.raises(Exception) as e:
+        await increment_llm_provider_token_usage(session, "missing_provider", llm_provider.model, 1)
+    assert "uN5WlH7I8J" in str(e.value), "Expected an unknown provider error."
+
+@pytest.mark.asyncio
+async def test_006_llm_token_usage_accumulator_flushes(session):
+    """
+    Test that buffered token usage is summed in memory and written on flush.
+    """
+    llm_provider = await create_test_llm_provider(LLMService(session))
+    initial_tokens = llm_provider.total_used_tokens or 0
+
+    accumulator = LLMTokenUsageAccumulator(flush_seconds=3600)
+    try:
+        for tokens in (100, 200, 300):
+            accumulator.add(llm_provider.name, llm_provider.model, tokens)
+        assert accumulator.pending == {(llm_provider.name, llm_provider.model): 600}, "Expected the usage summed in memory."
+
+        flushed = await accumulator.flush()
+        assert flushed == 600, "Expected all pending tokens to be flushed."
+        assert accumulator.pending == {}, "Expected nothing pending after the flush."
+        result = await session.execute(text("SELECT total_used_tokens FROM llm_providers WHERE name = :name"),
+                                       {"name": llm_provider.name})
+        assert result.scalar() == initial_tokens + 600, "Expected the flushed usage in the database."
+
+        accumulator.add("missing_provider", llm_provider.model, 50)
+        await accumulator.stop()
+        assert accumulator.pending == {}, "Expected the usage of an unknown provider to be dropped."
+    finally:
+        await accumulator.reset()
+
+@pytest.mark.asyncio
+async def test_007_reddit_posts_comments_keyset_pages(session):
+    """
+    Test that the keyset pages read by the labeling cover the posts and comments of the range once, in order.
+    """
+    reddit_posts_service = RedditPostsService(session)
+    reddit_comments_service = RedditCommentsService(session)
+    reddit_posts = pd.read_csv(os.path.join(os.path.dirname(__file__), "data", "test_llm", "test_004_reddit_posts.csv"),
+                               keep_default_na=False)
+    reddit_comments = pd.read_csv(os.path.join(os.path.dirname(__file__), "data", "test_llm", "test_004_reddit_comments.csv"),
+                                  keep_default_na=False)
+    await reddit_posts_service.create_reddit_posts_service([RedditPostCreate(**post) for _, post in reddit_posts.iterrows()])
+    await reddit_comments_service.create_reddit_comments_service(
+        [RedditCommentCreate(**comment) for _, comment in reddit_comments.iterrows()])
+    start_date_timestamp = int(reddit_comments['created_utc'].min())
+    end_date_timestamp = int(reddit_comments['created_utc'].max())
+
+    expected = await get_reddit_posts_comments_by_date_range(session, start_date_timestamp, end_date_timestamp)
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = await get_reddit_posts_comments_page_by_date_range(
+            session, start_date_timestamp, end_date_timestamp, cursor, 10
+        )
+        assert len(page) <= 10, "Expected at most 10 rows per page."
+        pages.append(page)
+        if cursor is None:
+            break
+    paged = pd.concat(pages, ignore_index=True)
+    assert list(paged.columns) == list(expected.columns), "Expected the columns of the full read."
+    assert sorted(paged['id_y']) == sorted(expected['id_y']), "Expected the pages to cover every comment exactly once."
+    keys = list(zip(paged['created_utc_y'], paged['id_y']))
+    assert keys == sorted(keys), "Expected the rows in (created_utc, id) order of the comments."
+
+@pytest.mark.asyncio
+async def test_008_llm_token_usage_kept_when_flush_is_cancelled(monkeypatch):
+    """
+    Test that cancelling a flush midway keeps the usage that was not written yet.
+    """
+    written = []
+    blocked = asyncio.Event()
+
+    async def fake_increment(session, name, model, tokens):
+        if name == "slow_provider":
+            blocked.set()
+            await asyncio.Event().wait()
+        written.append((name, tokens))
+
+    monkeypatch.setattr(llm_token_usage_module, "increment_llm_provider_token_usage", fake_increment)
+    accumulator = LLMTokenUsageAccumulator(flush_seconds=3600)
+    try:
+        accumulator.add("fast_provider", "model", 100)
+        accumulator.add("slow_provider", "model", 200)
+        accumulator.add("last_provider", "model", 300)
+        flush = asyncio.create_task(accumulator.flush())
+        await asyncio.wait_for(blocked.wait(), timeout=10)
+        flush.cancel()
+        await asyncio.gather(flush, return_exceptions=True)
+
+        assert written == [("fast_provider", 100)], "Expected only the first provider to be written."
+        assert accumulator.pending == {("slow_provider", "model"): 200, ("last_provider", "model"): 300}, \
+            "Expected the unwritten usage to be kept for the next flush."
+    finally:
+        await accumulator.reset()
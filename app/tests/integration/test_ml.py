@@ -11,9 +11,11 @@ from app.settings.settings import get_settings
 from app.services.redditCommentsService import RedditCommentsService
 from app.services.redditPostsService import RedditPostsService
 from app.helper.currencyPrices import create_currency_prices
-from app.helper.redditSentiments import create_reddit_sentiments
+from app.helper.redditSentiments import create_reddit_sentiments, refresh_reddit_sentiments_hourly_by_date_range
 from app.helper.predictions import get_predictions_by_currency_date
 from app.services.mlService import MlService
+from app.database import sessionmanager
+import asyncio
 import os
 import json
 import pandas as pd
@@ -285,4 +287,107 @@ async def test_004_predict_currencies_sentiment(session):
         assert len(predictions) > 0, "No predictions found for BTC currency."
 
     except Exception as e:
-        raise AssertionError(f"Failed to predict currencies sentiment: {str(e)}")
\ No newline at end of file
+        raise AssertionError(f"Failed to predict currencies sentiment: {str(e)}")
+@pytest.mark.asyncio
+async def test_005_get_reddit_posts_comments_sentiments_by_date_range(session):
+    """
+    Test that the joined posts, comments and sentiments keep the columns of the former pandas merges.
+    """
+    try:
+        await setup_for_ml_service(session, test_number="002")
+        llm_service = LLMService(session)
+        start_date = int(pd.to_datetime("2025-01-01").timestamp())
+        end_date = int(pd.to_datetime("now").timestamp())
+
+        merged_df = await llm_service.get_reddit_posts_comments_sentiments_by_date_range(start_date, end_date)
+
+        expected_columns = ['title', 'post_id', 'subreddit', 'author_x', 'score_x',
+                            'num_comments', 'created_utc_x', 'selftext', 'url', 'last_seen_utc', 'id_x',
+                            'parent_id', 'comment_id', 'author_y', 'body', 'score_y',
+                            'created_utc_y', 'depth', 'id_y', 'crypto_sentiment',
+                            'future_sentiment', 'emotion', 'subjective', 'id']
+        assert list(merged_df.columns) == expected_columns, f"Unexpected columns: {list(merged_df.columns)}"
+        assert not merged_df.empty, "Merged data is empty."
+        assert pd.api.types.is_datetime64_any_dtype(merged_df['created_utc_y']), "created_utc_y is not a datetime."
+        assert merged_df['comment_id'].notna().all(), "Every row should have a comment."
+        assert merged_df['crypto_sentiment'].notna().any(), "Expected sentiments in the merged data."
+
+    except Exception as e:
+        raise AssertionError(f"Failed to join posts, comments and sentiments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_006_reddit_sentiments_hourly(session, monkeypatch):
+    """
+    Test that the hourly sentiment aggregates count the same comments as the per-comment join,
+    stay exact when sentiments are stored again, and feed the ML data preparation.
+    """
+    try:
+        await setup_for_ml_service(session, test_number="002")
+        llm_service = LLMService(session)
+        start_date = int(pd.to_datetime("2025-01-01").timestamp())
+        end_date = int(pd.to_datetime("now").timestamp())
+        merged_df = await llm_service.get_reddit_posts_comments_sentiments_by_date_range(start_date, end_date)
+
+        # the sentiments were stored before their comments, storing them again counts their hours
+        reddit_sentiments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_ml",
+            "test_002_reddit_sentiments.csv"
+        )
+        reddit_sentiments_df = pd.read_csv(reddit_sentiments_file_path, keep_default_na=False)
+        reddit_sentiments_create = [RedditSentimentsCreate(**row) for _, row in reddit_sentiments_df.iterrows()]
+        for _ in range(2):
+            await create_reddit_sentiments(session, reddit_sentiments_create)
+            await session.commit()
+            hourly_df = await llm_service.get_reddit_sentiments_hourly_by_date_range(start_date, end_date)
+            assert hourly_df['comment_count'].sum() == len(merged_df), "Expected every joined comment to be counted once."
+            expected_counts = merged_df.groupby(merged_df['created_utc_y'].dt.floor('h')).size()
+            assert hourly_df.set_index('hour_utc')['comment_count'].to_dict() == expected_counts.to_dict(), \
+                "Expected the hourly counts of the joined comments."
+            positive_count = (merged_df['crypto_sentiment'] == 'positive').sum()
+            assert hourly_df['crypto_sentiment_positive'].sum() == positive_count, "Expected the positive sentiment counts."
+
+        monkeypatch.setattr(settings, "ml_hourly_sentiments", True)
+        ml_service = MlService(session)
+        prepared_data = await ml_service.prepare_sentiment_data(start_date, end_date)
+        expected_columns = ['hour_utc', 'comment_count', 'crypto_sentiment_positive', 'emotion_hope',
+                            'date_and_hour', 'currency', 'price_now', 'future_price',
+                            'hours_since_ath', 'price_diff_percentage']
+        for column in expected_columns:
+            assert column in prepared_data.last_hour_data.columns, f"Column '{column}' is missing from last hour data."
+        assert prepared_data.last_hour_data['date_and_hour'].nunique() == 1, "Expected a single last hour."
+
+    except Exception as e:
+        raise AssertionError(f"Failed to aggregate Reddit sentiments by hour: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_007_reddit_sentiments_hourly_refreshes_are_serialized(session):
+    """
+    Test that a refresh of the hourly aggregates waits for a concurrent refresh of the same hours to commit,
+    and that the counts are exact afterwards.
+    """
+    try:
+        await setup_for_ml_service(session, test_number="002")
+        llm_service = LLMService(session)
+        start_date = int(pd.to_datetime("2025-01-01").timestamp())
+        end_date = int(pd.to_datetime("now").timestamp())
+        merged_df = await llm_service.get_reddit_posts_comments_sentiments_by_date_range(start_date, end_date)
+        first_hour = int(merged_df['created_utc_y'].min().timestamp())
+        last_hour = int(merged_df['created_utc_y'].max().timestamp())
+
+        async with sessionmanager.session() as first_session, sessionmanager.session() as second_session:
+            await refresh_reddit_sentiments_hourly_by_date_range(first_session, first_hour, last_hour)
+            second_refresh = asyncio.create_task(
+                refresh_reddit_sentiments_hourly_by_date_range(second_session, first_hour, last_hour)
+            )
+            done, _ = await asyncio.wait({second_refresh}, timeout=0.5)
+            assert not done, "Expected the second refresh to wait for the locks of the first one."
+            await first_session.commit()
+            await asyncio.wait_for(second_refresh, timeout=10)
+            await second_session.commit()
+
+        hourly_df = await llm_service.get_reddit_sentiments_hourly_by_date_range(start_date, end_date)
+        assert hourly_df['comment_count'].sum() == len(merged_df), "Expected every joined comment to be counted once."
+    except Exception as e:
+        raise AssertionError(f"Failed to serialize the hourly sentiment refreshes: {str(e)}")
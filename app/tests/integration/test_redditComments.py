@@ -1,10 +1,16 @@
 import pytest
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta, datetime, timezone
 from app.schemas.reddit_comments import RedditCommentCreate, RedditComment
 from app.services.redditCommentsService import RedditCommentsService
+from app.services.redditIngestionPipeline import RedditIngestionPipeline
 from app.settings.settings import get_settings
 import os
 import json
+import copy
+import asyncio
+from sqlalchemy import text
+from app.helper.partitions import ensure_monthly_partitions, monthly_partitions
+from app.helper.redditComments import reddit_comments_by_date_range_query
 
 settings = get_settings()
         
@@ -107,4 +113,455 @@ async def test_004_get_reddit_comments_by_date_range_service(session):
         assert len(comments) > 0, "Expected at least one comment within the date range."
     except Exception as e:
         pytest.fail(f"Failed to fetch Reddit comments by date range: {str(e)}")
-    
\ No newline at end of file
+    
+@pytest.mark.asyncio
+async def test_005_harvest_comments_service(session):
+    """
+    Test to fetch comments for several posts concurrently and report the run stats.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    post_ids = ["1ltnw74"]
+    try:
+        comments, stats = await reddit_comments_service.harvest_comments_service(post_ids, "top", concurrency=2)
+        assert isinstance(comments, list), "Expected a list of RedditCommentCreate objects."
+        assert len(comments) > 0, "Expected to fetch comments for the posts."
+        assert stats.posts == len(post_ids), "Expected the stats to count every post."
+        assert stats.requests >= len(post_ids), "Expected at least one request per post."
+        assert stats.requests_per_second > 0, "Expected a positive request rate."
+        assert stats.throttled_seconds >= 0, "Expected a non-negative throttled time."
+    except Exception as e:
+        pytest.fail(f"Failed to harvest comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_006_get_reddit_comment_counts_service(session):
+    """
+    Test to count stored comments for a batch of posts in one query.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    try:
+        comments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditComments",
+            "test_001_comments_data.json"
+        )
+        with open(comments_file_path, 'r') as file:
+            comments_data = json.load(file)
+        reddit_comments = [RedditCommentCreate(**comment) for comment in comments_data]
+        await reddit_comments_service.create_reddit_comments_service(reddit_comments)
+        post_id = reddit_comments[0].post_id
+        expected_count = len([comment for comment in reddit_comments if comment.post_id == post_id])
+        comment_counts = await reddit_comments_service.get_reddit_comment_counts_service([post_id, "no_such_post"])
+        assert comment_counts.get(post_id) == expected_count, "Expected the stored comment count for the post."
+        assert "no_such_post" not in comment_counts, "Expected posts without comments to be left out."
+    except Exception as e:
+        pytest.fail(f"Failed to count Reddit comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_007_expand_more_comments(session):
+    """
+    Test to resolve the "more" placeholders of a large thread with morechildren calls.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    post_id = "1ltnw74"
+    try:
+        comments = await reddit_comments_service.fetch_comments_from_reddit(post_id)
+        _, more_children_ids = reddit_comments_service.parse_comment_tree(post_id, comments)
+        if not more_children_ids:
+            pytest.skip("Post has no truncated comments, skipping test.")
+        more_comments = await reddit_comments_service.expand_more_comments(post_id, more_children_ids)
+        converted_comments = reddit_comments_service.convert_more_comments_to_schema(post_id, more_comments)
+        assert isinstance(converted_comments, list), "Expected a list of converted comments."
+        assert len(converted_comments) > 0, "Expected the placeholders to resolve to comments."
+        assert all(comment.post_id == post_id for comment in converted_comments), "Expected comments of the same post."
+    except Exception as e:
+        pytest.fail(f"Failed to expand more comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_008_create_reddit_comments_service_is_idempotent(session):
+    """
+    Test that saving the same comments twice keeps one row per comment and refreshes the score.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    try:
+        comments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditComments",
+            "test_001_comments_data.json"
+        )
+        with open(comments_file_path, 'r') as file:
+            comments_data = json.load(file)
+        reddit_comments = [RedditCommentCreate(**comment) for comment in comments_data]
+        await reddit_comments_service.create_reddit_comments_service(reddit_comments)
+        rescored_comments = [comment.model_copy(update={"score": comment.score + 100}) for comment in reddit_comments]
+        await reddit_comments_service.create_reddit_comments_service(rescored_comments)
+        post_id = reddit_comments[0].post_id
+        comments = await reddit_comments_service.get_reddit_comments_post_service(post_id)
+        expected_comments = [comment for comment in rescored_comments if comment.post_id == post_id]
+        assert len(comments) == len(expected_comments), "Expected no duplicated comments after re-saving."
+        expected_scores = {comment.comment_id: comment.score for comment in expected_comments}
+        assert all(comment.score == expected_scores[comment.comment_id] for comment in comments), "Expected refreshed scores."
+    except Exception as e:
+        pytest.fail(f"Failed to upsert Reddit comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_009_create_reddit_comments_bulk_copy(session, monkeypatch):
+    """
+    Test that comments loaded through COPY are upserted the same way as with INSERT ... VALUES.
+    """
+    monkeypatch.setattr(settings, "bulk_copy_threshold", 1)
+    reddit_comments_service = RedditCommentsService(session)
+    try:
+        comments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditComments",
+            "test_001_comments_data.json"
+        )
+        with open(comments_file_path, 'r') as file:
+            comments_data = json.load(file)
+        reddit_comments = [RedditCommentCreate(**comment) for comment in comments_data]
+        await reddit_comments_service.create_reddit_comments_service(reddit_comments)
+        rescored_comments = [comment.model_copy(update={"score": comment.score + 100}) for comment in reddit_comments]
+        await reddit_comments_service.create_reddit_comments_service(rescored_comments)
+        post_id = reddit_comments[0].post_id
+        comments = await reddit_comments_service.get_reddit_comments_post_service(post_id)
+        expected_comments = [comment for comment in rescored_comments if comment.post_id == post_id]
+        assert len(comments) == len(expected_comments), "Expected no duplicated comments after re-loading."
+        expected_scores = {comment.comment_id: comment.score for comment in expected_comments}
+        assert all(comment.score == expected_scores[comment.comment_id] for comment in comments), "Expected refreshed scores."
+    except Exception as e:
+        pytest.fail(f"Failed to bulk load Reddit comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_010_date_range_query_uses_index(session, explain_indexes):
+    """
+    Test that the date range query on reddit_comments is served by the created_utc index.
+    """
+    try:
+        # with sequential scans disabled, the planner only avoids one when no index applies
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        indexes = await explain_indexes(session, reddit_comments_by_date_range_query(1735689600, 1767225600))
+        await session.rollback()
+        assert "ix_reddit_comments_created_utc" in indexes, f"Expected the created_utc index, got: {indexes}"
+    except Exception as e:
+        pytest.fail(f"Failed to explain the date range query: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_011_monthly_partitions_prune_date_range(session):
+    """
+    Test that the monthly partitions exist and a one month range only reads its own partition.
+    """
+    try:
+        await ensure_monthly_partitions(session, months_ahead=1)
+        await session.commit()
+        # running it again must not fail on the existing partitions
+        assert await ensure_monthly_partitions(session, months_ahead=1) == [], "Expected no new partitions."
+        this_month, next_month = monthly_partitions("reddit_comments", datetime.now(timezone.utc), 2)
+        result = await session.execute(text(
+            "EXPLAIN SELECT * FROM reddit_comments WHERE created_utc >= :start_date AND created_utc < :end_date"
+        ), {"start_date": this_month[1], "end_date": this_month[2]})
+        plan = "\n".join(row[0] for row in result.all())
+        assert this_month[0] in plan, f"Expected the current month partition in the plan, got: {plan}"
+        assert next_month[0] not in plan, f"Expected the next month partition to be pruned, got: {plan}"
+        assert "reddit_comments_default" not in plan, f"Expected the default partition to be pruned, got: {plan}"
+    except Exception as e:
+        pytest.fail(f"Failed to prune monthly partitions: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_012_stream_reddit_comments_date_range(session):
+    """
+    Test that streaming a date range yields chunks of at most chunk_size comments covering the whole range.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    try:
+        comments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditComments",
+            "test_001_comments_data.json"
+        )
+        with open(comments_file_path, 'r') as file:
+            comments_data = json.load(file)
+        reddit_comments = [RedditCommentCreate(**comment) for comment in comments_data]
+        await reddit_comments_service.create_reddit_comments_service(reddit_comments)
+        start_date = min(comment.created_utc for comment in reddit_comments)
+        end_date = max(comment.created_utc for comment in reddit_comments)
+
+        expected_comments = await reddit_comments_service.get_reddit_comments_date_range_service(start_date, end_date)
+        chunks = [
+            chunk async for chunk in reddit_comments_service.stream_reddit_comments_date_range_service(
+                start_date, end_date, chunk_size=2
+            )
+        ]
+        assert all(0 < len(chunk) <= 2 for chunk in chunks), "Expected chunks of at most 2 comments."
+        streamed_comments = [comment for chunk in chunks for comment in chunk]
+        assert sorted(comment.id for comment in streamed_comments) == sorted(comment.id for comment in expected_comments), \
+            "Expected the chunks to cover the whole date range."
+        created_utcs = [comment.created_utc for comment in streamed_comments]
+        assert created_utcs == sorted(created_utcs), "Expected the comments in created_utc order."
+    except Exception as e:
+        pytest.fail(f"Failed to stream Reddit comments: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_013_get_reddit_comments_post_pages(session):
+    """
+    Test that following next_cursor pages through all comments of a post without overlap.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    try:
+        comments_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditComments",
+            "test_001_comments_data.json"
+        )
+        with open(comments_file_path, 'r') as file:
+            comments_data = json.load(file)
+        reddit_comments = [RedditCommentCreate(**comment) for comment in comments_data]
+        await reddit_comments_service.create_reddit_comments_service(reddit_comments)
+        post_id = reddit_comments[0].post_id
+        expected_comments = await reddit_comments_service.get_reddit_comments_post_service(post_id)
+
+        paged_comments = []
+        cursor = None
+        while True:
+            page = await reddit_comments_service.get_reddit_comments_post_page_service(post_id, cursor, limit=2)
+            assert len(page.items) <= 2, "Expected at most 2 comments per page."
+            paged_comments.extend(page.items)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        assert sorted(comment.id for comment in paged_comments) == sorted(comment.id for comment in expected_comments), \
+            "Expected the pages to cover every comment of the post exactly once."
+        keys = [(comment.created_utc, comment.id) for comment in paged_comments]
+        assert keys == sorted(keys), "Expected the comments in (created_utc, id) order."
+    except Exception as e:
+        pytest.fail(f"Failed to page through Reddit comments: {str(e)}")
+
+    with pytest.raises(Exception) as e:
+        await reddit_comments_service.get_reddit_comments_post_page_service(post_id, "not a cursor")
+    assert "Kc7wNq2BzR" in str(e.value), "Expected an invalid cursor error."
+
+def load_comments_listing():
+    """
+    Loads the fixed comments listing and returns the post id and its top-level comments,
+    shaped like the output of fetch_comments_from_reddit.
+    """
+    listing_file_path = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+        "test_redditComments",
+        "test_014_comments_listing.json"
+    )
+    with open(listing_file_path, 'r') as file:
+        listing = json.load(file)
+    post_id = listing[0]['data']['children'][0]['data']['id']
+    comments = [{**comment['data'], 'kind': comment.get('kind')} for comment in listing[1]['data']['children']]
+    return post_id, comments
+
+@pytest.mark.asyncio
+async def test_014_flatten_comment_tree(session, monkeypatch):
+    """
+    Test that flattening a fixed listing keeps the listing order, stops at the depth limit,
+    collects the "more" ids and leaves the raw dicts untouched.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    post_id, comments = load_comments_listing()
+    raw_comments = copy.deepcopy(comments)
+
+    monkeypatch.setattr(settings, "comment_depth", 2)
+    rows, more_children_ids = reddit_comments_service.flatten_comment_tree(post_id, comments)
+    assert [row['comment_id'] for row in rows] == ["n2c0001", "n2c0002", "n2c0003", "n2c0006", "n2c0007", "n2c0009"], \
+        "Expected the comments depth-first in listing order, without replies below the depth limit or bodiless comments."
+    assert more_children_ids == ["n2x0001", "n2x0002", "n2y0001", "n2y0002", "n2y0003"], \
+        "Expected the ids of every reachable 'more' placeholder in listing order."
+    assert all(row['post_id'] == post_id for row in rows), "Expected every row to carry the post id."
+    assert set(rows[0].keys()) == set(RedditCommentCreate.model_fields.keys()), \
+        "Expected only the fields of RedditCommentCreate to be copied out."
+    assert comments == raw_comments, "Expected the raw comment dicts to be left unmutated."
+
+    monkeypatch.setattr(settings, "comment_depth", 3)
+    rows, _ = reddit_comments_service.flatten_comment_tree(post_id, comments)
+    assert [row['comment_id'] for row in rows][:4] == ["n2c0001", "n2c0002", "n2c0003", "n2c0004"], \
+        "Expected one more level of replies with a deeper limit."
+    assert "n2c0005" not in {row['comment_id'] for row in rows}, "Expected replies below the depth limit to be skipped."
+
+@pytest.mark.asyncio
+async def test_015_validate_comment_rows_drops_invalid_rows(session, monkeypatch):
+    """
+    Test that rows failing validation are dropped by their error location and the valid rows kept in order.
+    """
+    reddit_comments_service = RedditCommentsService(session)
+    post_id, comments = load_comments_listing()
+    monkeypatch.setattr(settings, "comment_depth", 2)
+    rows, _ = reddit_comments_service.flatten_comment_tree(post_id, comments)
+
+    reddit_comments = reddit_comments_service.validate_comment_rows(rows)
+    # n2c0006 has a non-numeric score and n2c0007 no author
+    assert [comment.comment_id for comment in reddit_comments] == ["n2c0001", "n2c0002", "n2c0003", "n2c0009"], \
+        "Expected the invalid rows to be dropped and the valid ones kept in order."
+    assert all(isinstance(comment, RedditCommentCreate) for comment in reddit_comments), \
+        "Expected RedditCommentCreate instances."
+    assert reddit_comments_service.validate_comment_rows([]) == [], "Expected no comments for no rows."
+
+    reddit_comments, more_children_ids = reddit_comments_service.parse_comment_tree(post_id, comments)
+    assert [comment.comment_id for comment in reddit_comments] == ["n2c0001", "n2c0002", "n2c0003", "n2c0009"], \
+        "Expected parse_comment_tree to flatten and validate in one pass."
+    assert len(more_children_ids) == 5, "Expected parse_comment_tree to return the 'more' ids."
+
+
+class FakeRedditTokenService(object):
+    async def get_reddit_token(self):
+        return "fake-token"
+
+class FakeRedditCommentsService(RedditCommentsService):
+    """
+    Serves generated comment trees instead of calling Reddit and records the written batches.
+    The real parser is kept so the pipeline runs its normal parse stage.
+    """
+    def __init__(self, comments_per_post: int = 3, more_children_ids: list[str] = None,
+                 fetch_delays: dict[str, float] = None, failing_batches: set[int] = None):
+        super().__init__(None)
+        self.redditTokenService = FakeRedditTokenService()
+        self.comments_per_post = comments_per_post
+        self.more_children_ids = more_children_ids or []
+        self.fetch_delays = fetch_delays or {}
+        self.failing_batches = failing_batches or set()
+        self.more_children_calls: list[list[str]] = []
+        self.write_calls = 0
+        self.written_batches: list[list[RedditCommentCreate]] = []
+
+    def make_comment(self, post_id: str, comment_id: str, parent_id: str, depth: int = 0):
+        return {
+            "kind": "t1", "id": comment_id, "parent_id": parent_id, "author": "user_a",
+            "body": f"Comment {comment_id}", "score": 1, "created_utc": 1752160000, "depth": depth, "replies": ""
+        }
+
+    async def fetch_comments_from_reddit(self, post_id: str, sort: str = "top", access_token: str = None, stats=None):
+        await asyncio.sleep(self.fetch_delays.get(post_id, 0))
+        comments = [self.make_comment(post_id, f"{post_id}_{i}", f"t3_{post_id}") for i in range(self.comments_per_post)]
+        if self.more_children_ids:
+            comments.append({"kind": "more", "id": f"{post_id}_more", "parent_id": f"t3_{post_id}", "depth": 0,
+                             "children": list(self.more_children_ids)})
+        return comments
+
+    async def fetch_more_children_from_reddit(self, post_id: str, children_ids: list[str], sort: str = "top",
+                                              access_token: str = None, stats=None):
+        self.more_children_calls.append(list(children_ids))
+        return [self.make_comment(post_id, children_id, f"t1_{post_id}_0", depth=1) for children_id in children_ids]
+
+    async def create_reddit_comments_service(self, reddit_comments: list[RedditCommentCreate]):
+        self.write_calls += 1
+        if self.write_calls in self.failing_batches:
+            raise Exception("Simulated write failure")
+        self.written_batches.append(list(reddit_comments))
+        return reddit_comments
+
+@pytest.mark.asyncio
+async def test_016_ingestion_pipeline_batches_writes():
+    """
+    Test that the writer groups the comments of several posts into batches of at least write_batch_size.
+    """
+    service = FakeRedditCommentsService(comments_per_post=3)
+    pipeline = RedditIngestionPipeline(service, fetchers=2, write_batch_size=5, flush_seconds=60)
+    post_ids = ["p1", "p2", "p3", "p4"]
+    all_comments, stats = await pipeline.run(post_ids)
+
+    assert len(all_comments) == 12, "Expected every comment of every post."
+    assert stats.comments == 12 and stats.posts == 4, "Expected the stats to count the posts and comments."
+    assert stats.write_batches == len(service.written_batches) == 2, "Expected the comments of several posts per batch."
+    assert all(len(batch) >= 5 for batch in service.written_batches), "Expected full batches."
+    written_ids = sorted(comment.comment_id for batch in service.written_batches for comment in batch)
+    assert written_ids == sorted(comment.comment_id for comment in all_comments), "Expected every comment to be written once."
+
+@pytest.mark.asyncio
+async def test_017_ingestion_pipeline_flushes_on_timeout():
+    """
+    Test that a partial batch is written once the flush interval passes, before the slow posts arrive.
+    """
+    service = FakeRedditCommentsService(comments_per_post=2, fetch_delays={"slow": 0.5})
+    pipeline = RedditIngestionPipeline(service, fetchers=2, write_batch_size=1000, flush_seconds=0.1)
+    all_comments, stats = await pipeline.run(["fast", "slow"])
+
+    assert len(all_comments) == 4, "Expected the comments of both posts."
+    assert stats.write_batches == 2, "Expected a timed flush and a final flush."
+    assert {comment.post_id for comment in service.written_batches[0]} == {"fast"}, \
+        "Expected the first batch to be flushed before the slow post was fetched."
+    assert {comment.post_id for comment in service.written_batches[1]} == {"slow"}, \
+        "Expected the slow post in the final flush."
+
+@pytest.mark.asyncio
+async def test_018_ingestion_pipeline_expands_more_children(monkeypatch):
+    """
+    Test that the "more" ids of the posts to expand are fed back to the fetchers in capped morechildren batches.
+    """
+    monkeypatch.setattr(settings, "more_children_batch_size", 2)
+    monkeypatch.setattr(settings, "more_children_max_batches", 2)
+    service = FakeRedditCommentsService(comments_per_post=1, more_children_ids=["x1", "x2", "x3", "x4", "x5"])
+    pipeline = RedditIngestionPipeline(service, fetchers=2, expand_more_post_ids={"p1"},
+                                       write_batch_size=1000, flush_seconds=60)
+    all_comments, stats = await pipeline.run(["p1", "p2"])
+
+    assert sorted(service.more_children_calls) == [["x1", "x2"], ["x3", "x4"]], \
+        "Expected the more ids in batches of more_children_batch_size, at most more_children_max_batches of them."
+    comment_ids = {comment.comment_id for comment in all_comments}
+    assert {"x1", "x2", "x3", "x4"} <= comment_ids and "x5" not in comment_ids, \
+        "Expected the resolved comments to be written with the post's comments."
+    assert {"p1_0", "p2_0"} <= comment_ids, "Expected the top-level comments of both posts."
+    assert stats.requests == 0, "Expected no real Reddit requests."
+
+@pytest.mark.asyncio
+async def test_019_ingestion_pipeline_survives_failed_write():
+    """
+    Test that a failed batch is counted and dropped while the harvest keeps draining.
+    """
+    service = FakeRedditCommentsService(comments_per_post=3, failing_batches={1})
+    pipeline = RedditIngestionPipeline(service, fetchers=1, write_batch_size=3, flush_seconds=60)
+    try:
+        all_comments, stats = await pipeline.run(["p1", "p2", "p3"])
+    except Exception as e:
+        pytest.fail(f"Expected a failed write not to abort the harvest: {str(e)}")
+
+    assert stats.failed_write_batches == 1, "Expected the failed batch to be counted."
+    assert stats.write_batches == 2, "Expected the remaining batches to be written."
+    written_ids = sorted(comment.comment_id for batch in service.written_batches for comment in batch)
+    assert sorted(comment.comment_id for comment in all_comments) == written_ids, \
+        "Expected only the written comments to be returned."
+    assert stats.comments == 6, "Expected the comments of the failed batch to be left out."
+
+@pytest.mark.asyncio
+async def test_020_monthly_partitions_move_rows_from_default(session):
+    """
+    Test that a missing month whose rows already landed in the default partition is still created,
+    with its rows moved out of the default partition.
+    """
+    try:
+        reddit_comments_service = RedditCommentsService(session)
+        # a month beyond the partitions kept ahead, as if the maintenance had been down for a long time
+        later = datetime.now(timezone.utc) + timedelta(days=24 * 31)
+        partition_name, lower_bound, _ = monthly_partitions("reddit_comments", later, 1)[0]
+        await session.execute(text(f"DROP TABLE IF EXISTS {partition_name}"))
+        await session.commit()
+        comment = RedditCommentCreate(post_id="t3_later", parent_id="t3_later", comment_id="t1_later",
+                                      author="test_user", body="Stored before its partition existed.",
+                                      score=1, created_utc=lower_bound + 3600, depth=0)
+        await reddit_comments_service.create_reddit_comments_service([comment])
+        result = await session.execute(text("SELECT count(*) FROM reddit_comments_default WHERE comment_id = 't1_later'"))
+        assert result.scalar() == 1, "Expected the comment in the default partition."
+
+        created_partitions = await ensure_monthly_partitions(session, months_ahead=0, now=later)
+        await session.commit()
+        assert partition_name in created_partitions, f"Expected {partition_name} to be created, got: {created_partitions}"
+        result = await session.execute(text(f"SELECT count(*) FROM {partition_name} WHERE comment_id = 't1_later'"))
+        assert result.scalar() == 1, "Expected the comment to be moved into its partition."
+        result = await session.execute(text("SELECT count(*) FROM reddit_comments_default WHERE comment_id = 't1_later'"))
+        assert result.scalar() == 0, "Expected the comment to be gone from the default partition."
+        result = await session.execute(text(
+            "SELECT count(*) FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE child.relname = 'reddit_comments_default'"
+        ))
+        assert result.scalar() == 1, "Expected the default partition to be attached again."
+    except Exception as e:
+        pytest.fail(f"Failed to move rows out of the default partition: {str(e)}")
@@ -4,6 +4,10 @@ import os
 import pytest
 from app.schemas.reddit_posts import RedditPost, RedditPostCreate
 from app.services.redditPostsService import RedditPostsService
+from app.helper.redditSubredditCursors import get_subreddit_cursors, upsert_subreddit_cursors
+from app.schemas.reddit_subreddit_cursors import RedditSubredditCursorCreate
+from app.helper.redditPosts import upsert_reddit_posts, get_reddit_posts_by_post_ids
+from app.helper.redditPosts import get_comments_fetched_num_comments, set_comments_fetched_num_comments
 from app.settings.settings import get_settings
 
 settings = get_settings()
@@ -117,4 +121,296 @@ async def test_005_get_reddit_posts_by_date_range_service(session):
         assert all(isinstance(post, RedditPost) for post in posts), "Expected all posts to be RedditPost objects."
         assert len(posts) > 0, "Expected at least one post within the date range."
     except Exception as e:
-        pytest.fail(f"Failed to fetch Reddit posts by date range: {str(e)}")
\ No newline at end of file
+        pytest.fail(f"Failed to fetch Reddit posts by date range: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_006_get_posts_from_subreddits_service_concurrently(session):
+    """
+    Test fetching posts from multiple subreddits in parallel.
+    """
+    try:
+        reddit_service = RedditPostsService(session)
+        result = await reddit_service.get_posts_from_subreddits_service(
+            subreddits=settings.subreddits,
+            posts_per_subreddit=settings.posts_per_subreddit,
+            subreddit_sort=settings.subreddit_sort,
+            concurrency=4)
+        assert isinstance(result, list), "Result should be a list of RedditPostCreate objects"
+        assert len(result) > 0, "Expected to fetch posts from subreddits"
+        post_ids = [post.post_id for post in result]
+        assert len(post_ids) == len(set(post_ids)), "Expected no duplicate posts in the result"
+    except Exception as e:
+        assert False, f"Failed to fetch posts from subreddits concurrently: {str(e)}"
+
+@pytest.mark.asyncio
+async def test_007_get_posts_from_subreddits_service_incremental(session):
+    """
+    Test that incremental fetching stores a cursor per subreddit and skips already-seen posts.
+    """
+    try:
+        subreddits = settings.subreddits[:2]
+        reddit_service = RedditPostsService(session)
+        first_result = await reddit_service.get_posts_from_subreddits_service(
+            subreddits=subreddits,
+            posts_per_subreddit=5,
+            subreddit_sort="new",
+            incremental=True,
+            max_pages=2)
+        assert len(first_result) > 0, "Expected to fetch posts on the first incremental run"
+        cursors = await get_subreddit_cursors(session, subreddits, "new")
+        assert set(cursors.keys()) == set(subreddits), "Expected a cursor for every subreddit"
+        second_result = await reddit_service.get_posts_from_subreddits_service(
+            subreddits=subreddits,
+            posts_per_subreddit=5,
+            subreddit_sort="new",
+            incremental=True,
+            max_pages=2)
+        first_post_ids = {post.post_id for post in first_result}
+        assert not any(post.post_id in first_post_ids for post in second_result), "Expected already-seen posts to be skipped"
+    except Exception as e:
+        assert False, f"Failed to fetch posts incrementally: {str(e)}"
+
+@pytest.mark.asyncio
+async def test_008_upsert_reddit_posts_refreshes_scores(session):
+    """
+    Test that re-saving seen posts refreshes their score and comment count.
+    """
+    try:
+        posts_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditPosts",
+            "test_005_posts_data.json"
+        )
+        with open(posts_file_path, 'r') as file:
+            posts_data = json.load(file)
+        reddit_posts = [RedditPostCreate(**post) for post in posts_data]
+        await upsert_reddit_posts(session, reddit_posts)
+        await session.commit()
+        refreshed_posts = [post.model_copy(update={"score": post.score + 10, "num_comments": post.num_comments + 5})
+                           for post in reddit_posts]
+        await upsert_reddit_posts(session, refreshed_posts)
+        await session.commit()
+        stored_posts = await get_reddit_posts_by_post_ids(session, [post.post_id for post in reddit_posts])
+        expected = {post.post_id: post for post in refreshed_posts}
+        assert len(stored_posts) == len(expected), "Expected one row per post."
+        for post in stored_posts:
+            assert post.score == expected[post.post_id].score, "Expected the score to be refreshed."
+            assert post.num_comments == expected[post.post_id].num_comments, "Expected the comment count to be refreshed."
+            assert post.last_seen_utc is not None, "Expected last_seen_utc to be recorded."
+    except Exception as e:
+        pytest.fail(f"Failed to refresh Reddit posts: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_009_get_reddit_posts_page_by_date_range_service(session):
+    """
+    Test that following next_cursor pages through all posts of a date range without overlap.
+    """
+    reddit_posts_service = RedditPostsService(session)
+    posts_file_path = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+        "test_redditPosts",
+        "test_005_posts_data.json"
+    )
+    with open(posts_file_path, 'r') as file:
+        posts_data = json.load(file)
+    reddit_posts = [RedditPostCreate(**post) for post in posts_data]
+    await upsert_reddit_posts(session, reddit_posts)
+    await session.commit()
+    start_date_timestamp = min(post.created_utc for post in reddit_posts)
+    end_date_timestamp = max(post.created_utc for post in reddit_posts)
+
+    paged_posts = []
+    cursor = None
+    while True:
+        page = await reddit_posts_service.get_reddit_posts_page_by_date_range_service(
+            start_date_timestamp, end_date_timestamp, cursor, limit=2
+        )
+        assert len(page.items) <= 2, "Expected at most 2 posts per page."
+        paged_posts.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert sorted(post.post_id for post in paged_posts) == sorted({post.post_id for post in reddit_posts}), \
+        "Expected the pages to cover every post of the date range exactly once."
+    keys = [(post.created_utc, post.id) for post in paged_posts]
+    assert keys == sorted(keys), "Expected the posts in (created_utc, id) order."
+
+@pytest.mark.asyncio
+async def test_010_incremental_falls_back_to_full_fetch_for_other_sorts(session, monkeypatch):
+    """
+    Test that incremental mode is ignored for sorts other than "new": the listing is fetched in full and no cursor is stored.
+    """
+    posts_file_path = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+        "test_redditPosts",
+        "test_005_posts_data.json"
+    )
+    with open(posts_file_path, 'r') as file:
+        posts_data = json.load(file)
+    subreddit = posts_data[0]["subreddit"]
+    listing_calls = []
+
+    async def fake_listing_page(subreddit, limit, subreddit_sort, access_token=None, after=None):
+        listing_calls.append((subreddit_sort, after))
+        # the listing returns Reddit's raw posts, keyed by id
+        posts = [{**{key: value for key, value in post.items() if key not in ("id", "post_id")}, "id": post["post_id"]}
+                 for post in posts_data]
+        return posts[:limit], "t3_next"
+
+    async def fail_incremental_fetch(*args, **kwargs):
+        raise AssertionError("Incremental fetch must not be used for the hot sort")
+
+    reddit_service = RedditPostsService(session)
+    monkeypatch.setattr(reddit_service, "get_reddit_listing_page", fake_listing_page)
+    monkeypatch.setattr(reddit_service, "get_new_reddit_posts_from_subreddit", fail_incremental_fetch)
+    try:
+        result = await reddit_service.get_posts_from_subreddits_service(
+            subreddits=[subreddit],
+            posts_per_subreddit=len(posts_data),
+            subreddit_sort="hot",
+            concurrency=1,
+            incremental=True,
+            max_pages=3)
+        assert listing_calls == [("hot", None)], "Expected a single full listing request without paging"
+        assert sorted(post.post_id for post in result) == sorted(post["post_id"] for post in posts_data), \
+            "Expected every post of the listing to be returned"
+        cursors = await get_subreddit_cursors(session, [subreddit], "hot")
+        assert cursors == {}, "Expected no cursor to be stored for the hot sort"
+    except Exception as e:
+        pytest.fail(f"Failed to fall back to the full fetch: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_011_plan_comment_refetches(session, monkeypatch):
+    """
+    Test that only posts with stored comments growing by at least min_growth are planned,
+    fastest-growing first and capped by the budget.
+    """
+    reddit_service = RedditPostsService(session)
+    posts_file_path = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+        "test_redditPosts",
+        "test_005_posts_data.json"
+    )
+    with open(posts_file_path, 'r') as file:
+        posts_data = json.load(file)
+    # live comment counts against the stored ones: growth of 5, 40, 10, 2 and a post with no stored comments
+    growths = {"a": 5, "b": 40, "c": 10, "d": 2}
+    reddit_posts = [RedditPostCreate(**{**posts_data[0], "post_id": post_id, "num_comments": 100 + growth})
+                    for post_id, growth in growths.items()]
+    reddit_posts.append(RedditPostCreate(**{**posts_data[0], "post_id": "e", "num_comments": 500}))
+    comment_counts = {"a": 100, "b": 100, "c": 100, "d": 100}
+
+    assert reddit_service.plan_comment_refetches(reddit_posts, comment_counts, budget=10, min_growth=5) == ["b", "c", "a"], \
+        "Expected the posts growing by at least min_growth, fastest-growing first."
+    assert reddit_service.plan_comment_refetches(reddit_posts, comment_counts, budget=2, min_growth=1) == ["b", "c"], \
+        "Expected at most budget posts."
+    assert reddit_service.plan_comment_refetches(reddit_posts, comment_counts, budget=10, min_growth=50) == [], \
+        "Expected no posts below the growth threshold."
+    assert "e" not in reddit_service.plan_comment_refetches(reddit_posts, comment_counts, budget=10, min_growth=0), \
+        "Expected posts without stored comments to be skipped."
+    assert reddit_service.plan_comment_refetches(reddit_posts, comment_counts, budget=0, min_growth=0) == [], \
+        "Expected no posts with an empty budget."
+
+    monkeypatch.setattr(settings, "comment_refetch_budget", 1)
+    monkeypatch.setattr(settings, "comment_refetch_min_growth", 3)
+    assert reddit_service.plan_comment_refetches(reddit_posts, comment_counts) == ["b"], \
+        "Expected the budget and threshold to default to the settings."
+
+    # large threads: the stored comments are capped far below num_comments
+    large_posts = [RedditPostCreate(**{**posts_data[0], "post_id": post_id, "num_comments": 5000}) for post_id in ("f", "g")]
+    large_counts = {"f": 500, "g": 500}
+    assert reddit_service.plan_comment_refetches(large_posts, large_counts, {"f": 5000, "g": 4900},
+                                                 budget=10, min_growth=5) == ["g"], \
+        "Expected the growth since the last fetch, not against the capped comment count."
+    assert reddit_service.plan_comment_refetches(large_posts, large_counts, budget=10, min_growth=5) == ["f", "g"], \
+        "Expected the stored comment count as the base when the last fetch was not recorded."
+
+@pytest.mark.asyncio
+async def test_012_incremental_backfills_when_page_cap_is_hit(session, monkeypatch):
+    """
+    Test that hitting max_pages before the already-seen posts keeps the cursor and resumes below the
+    last fetched page on the next run, so no post between the pages and the cursor is skipped.
+    """
+    subreddit = "CryptoCurrency"
+    # the "new" listing, newest first, in pages of 2; p5 and p6 were seen by an earlier run
+    listing = [
+        {"id": f"p{number}", "name": f"t3_p{number}", "title": f"Post {number}", "subreddit": subreddit,
+         "author": "user_a", "score": 1, "num_comments": 0, "created_utc": 1752160000 - number * 60,
+         "selftext": "", "url": f"https://www.reddit.com/r/{subreddit}/p{number}"}
+        for number in range(1, 7)
+    ]
+    listing_calls = []
+
+    async def fake_listing_page(subreddit, limit, subreddit_sort, access_token=None, after=None):
+        listing_calls.append(after)
+        start = 0 if after is None else next(i for i, post in enumerate(listing) if post["name"] == after) + 1
+        page = [dict(post) for post in listing[start:start + limit]]
+        next_after = page[-1]["name"] if start + limit < len(listing) else None
+        return page, next_after
+
+    async def fake_token():
+        return "fake-token"
+
+    reddit_service = RedditPostsService(session)
+    monkeypatch.setattr(reddit_service, "get_reddit_listing_page", fake_listing_page)
+    monkeypatch.setattr(reddit_service.redditTokenService, "get_reddit_token", fake_token)
+    try:
+        await upsert_subreddit_cursors(session, [RedditSubredditCursorCreate(
+            subreddit=subreddit, sort="new", last_fullname="t3_p5",
+            last_created_utc=listing[4]["created_utc"], updated_utc=0
+        )])
+        await session.commit()
+
+        fetched_post_ids = []
+        for _ in range(4):
+            posts = await reddit_service.get_posts_from_subreddits_service(
+                subreddits=[subreddit], posts_per_subreddit=2, subreddit_sort="new",
+                concurrency=1, incremental=True, max_pages=1)
+            fetched_post_ids.extend(post.post_id for post in posts)
+            if len(listing_calls) == 1:
+                cursor = (await get_subreddit_cursors(session, [subreddit], "new"))[subreddit]
+                assert cursor.last_fullname == "t3_p5", "Expected the cursor to stay while the gap is open."
+                assert cursor.pending_fullname == "t3_p1" and cursor.backfill_after == "t3_p2", \
+                    "Expected the newest post and the resume position to be remembered."
+
+        assert listing_calls == [None, "t3_p2", "t3_p4", None], "Expected the runs to resume below the last fetched page."
+        assert fetched_post_ids == ["p1", "p2", "p3", "p4"], "Expected every post above the old cursor exactly once."
+        cursor = (await get_subreddit_cursors(session, [subreddit], "new"))[subreddit]
+        assert cursor.last_fullname == "t3_p1", "Expected the cursor to move to the newest post once caught up."
+        assert cursor.backfill_after is None and cursor.pending_fullname is None, "Expected the backfill to be cleared."
+    except Exception as e:
+        pytest.fail(f"Failed to backfill the incremental listing: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_013_comments_fetched_num_comments(session):
+    """
+    Test that the num_comments recorded at the last comment fetch survives later upserts of the posts.
+    """
+    try:
+        posts_file_path = os.path.join(
+            os.path.dirname(__file__),
+            "data",
+            "test_redditPosts",
+            "test_005_posts_data.json"
+        )
+        with open(posts_file_path, 'r') as file:
+            posts_data = json.load(file)
+        reddit_posts = [RedditPostCreate(**post) for post in posts_data]
+        post_ids = [post.post_id for post in reddit_posts]
+        await upsert_reddit_posts(session, reddit_posts)
+        await session.commit()
+        assert await get_comments_fetched_num_comments(session, post_ids) == {}, "Expected no recorded fetch yet."
+
+        first_post = reddit_posts[0]
+        await set_comments_fetched_num_comments(session, {first_post.post_id: first_post.num_comments})
+        await session.commit()
+        await upsert_reddit_posts(session, [first_post.model_copy(update={"num_comments": first_post.num_comments + 50})])
+        await session.commit()
+        assert await get_comments_fetched_num_comments(session, post_ids) == {first_post.post_id: first_post.num_comments}, \
+            "Expected the recorded num_comments to be kept when the post is refreshed."
+    except Exception as e:
+        pytest.fail(f"Failed to record the comment fetches: {str(e)}")
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from app.services.redditTokenService import RedditTokenService
+from app.services.redditTokenService import RedditTokenService, reddit_token_cache
 from app.settings.settings import get_settings
 
 settings = get_settings()
@@ -19,4 +20,19 @@ async def test_001_get_reddit_token(session):
         token = await reddit_token_service.get_reddit_token()
         assert isinstance(token, str), "Expected a string token."
     except Exception as e:
-        pytest.fail(f"Failed to get Reddit token: {str(e)}")
\ No newline at end of file
+        pytest.fail(f"Failed to get Reddit token: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_002_get_reddit_token_cached(session):
+    """
+    Test that concurrent callers share one refresh and later calls are served from the cache.
+    """
+    try:
+        reddit_token_service = RedditTokenService(session)
+        tokens = await asyncio.gather(*(reddit_token_service.get_reddit_token() for _ in range(5)))
+        assert len(set(tokens)) == 1, "Expected all concurrent callers to receive the same token."
+        assert reddit_token_cache.access_token == tokens[0], "Expected the token to be cached in memory."
+        cached_token = await reddit_token_service.get_reddit_token()
+        assert cached_token == tokens[0], "Expected the cached token to be returned."
+    except Exception as e:
+        pytest.fail(f"Failed to get cached Reddit token: {str(e)}")
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from app.database import sessionmanager
+from app.scheduler import JobScheduler, scheduler
+from app.helper.jobLocks import job_lock_name
+from app.settings.settings import get_settings
+
+settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_000():
+    """
+    Test to ensure the test suite is running.
+    """
+    assert True, "Test suite is running correctly."
+
+@pytest.mark.asyncio
+async def test_001_scheduler_jobs_registered():
+    try:
+        job_names = [job.name for job in scheduler.get_jobs()]
+        assert job_names == ["reddit_ingestion", "currency_prices", "reddit_sentiments_labeling",
+                             "partition_maintenance"], \
+            f"Unexpected scheduled jobs: {job_names}"
+    except Exception as e:
+        pytest.fail(f"Failed to list scheduled jobs: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_002_scheduler_runs_jobs_on_interval():
+    """
+    Test that the job loops run the jobs repeatedly and record the runs.
+    """
+    try:
+        job_scheduler = JobScheduler(history_size=10, use_advisory_locks=False)
+        calls = []
+
+        async def job():
+            calls.append(1)
+            return "done"
+
+        async def failing_job():
+            raise RuntimeError("boom")
+
+        job_scheduler.add_job("job", job, interval_seconds=0.05, run_on_start=True)
+        job_scheduler.add_job("failing_job", failing_job, interval_seconds=0.05, run_on_start=True)
+        job_scheduler.start()
+        await asyncio.sleep(0.2)
+        await job_scheduler.stop()
+        assert len(calls) >= 2, "Expected the job to run more than once."
+        history = job_scheduler.get_history("job")
+        assert all(run.status == "success" and run.result == "done" for run in history), "Expected successful runs."
+        failed_runs = job_scheduler.get_history("failing_job")
+        assert failed_runs and all(run.status == "failed" and run.error == "boom" for run in failed_runs), \
+            "Expected failed runs to be recorded with their error."
+        assert len(job_scheduler.get_history(limit=3)) == 3, "Expected the history to respect the limit."
+    except Exception as e:
+        pytest.fail(f"Failed to run scheduled jobs: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_003_scheduler_skips_overlapping_runs():
+    try:
+        job_scheduler = JobScheduler(use_advisory_locks=False)
+        release = asyncio.Event()
+
+        async def slow_job():
+            await release.wait()
+
+        job_scheduler.add_job("slow_job", slow_job, interval_seconds=3600)
+        first_run = asyncio.create_task(job_scheduler.run_job("slow_job"))
+        await asyncio.sleep(0)
+        second_run = await job_scheduler.run_job("slow_job")
+        assert second_run.status == "skipped", "Expected the overlapping run to be skipped."
+        release.set()
+        assert (await first_run).status == "success", "Expected the first run to succeed."
+        assert job_scheduler.get_jobs()[0].last_run.status == "success", "Expected the last run to be tracked."
+    except Exception as e:
+        pytest.fail(f"Failed to skip overlapping runs: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_004_advisory_lock_is_single_flight():
+    """
+    Test that the advisory lock is exclusive across connections and released on exit.
+    """
+    try:
+        async with sessionmanager.advisory_lock("test:single_flight") as acquired:
+            assert acquired, "Expected the first caller to acquire the lock."
+            async with sessionmanager.advisory_lock("test:single_flight") as acquired_again:
+                assert not acquired_again, "Expected the lock to be held by the first caller."
+        async with sessionmanager.advisory_lock("test:single_flight") as acquired:
+            assert acquired, "Expected the lock to be released on exit."
+    except Exception as e:
+        pytest.fail(f"Failed to use the advisory lock: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_005_scheduler_skips_job_locked_by_another_worker():
+    try:
+        job_scheduler = JobScheduler()
+        calls = []
+
+        async def job():
+            calls.append(1)
+
+        job_scheduler.add_job("locked_job", job, interval_seconds=3600)
+        async with sessionmanager.advisory_lock(job_lock_name("locked_job")) as acquired:
+            assert acquired, "Expected to acquire the job lock."
+            run = await job_scheduler.run_job("locked_job")
+        assert run.status == "skipped", "Expected the run to be skipped while another worker holds the lock."
+        assert not calls, "Expected the job not to run."
+        run = await job_scheduler.run_job("locked_job")
+        assert run.status == "success" and calls, "Expected the job to run once the lock is free."
+    except Exception as e:
+        pytest.fail(f"Failed to skip a job locked by another worker: {str(e)}")
+
+@pytest.mark.asyncio
+async def test_006_labeling_job_closes_read_session_before_waiting(monkeypatch):
+    """
+    The read session of the labeling job only covers the start of the labeling,
+    so it is not held open while the background task runs.
+    """
+    from contextlib import asynccontextmanager
+    from app import scheduler as scheduler_module
+    from app.services.llmService import LLMService
+    try:
+        read_session_open = []
+        open_read_session = sessionmanager.read_session
+
+        @asynccontextmanager
+        async def tracked_read_session():
+            async with open_read_session() as read_session:
+                read_session_open.append(True)
+                try:
+                    yield read_session
+                finally:
+                    read_session_open[-1] = False
+
+        async def label_today(self, batch_size=None, hours=24, return_task=False):
+            async def labeling():
+                assert read_session_open == [False], "Expected the read session to be closed during the labeling."
+            return "started", asyncio.create_task(labeling())
+
+        monkeypatch.setattr(sessionmanager, "read_session", tracked_read_session)
+        monkeypatch.setattr(LLMService, "label_reddit_sentiments_today_service", label_today)
+        message = await scheduler_module.label_reddit_sentiments_job()
+        assert message == "started", f"Unexpected message: {message}"
+    except Exception as e:
+        pytest.fail(f"Failed to close the read session of the labeling job: {str(e)}")